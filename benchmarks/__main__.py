@@ -0,0 +1,178 @@
+"""Run the DOI Trace benchmark suite.
+
+Usage:
+    python -m benchmarks [--tier small|medium|large] [--only NAME] [--baseline FILE]
+
+Results are written as JSON (by default to benchmarks/baselines/<version>-<tier>.json)
+and, when a baseline is given, compared against it so regressions show up
+between versions.
+"""
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tomllib
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import click
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def project_version() -> str:
+    """Read the project version from pyproject.toml."""
+    with open(ROOT / 'pyproject.toml', 'rb') as f:
+        return tomllib.load(f)['project']['version']
+
+
+def git_revision() -> str:
+    """Get the current git revision, if available."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def time_call(func, repeat: int) -> float:
+    """Time a callable, returning the best of ``repeat`` runs (one run if it is slow)."""
+    best = None
+    for _ in range(repeat):
+        quiet = io.StringIO()
+        with contextlib.redirect_stdout(quiet), contextlib.redirect_stderr(quiet):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        if elapsed > 10:
+            break
+    return best
+
+
+def retained_megabytes(func) -> float:
+    """Measure the memory still allocated by a callable's return value, in megabytes."""
+    quiet = io.StringIO()
+    with contextlib.redirect_stdout(quiet), contextlib.redirect_stderr(quiet):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = func()
+            gc.collect()
+            retained, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    del result
+    return retained / 2 ** 20
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """Print a comparison against a baseline; returns True if any benchmark regressed."""
+    regressed = False
+    click.echo(f"\nComparison against {baseline.get('version')} ({baseline.get('git', '')}):")
+    for name, sizes in results['results'].items():
+        for size, result in sizes.items():
+            old = baseline.get('results', {}).get(name, {}).get(size)
+            if not old or 'seconds' not in old or 'seconds' not in result:
+                continue
+            ratio = result['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+            flag = ''
+            if ratio > threshold:
+                flag = '  REGRESSION'
+                regressed = True
+            elif ratio < 1 / threshold:
+                flag = '  faster'
+            click.echo(f"  {name} [{size} {result['unit']}]: {old['seconds']:.3f}s -> {result['seconds']:.3f}s "
+                       f"({ratio:.2f}x){flag}")
+            if old.get('megabytes') and 'megabytes' in result:
+                ratio = result['megabytes'] / old['megabytes']
+                flag = ''
+                if ratio > threshold:
+                    flag = '  REGRESSION'
+                    regressed = True
+                click.echo(f"  {name} [{size} {result['unit']}]: {old['megabytes']:.1f} MB -> "
+                           f"{result['megabytes']:.1f} MB ({ratio:.2f}x){flag}")
+    return regressed
+
+
+@click.command()
+@click.option('--tier', type=click.Choice(['small', 'medium', 'large']), default='small', show_default=True,
+              help="Size tier to run (each tier includes the smaller ones)")
+@click.option('--only', multiple=True, help="Only run benchmarks whose name contains this text (repeatable)")
+@click.option('--catalog-rows', default=10000, show_default=True, help="Rows in the synthetic EOS catalog")
+@click.option('--repeat', default=3, show_default=True, help="Runs per size; the best time is kept")
+@click.option('--max-seconds', default=120.0, show_default=True,
+              help="Skip the remaining sizes of a benchmark once one size takes longer than this")
+@click.option('--output', type=click.Path(dir_okay=False), default=None,
+              help="Where to write the results (defaults to benchmarks/baselines/<version>-<tier>.json)")
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Baseline results to compare against")
+@click.option('--threshold', default=1.25, show_default=True, help="Slowdown ratio reported as a regression")
+def main(tier, only, catalog_rows, repeat, max_seconds, output, baseline, threshold):
+    """Time the DOI Trace hot paths on synthetic data."""
+    output = Path(output) if output else ROOT / 'benchmarks' / 'baselines' / f"{project_version()}-{tier}.json"
+    results = {
+        'version': project_version(),
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'tier': tier,
+        'catalog_rows': catalog_rows,
+        'results': {}
+    }
+
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('SERP_API_KEY', 'benchmark')
+    os.environ.setdefault('SCOPUS_API_KEY', 'benchmark')
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='doi-trace-bench-') as root:
+        # The sources read their inputs relative to the working directory
+        os.chdir(root)
+        try:
+            from .suite import BENCHMARKS, Workspace, sizes_for
+            with contextlib.redirect_stdout(io.StringIO()):
+                workspace = Workspace(Path(root), catalog_rows)
+            for name, spec in BENCHMARKS.items():
+                if only and not any(text in name for text in only):
+                    continue
+                results['results'][name] = {}
+                skip = False
+                for size in sizes_for(name, tier):
+                    if skip:
+                        results['results'][name][str(size)] = {'unit': spec['unit'], 'skipped': True}
+                        continue
+                    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                        func = spec['setup'](workspace, size)
+                    seconds = time_call(func, repeat)
+                    result = results['results'][name][str(size)] = {'unit': spec['unit'], 'seconds': round(seconds, 6)}
+                    if spec['memory']:
+                        result['megabytes'] = round(retained_megabytes(func), 3)
+                        click.echo(f"{name} [{size} {spec['unit']}]: {seconds:.3f}s, {result['megabytes']:.1f} MB")
+                    else:
+                        click.echo(f"{name} [{size} {spec['unit']}]: {seconds:.3f}s")
+                    skip = seconds > max_seconds
+        finally:
+            os.chdir(cwd)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=4)
+    click.echo(f"\nResults saved to {output}")
+
+    if baseline:
+        with open(baseline) as f:
+            if compare(results, json.load(f), threshold):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
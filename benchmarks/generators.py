@@ -0,0 +1,306 @@
+"""Synthetic data generators matching the shapes of DOI Trace inputs.
+
+Every generator is seeded, so the same size always produces the same data and
+timings stay comparable between versions.
+"""
+import csv
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+AGENCIES = (
+    'Alaska Satellite Facility DAAC', 'Goddard Earth Sciences Data and Information Services Center',
+    'Land Processes DAAC', 'Langley Atmospheric Science Data Center DAAC',
+    'Level 1 and Atmosphere Archive and Distribution System', 'National Snow and Ice Data Center DAAC',
+    'Ocean Biology DAAC', 'Oak Ridge National Laboratory DAAC', 'Physical Oceanography DAAC',
+    'Socioeconomic Data and Applications Center', 'Global Hydrometeorology Resource Center DAAC'
+)
+INSTRUMENTS = ('MODIS', 'AIRS', 'OMI', 'MLS', 'GPM', 'SMAP', 'ICESAT2', 'VIIRS', 'CERES', 'MERRA2', 'TRMM', 'ASTER')
+WORDS = (
+    'aerosol', 'albedo', 'anomaly', 'arctic', 'biomass', 'carbon', 'climate', 'cloud', 'drought',
+    'evapotranspiration', 'fire', 'flux', 'glacier', 'global', 'land', 'moisture', 'ocean', 'precipitation',
+    'radiation', 'reanalysis', 'retrieval', 'satellite', 'sea', 'snow', 'soil', 'surface', 'temperature',
+    'trend', 'vegetation', 'water', 'wind'
+)
+SURNAMES = ('Smith', 'Chen', 'Garcia', 'Muller', 'Kumar', 'Nakamura', 'Okafor', 'Silva', 'Novak', 'Dubois')
+# Misspellings that _clean_bibtex_data repairs, paired with the correct text
+OCR_VARIANTS = (('MOD08', 'MODO8'), ('MOD09', 'MODO9'), ('MOD13', 'MODI3'), ('MOD35', 'MQD35'), ('SEAWIFS', 'SEAVVIFS'))
+
+
+def catalog_dois(rows: int, seed: int = 0) -> List[Dict[str, str]]:
+    """Generate EOS catalog rows in the shape returned by ``eosutil.getEOSCSV``."""
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(rows):
+        kind = rng.random()
+        if kind < 0.8:
+            instrument = rng.choice(INSTRUMENTS)
+            shortname = f"{instrument[:3]}{i:05d}_{rng.choice(('L2', 'L3', 'M3', 'D3'))}"
+            doi = f"10.5067/{instrument}/{shortname}.{rng.choice(('006', '061', '001', '003'))}"
+        elif kind < 0.9:
+            shortname = f"ORNL_{i}"
+            doi = f"10.3334/ORNLDAAC/{1000 + i}"
+        else:
+            shortname = f"SEDAC_{i}"
+            doi = f"10.7927/H4{rng.getrandbits(40):010X}"
+        catalog.append({'EOS DOI': doi.upper(), 'LP Agency': rng.choice(AGENCIES), 'Shortname': shortname})
+    return catalog
+
+
+def write_catalog_csv(directory: Path, rows: int, seed: int = 0) -> List[Dict[str, str]]:
+    """Write a synthetic EOSDIS catalog CSV (DOI_NAME, LP_AGENCY, SPECIAL columns).
+
+    Returns:
+        The catalog rows that were written
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    catalog = catalog_dois(rows, seed)
+    with open(directory / 'eosdis_dois.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['DOI_NAME', 'LP_AGENCY', 'SPECIAL', 'STATUS'])
+        for row in catalog:
+            writer.writerow([row['EOS DOI'], row['LP Agency'], row['Shortname'], 'Registered'])
+    return catalog
+
+
+def _title(rng: random.Random) -> str:
+    return ' '.join(rng.sample(WORDS, rng.randint(6, 12))).capitalize()
+
+
+def _citing_doi(rng: random.Random) -> str:
+    return f"10.{rng.randint(1000, 9999)}/{rng.choice(('JGR', 'RSE', 'ACP', 'TC'))}.{rng.getrandbits(40):010X}"
+
+
+def bibtex_entry(index: int, catalog: List[Dict[str, str]], rng: random.Random) -> str:
+    """Generate one Web of Science BibTeX record ("Full Record and Cited References")."""
+    wos_id = f"WOS:{index:015d}"
+    authors = ' and '.join(f"{rng.choice(SURNAMES)}, {chr(65 + rng.randint(0, 25))}." for _ in range(rng.randint(1, 6)))
+    references = []
+    for _ in range(rng.randint(20, 60)):
+        year = rng.randint(1990, 2024)
+        references.append(f"   {rng.choice(SURNAMES)} {chr(65 + rng.randint(0, 25))}, {year}, J GEOPHYS RES, V{rng.randint(1, 130)}, "
+                          f"P{rng.randint(1, 9999)}, DOI {_citing_doi(rng)}.")
+    for _ in range(rng.randint(1, 4)):
+        doi = rng.choice(catalog)['EOS DOI']
+        for correct, variant in OCR_VARIANTS:
+            if correct in doi and rng.random() < 0.2:
+                doi = doi.replace(correct, variant)
+        references.append(f"   NASA, {rng.randint(2005, 2024)}, DATASET, DOI [{doi}, DOI {doi}].")
+    if rng.random() < 0.05:
+        references.append(f"   Unregistered, 2020, DATA, DOI 10.5067/NOT/IN/CATALOG{index}.")
+    return (
+        f"@article{{ {wos_id},\n"
+        f"Author = {{{authors}}},\n"
+        f"Title = {{{_title(rng)}}},\n"
+        f"Journal = {{JOURNAL OF GEOPHYSICAL RESEARCH-ATMOSPHERES}},\n"
+        f"Year = {{{rng.randint(2015, 2025)}}},\n"
+        f"Volume = {{{rng.randint(1, 130)}}},\n"
+        f"DOI = {{{_citing_doi(rng)}}},\n"
+        f"ISSN = {{{rng.randint(1000, 9999)}-{rng.randint(100, 999)}X}},\n"
+        f"EISSN = {{{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}}},\n"
+        f"Unique-ID = {{{wos_id}}},\n"
+        f"Cited-References = {{\n" + '\n'.join(references) + "}},\n"
+        f"}}\n\n"
+    )
+
+
+def bibtex_export(target_bytes: int, catalog: List[Dict[str, str]], seed: int = 0) -> str:
+    """Generate a WoS BibTeX export of roughly ``target_bytes`` bytes."""
+    rng = random.Random(seed)
+    chunks = []
+    size = 0
+    index = 0
+    while size < target_bytes:
+        entry = bibtex_entry(index, catalog, rng)
+        chunks.append(entry)
+        size += len(entry)
+        index += 1
+    return ''.join(chunks)
+
+
+def event_data_pages(pages: int, events_per_page: int, catalog: List[Dict[str, str]], seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate Crossref Event Data API pages for the catalog's DOIs."""
+    rng = random.Random(seed)
+    result = []
+    for page in range(pages):
+        events = []
+        for _ in range(events_per_page):
+            events.append({
+                'source_id': rng.choice(('crossref', 'crossref', 'crossref', 'datacite', 'twitter', 'wikipedia')),
+                'obj_id': f"https://doi.org/{rng.choice(catalog)['EOS DOI'].lower()}",
+                'subj_id': f"https://doi.org/{_citing_doi(rng).lower()}",
+                'relation_type_id': 'references'
+            })
+        result.append({'status': 'ok', 'message': {
+            'next-cursor': str(page + 1) if page + 1 < pages else None,
+            'events': events
+        }})
+    return result
+
+
+def scopus_hits(per_doi: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate one Scopus search result list (``ElsSearch.results``)."""
+    rng = random.Random(seed)
+    if per_doi == 0:
+        return [{'@_fa': 'true', 'error': 'Result set was empty'}]
+    hits = []
+    for _ in range(per_doi):
+        # Shared IDs let the same paper show up for several catalog DOIs, as it does in practice
+        scopus_id = rng.randint(0, per_doi * 50)
+        hits.append({
+            'dc:identifier': f"SCOPUS_ID:{85000000000 + scopus_id}",
+            'prism:doi': f"10.1016/J.RSE.{scopus_id:08d}",
+            'dc:title': f"Remote sensing study {scopus_id}",
+            'prism:coverDate': f"{2010 + scopus_id % 15}-06-01",
+            'prism:isbn': [{'$': f"978{scopus_id:010d}"}] if scopus_id % 7 == 0 else None,
+            'prism:issn': '00344257',
+            'prism:eIssn': '18790704'
+        })
+    return hits
+
+
+def scholar_results(count: int, catalog: List[Dict[str, str]], seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate SerpAPI Google Scholar organic results, tagged with the EOS DOI searched."""
+    rng = random.Random(seed)
+    results = []
+    for i in range(count):
+        year = rng.randint(2010, 2025)
+        author = rng.choice(SURNAMES)
+        doi = _citing_doi(rng)
+        link = rng.choice((
+            f"https://doi.org/{doi}",
+            f"https://agupubs.onlinelibrary.wiley.com/doi/full/{doi}",
+            f"https://acp.copernicus.org/articles/{rng.randint(10, 24)}/{rng.randint(1, 9999)}/{year}/",
+            f"https://www.nature.com/articles/s{rng.randint(41000, 41999)}-0{rng.randint(10, 25)}-{rng.randint(1000, 9999)}-{rng.randint(0, 9)}",
+            f"https://journals.ametsoc.org/view/journals/clim/{rng.randint(20, 36)}/{rng.randint(1, 24)}/JCLI-D-{rng.randint(10, 24)}-{rng.randint(1000, 9999)}.1.xml",
+            f"https://www.sciencedirect.com/science/article/pii/S{rng.getrandbits(48):015d}",
+            f"https://essopenarchive.org/doi/full/{doi}",
+            f"https://example.org/papers/{rng.getrandbits(32):08x}.pdf",
+        ))
+        result = {
+            'position': i % 20,
+            'title': f"{_title(rng)} &amp; <b>{rng.choice(WORDS)}</b>" if rng.random() < 0.3 else _title(rng),
+            'result_id': f"{rng.getrandbits(48):012x}",
+            'link': link,
+            'publication_info': {'summary': f"{author[0]} {author}, B Other - Journal of {rng.choice(WORDS).capitalize()}, {year} - publisher.org"},
+            'doi': rng.choice(catalog)['EOS DOI']
+        }
+        if rng.random() < 0.6:
+            result['authors'] = [{'name': f"{author[0]} {author}"}]
+        results.append(result)
+    return results
+
+
+def api_titles(count: int, distinct: float = 0.3, seed: int = 0) -> List[str]:
+    """Generate titles as Crossref/Scholar return them: some with inline markup, entities or accents, many repeated.
+
+    Args:
+        count: Number of titles
+        distinct: Share of the titles that are distinct
+        seed: Random seed
+    """
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(max(int(count * distinct), 1)):
+        words = rng.sample(WORDS, rng.randint(6, 12))
+        roll = rng.random()
+        if roll < 0.15:
+            words[rng.randrange(len(words))] = f"<i>{words[0]}</i>"
+        elif roll < 0.25:
+            words.append("CO<sub>2</sub>")
+        elif roll < 0.35:
+            words.insert(rng.randrange(len(words)), '&amp;')
+        elif roll < 0.4:
+            words.append('na\u00efve s\u00e9ries\u2026')
+        elif roll < 0.42:
+            words.insert(0, '<mml:math><mml:mi>\u03b1</mml:mi></mml:math>')
+        pool.append(' '.join(words).capitalize())
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def processed_scholar_citations(count: int, catalog: List[Dict[str, str]], seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate the output of ``GoogleScholar._process_urls`` / ``_get_crossref_metadata``."""
+    rng = random.Random(seed)
+    return [{
+        'result_id': f"{rng.getrandbits(48):012x}",
+        'link': '',
+        'pub_doi': _citing_doi(rng) if rng.random() < 0.9 else '',
+        'author': rng.choice(SURNAMES),
+        'year': f"({rng.randint(2010, 2025)})",
+        'title': _title(rng),
+        'dois': [rng.choice(catalog)['EOS DOI']]
+    } for _ in range(count)]
+
+
+def source_outputs(publications: int, catalog: List[Dict[str, str]], seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate one per-source output file (``{source}_citations_*.json``) in the combined input shape.
+
+    DOIs are drawn from a shared pool so that sources overlap the way they do in practice.
+    """
+    rng = random.Random(seed)
+    pool = random.Random(0)
+    shared = [_citing_doi(pool) for _ in range(publications * 2)]
+    records = []
+    for _ in range(publications):
+        references = []
+        for row in rng.sample(catalog, rng.randint(1, 3)):
+            references.append({'EOS DOI': row['EOS DOI'], 'LP Agency': row['LP Agency'], 'Shortname': row['Shortname']})
+        records.append({
+            'DOI': rng.choice(shared) if rng.random() < 0.97 else '',
+            'Title': _title(rng),
+            'Year': str(rng.randint(2010, 2025)),
+            'Cited-References': references
+        })
+    return records
+
+
+def _variant(title: str, rng: random.Random) -> str:
+    """Vary a title the way two sources render the same paper differently."""
+    roll = rng.random()
+    if roll < 0.3:
+        return title.upper()
+    if roll < 0.5:
+        words = title.split()
+        return ' '.join(f"<i>{word}</i>" if i == 1 else word for i, word in enumerate(words))
+    if roll < 0.7:
+        return title + '.'
+    if roll < 0.8:
+        return title.replace(' ', '  ', 1)
+    return title
+
+
+def linkage_records(publications: int, sources: List[str], without_doi: float = 0.2,
+                    seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate ``RecordLinker.link`` input: papers reported by several sources, some without a DOI.
+
+    Args:
+        publications: Distinct papers
+        sources: Source names; each paper is reported by one to all of them
+        without_doi: Share of the reports that lack a DOI (their titles vary slightly)
+        seed: Random seed
+    """
+    rng = random.Random(seed)
+    records = []
+    for _ in range(publications):
+        doi, title, year = _citing_doi(rng), _title(rng), rng.randint(2010, 2025)
+        for source in rng.sample(sources, rng.randint(1, len(sources))):
+            if rng.random() < without_doi:
+                records.append({'source': source, 'doi': '', 'title': _variant(title, rng),
+                                'year': str(year + (1 if rng.random() < 0.1 else 0))})
+            else:
+                records.append({'source': source, 'doi': doi, 'title': title, 'year': str(year)})
+    rng.shuffle(records)
+    return records
+
+
+def write_source_outputs(directory: Path, sources: List[str], publications: int,
+                         catalog: List[Dict[str, str]], seed: int = 0) -> None:
+    """Write per-source output files for ``CitationCombiner.combine_sources``."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for offset, source in enumerate(sources):
+        with open(directory / f"{source}_citations_20250101_000000.json", 'w') as f:
+            json.dump(source_outputs(publications, catalog, seed + offset), f)
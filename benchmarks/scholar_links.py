@@ -0,0 +1,72 @@
+"""Golden corpus of Google Scholar result links for ``doi_trace.doi_extract``.
+
+``scholar_links.tsv`` pairs each link with the DOI expected from it (empty
+when the link doesn't identify one). The ``extract_doi`` benchmark refuses
+to run while any link disagrees, so rule changes show up as corpus diffs.
+
+Usage:
+    python -m benchmarks.scholar_links [DIRECTORY ...]
+
+Collects the links of the Google Scholar responses under the given
+directories (the SerpAPI cache and the response archive by default) and
+appends the ones not yet in the corpus with their current extraction, to be
+reviewed before committing.
+"""
+import gzip
+import json
+import sys
+from pathlib import Path
+from typing import Callable, Iterator, List, Tuple
+
+
+CORPUS = Path(__file__).resolve().parent / 'scholar_links.tsv'
+
+
+def load_corpus() -> List[Tuple[str, str]]:
+    """Read the corpus as (link, expected DOI) pairs."""
+    pairs = []
+    with open(CORPUS) as f:
+        for line in f:
+            if line.strip() and not line.startswith('#'):
+                link, _, doi = line.rstrip('\n').partition('\t')
+                pairs.append((link, doi))
+    return pairs
+
+
+def check_corpus(extract: Callable[[str], str]) -> List[Tuple[str, str, str]]:
+    """Run an extractor over the corpus.
+
+    Returns:
+        (link, expected, extracted) for every link that disagrees
+    """
+    return [(link, doi, extract(link)) for link, doi in load_corpus() if extract(link) != doi]
+
+
+def harvest(directories: List[Path]) -> Iterator[str]:
+    """Yield the organic result links of the SerpAPI responses stored under the directories."""
+    for directory in directories:
+        for path in sorted(Path(directory).rglob('*.gz')):
+            try:
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    body = json.load(f)
+            except (OSError, ValueError):
+                continue  # not JSON (e.g. an archived BibTeX or XML response)
+            body = body.get('body', body) if isinstance(body, dict) else None  # cache entries wrap the body
+            for result in (body or {}).get('organic_results', []) if isinstance(body, dict) else []:
+                if result.get('link'):
+                    yield result['link']
+
+
+def main(argv: List[str]) -> None:
+    from doi_trace.doi_extract import extract_doi
+    directories = [Path(arg) for arg in argv] or [Path('data/cache/serpapi'), Path('data/archive/objects')]
+    known = {link for link, _ in load_corpus()}
+    new = sorted(set(harvest(directories)) - known)
+    with open(CORPUS, 'a') as f:
+        for link in new:
+            f.write(f"{link}\t{extract_doi(link)}\n")
+    print(f"Added {len(new)} links to {CORPUS}; review the extracted DOIs before committing")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
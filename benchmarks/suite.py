@@ -0,0 +1,337 @@
+"""Benchmarks for the DOI Trace hot paths.
+
+Each benchmark is a setup function registered with ``@benchmark``. Setup runs
+untimed inside the benchmark workspace and returns the callable to time.
+Sizes are grouped into tiers; ``small`` runs in well under a minute, while
+``large`` reaches production scale (500k catalog rows, 2 GB BibTeX exports).
+"""
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from . import generators
+
+
+BENCHMARKS = {}
+TIERS = ('small', 'medium', 'large')
+
+
+def benchmark(name: str, unit: str, small: List[int], medium: List[int] = (), large: List[int] = (),
+              memory: bool = False):
+    """Register a benchmark setup function.
+
+    Args:
+        name: Name of the timed code path
+        unit: Unit of the size parameter (e.g. 'MB', 'citations')
+        small: Sizes run in the small tier
+        medium: Extra sizes run in the medium tier
+        large: Extra sizes run in the large tier
+        memory: Also measure the memory held by what the callable returns
+    """
+    def decorator(setup: Callable[['Workspace', int], Callable[[], Any]]):
+        BENCHMARKS[name] = {
+            'setup': setup,
+            'unit': unit,
+            'memory': memory,
+            'tiers': {'small': list(small), 'medium': list(medium), 'large': list(large)}
+        }
+        return setup
+    return decorator
+
+
+def sizes_for(name: str, tier: str) -> List[int]:
+    """Get the sizes a benchmark runs in a tier (each tier includes the smaller ones)."""
+    tiers = BENCHMARKS[name]['tiers']
+    sizes = []
+    for level in TIERS[:TIERS.index(tier) + 1]:
+        sizes.extend(tiers[level])
+    return sizes
+
+
+class Workspace:
+    """Working directory laid out the way the sources expect.
+
+    The sources read ``eosdis_csv_files/``, ``data/`` and ``WoS/`` relative to
+    the current directory, so benchmarks run with the workspace as cwd.
+    """
+
+    def __init__(self, root: Path, catalog_rows: int = 10000) -> None:
+        self.root = Path(root)
+        self.catalog_rows = catalog_rows
+        self._catalogs = {}
+        self._bibtex = {}
+        (self.root / 'data').mkdir(parents=True, exist_ok=True)
+        with open(self.root / 'data' / 'crossref_etiquette.json', 'w') as f:
+            json.dump({'project_name': 'DOI Trace benchmarks', 'version': 'bench',
+                       'organization': 'NASA', 'email': 'bench@example.org'}, f)
+        self.use_catalog(catalog_rows)
+
+    def catalog(self, rows: int) -> List[Dict[str, str]]:
+        """Get synthetic catalog rows (cached)."""
+        if rows not in self._catalogs:
+            self._catalogs[rows] = generators.catalog_dois(rows)
+        return self._catalogs[rows]
+
+    def use_catalog(self, rows: int) -> List[Dict[str, str]]:
+        """Write a catalog of the given size into ``eosdis_csv_files/``."""
+        generators.write_catalog_csv(self.root / 'eosdis_csv_files', rows)
+        self.catalog_rows = rows
+        return self.catalog(rows)
+
+    def bibtex(self, megabytes: int) -> str:
+        """Get a synthetic WoS BibTeX export of the given size (cached)."""
+        if megabytes not in self._bibtex:
+            self._bibtex.clear()  # exports reach gigabytes, keep only one in memory
+            self._bibtex[megabytes] = generators.bibtex_export(megabytes * 1024 * 1024, self.catalog(self.catalog_rows))
+        return self._bibtex[megabytes]
+
+
+@benchmark('WebOfScience._clean_bibtex_data', 'MB', small=[1, 10], medium=[100], large=[500, 2048])
+def clean_bibtex(workspace: Workspace, size: int):
+    from doi_trace.reference_sources.web_of_science import WebOfScience
+    data = workspace.bibtex(size)
+    wos = WebOfScience()
+    return lambda: wos._clean_bibtex_data(data)
+
+
+@benchmark('WebOfScience._parse_bibtex_entries', 'MB', small=[1, 10], medium=[100], large=[500, 2048])
+def parse_bibtex(workspace: Workspace, size: int):
+    from doi_trace.reference_sources.web_of_science import WebOfScience
+    wos = WebOfScience()
+    data = wos._clean_bibtex_data(workspace.bibtex(size))
+    wos._get_scanner()  # built once per run from the catalog, outside the timing
+    return lambda: wos._parse_bibtex_entries(data)
+
+
+@benchmark('DOIScanner.scan', 'MB', small=[1, 10], medium=[100], large=[500])
+def doi_scanner_scan(workspace: Workspace, size: int):
+    from doi_trace.doi_scanner import DOIScanner
+    # Raw export, so OCR misreadings reach the scanner instead of being cleaned up first
+    data = workspace.bibtex(size)
+    scanner = DOIScanner(row['EOS DOI'] for row in workspace.catalog(workspace.catalog_rows))
+    return lambda: scanner.scan(data)
+
+
+@benchmark('DOIScanner [build]', 'catalog rows', small=[10000, 50000], medium=[200000], large=[500000])
+def doi_scanner_build(workspace: Workspace, size: int):
+    from doi_trace.doi_scanner import DOIScanner
+    dois = [row['EOS DOI'] for row in workspace.catalog(size)]
+    return lambda: DOIScanner(dois)
+
+
+def _raw_citations(workspace: Workspace, size: int) -> List[Dict[str, str]]:
+    """Raw DataCite/Crossref citations: citing DOI plus the EOS DOI it cites."""
+    catalog = workspace.catalog(workspace.catalog_rows)
+    records = generators.source_outputs(size, catalog)
+    citations = []
+    for record in records:
+        for ref in record['Cited-References']:
+            citations.append({'DOI': record['DOI'] or 'NO-DOI', 'EOS DOI': ref['EOS DOI']})
+    return citations[:size]
+
+
+@benchmark('DataCite._combine_duplicates', 'citations', small=[100, 1000], medium=[3000], large=[10000])
+def datacite_combine_duplicates(workspace: Workspace, size: int):
+    from doi_trace.reference_sources.datacite import DataCite
+    datacite = DataCite()
+    citations = _raw_citations(workspace, size)
+    return lambda: datacite._combine_duplicates(citations)
+
+
+@benchmark('Crossref._combine_duplicates', 'citations', small=[100, 1000], medium=[3000], large=[10000])
+def crossref_combine_duplicates(workspace: Workspace, size: int):
+    from doi_trace.reference_sources.crossref import Crossref
+    crossref = Crossref()
+    citations = _raw_citations(workspace, size)
+    return lambda: crossref._combine_duplicates(citations)
+
+
+@benchmark('Crossref.fetch_citations[event filtering]', 'events', small=[1000, 10000], medium=[50000], large=[200000])
+def crossref_event_filtering(workspace: Workspace, size: int):
+    from doi_trace.reference_sources.crossref import Crossref
+    crossref = Crossref()
+    per_page = 1000
+    pages = generators.event_data_pages(max(size // per_page, 1), min(size, per_page), workspace.catalog(workspace.catalog_rows))
+
+    def event_data(prefix, cursor=''):
+        page = int(cursor or 0)
+        return pages[page] if prefix == crossref.prefixes[0] else None
+
+    # Only the paging/filtering loop is timed; the network-bound stages are skipped
+    crossref._get_event_data = event_data
+    crossref._combine_duplicates = lambda citations: citations
+    crossref._extract_metadata = lambda citations: citations
+    return lambda: crossref.fetch_citations(None)
+
+
+@benchmark('Scopus._match_scopus_eos', 'EOS DOIs', small=[100, 1000], medium=[3000], large=[10000])
+def match_scopus_eos(workspace: Workspace, size: int):
+    from doi_trace.reference_sources.scopus import Scopus
+    scopus = Scopus()
+    eos_dois = workspace.catalog(workspace.catalog_rows)[:size]
+    hits = {row['EOS DOI']: generators.scopus_hits(5 if i % 4 else 0, seed=i) for i, row in enumerate(eos_dois)}
+    scopus._get_scopus = lambda term: hits[term]
+    return lambda: scopus._match_scopus_eos(eos_dois)
+
+
+@benchmark('GoogleScholar._process_urls', 'results', small=[1000, 10000], medium=[100000], large=[300000])
+def scholar_process_urls(workspace: Workspace, size: int):
+    from doi_trace.reference_sources.google_scholar import GoogleScholar
+    scholar = GoogleScholar()
+    results = generators.scholar_results(size, workspace.catalog(workspace.catalog_rows))
+    return lambda: scholar._process_urls(results)
+
+
+@benchmark('GoogleScholar._match_with_eos', 'citations', small=[1000, 10000], medium=[100000], large=[300000])
+def scholar_match_with_eos(workspace: Workspace, size: int):
+    from doi_trace.reference_sources.google_scholar import GoogleScholar
+    scholar = GoogleScholar()
+    catalog = workspace.catalog(workspace.catalog_rows)
+    citations = generators.processed_scholar_citations(size, catalog)
+    return lambda: scholar._match_with_eos(citations, catalog)
+
+
+@benchmark('GoogleScholar._match_with_eos [catalog scale]', 'catalog rows', small=[10000, 50000], medium=[200000], large=[500000])
+def scholar_match_with_eos_catalog(workspace: Workspace, size: int):
+    from doi_trace.reference_sources.google_scholar import GoogleScholar
+    scholar = GoogleScholar()
+    catalog = workspace.catalog(size)
+    # A normal run's worth of processed citations against a catalog of the given size
+    citations = generators.processed_scholar_citations(100000, catalog)
+    return lambda: scholar._match_with_eos(citations, catalog)
+
+
+@benchmark('extract_doi', 'links', small=[10000, 100000], medium=[1000000])
+def extract_doi(workspace: Workspace, size: int):
+    from doi_trace.doi_extract import extract_doi
+    from .scholar_links import check_corpus, load_corpus
+
+    # Guard: the rules must still reproduce the golden corpus
+    mismatches = check_corpus(extract_doi)
+    if mismatches:
+        raise RuntimeError(f"extract_doi disagrees with scholar_links.tsv: {mismatches[:5]}")
+
+    corpus = [link for link, _ in load_corpus()]
+    links = [result['link'] for result in generators.scholar_results(size - size // 2, workspace.catalog(workspace.catalog_rows))]
+    links += (corpus * (size // 2 // len(corpus) + 1))[:size // 2]
+
+    def run():
+        for link in links:
+            extract_doi(link)
+    return run
+
+
+@benchmark('normalize_titles', 'titles', small=[10000, 100000], medium=[1000000])
+def normalize_titles(workspace: Workspace, size: int):
+    from doi_trace.normalize import normalize_title, normalize_titles
+    titles = generators.api_titles(size)
+
+    def run():
+        normalize_title.cache_clear()  # time a cold cache; repeats within the list still hit it
+        normalize_titles(titles)
+    return run
+
+
+@benchmark('normalize_titles [BeautifulSoup per call]', 'titles', small=[10000, 100000], medium=[1000000])
+def normalize_titles_baseline(workspace: Workspace, size: int):
+    import unicodedata
+    from html import unescape
+    from bs4 import BeautifulSoup
+    titles = generators.api_titles(size)
+
+    # The per-title cleanup the sources used before doi_trace.normalize
+    def run():
+        for title in titles:
+            title = BeautifulSoup(unescape(title), 'lxml').text
+            unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
+    return run
+
+
+@benchmark('RecordLinker.link', 'publications', small=[10000, 50000], medium=[200000], large=[1000000])
+def record_linker(workspace: Workspace, size: int):
+    from doi_trace.linkage import RecordLinker
+    records = generators.linkage_records(size, ['wos', 'scopus', 'crossref', 'datacite', 'google_scholar'])
+    linker = RecordLinker()
+    return lambda: linker.link(records)
+
+
+@benchmark('CitationCombiner.combine_sources', 'publications per source', small=[100, 500], medium=[2000], large=[10000])
+def combine_sources(workspace: Workspace, size: int):
+    from doi_trace.combine import CitationCombiner
+    sources = ['wos', 'scopus', 'crossref', 'datacite', 'google_scholar']
+    generators.write_source_outputs(workspace.root / 'data', sources, size, workspace.catalog(workspace.catalog_rows))
+    combiner = CitationCombiner()
+    return lambda: combiner.combine_sources(sources, 'benchmark')
+
+
+def _source_output_json(workspace: Workspace, size: int) -> str:
+    """A source output file's contents; both loaders below start from the same JSON text."""
+    return json.dumps(generators.source_outputs(size, workspace.catalog(workspace.catalog_rows)))
+
+
+@benchmark('source outputs [dicts]', 'publications', small=[10000, 100000], medium=[500000], memory=True)
+def source_output_dicts(workspace: Workspace, size: int):
+    text = _source_output_json(workspace, size)
+    # What CitationCombiner held per source before doi_trace.records
+    return lambda: json.loads(text)
+
+
+@benchmark('source outputs [records]', 'publications', small=[10000, 100000], medium=[500000], memory=True)
+def source_output_records(workspace: Workspace, size: int):
+    from doi_trace.records import Catalog, Citation
+    text = _source_output_json(workspace, size)
+
+    def run():
+        catalog = Catalog()
+        return catalog, [Citation.from_record(record, 'crossref', catalog) for record in json.loads(text)]
+    return run
+
+
+@benchmark('snapshot diff', 'publications', small=[100000], medium=[1000000])
+def snapshot_diff(workspace: Workspace, size: int):
+    from doi_trace.diff import diff_snapshots
+    catalog = workspace.catalog(workspace.catalog_rows)
+    paths = []
+    for seed in (0, 1):
+        # Two runs of a source: the shared DOI pool makes most publications appear in both
+        path = workspace.root / 'data' / f"snapshot_{seed}_{size}.json"
+        with open(path, 'w') as f:
+            json.dump(generators.source_outputs(size, catalog, seed=seed), f, indent=4)
+        paths.append(path)
+    return lambda: sum(1 for _ in diff_snapshots(*paths))
+
+
+# Modules that must not be imported just to start the CLI (see doi_trace/registry.py)
+HEAVY_MODULES = ('pandas', 'bs4', 'lxml', 'elsapy', 'habanero', 'crossref', 'jellyfish', 'tqdm', 'requests',
+                 'eosutilities', 'doi_trace.reference_sources', 'doi_trace.combine', 'doi_trace.stub_server',
+                 'doi_trace.service')
+
+_IMPORTED_ON_HELP = """
+import sys
+from doi_trace.__main__ import cli
+try:
+    cli(['--help'], standalone_mode=False)
+finally:
+    heavy = sorted(name for name in sys.modules if name.split('.')[0] in {heavy} or name in {heavy})
+    sys.stderr.write(' '.join(heavy))
+"""
+
+
+@benchmark('doi_trace --help [startup]', 'invocations', small=[5])
+def cli_startup(workspace: Workspace, size: int):
+    import os
+    import subprocess
+    import sys
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).resolve().parent.parent))
+
+    # Guard: startup time only stays low while the heavy imports stay lazy
+    check = subprocess.run([sys.executable, '-c', _IMPORTED_ON_HELP.format(heavy=set(HEAVY_MODULES))],
+                           cwd=workspace.root, env=env, capture_output=True, text=True, check=True)
+    if check.stderr.strip():
+        raise RuntimeError(f"`doi_trace --help` imported heavy modules: {check.stderr.strip()}")
+
+    def run():
+        for _ in range(size):
+            subprocess.run([sys.executable, '-m', 'doi_trace', '--help'], cwd=workspace.root, env=env,
+                           stdout=subprocess.DEVNULL, check=True)
+    return run
@@ -1,18 +1,23 @@
 import click
+import importlib.util
+import json
+import sys
+from functools import partial
 from pathlib import Path
 from datetime import datetime
-from .reference_sources.web_of_science import WebOfScience
-from .reference_sources.scopus import Scopus
-from .reference_sources.crossref import Crossref
-from .reference_sources.datacite import DataCite
-from .reference_sources.google_scholar import GoogleScholar
 from .config import config
-from .combine import CitationCombiner
+from .registry import BUILTIN_SOURCES, available_sources, load_source, plugin_sources
+from .sharding import Shard, shard_output_path, find_shard_files, merge_shard_files
+from .metrics import metrics
+from .profiling import PROFILE_MODES, Profiler
 
 """
 This module handles ensuring that 
     1.) the click CLI always has a context object https://click.palletsprojects.com/en/stable/commands/
     2.) the top-level commands groups are always added to the CLI https://click.palletsprojects.com/en/stable/api/#click.Group.add_command
+
+Sources, the combiner and the stub server are imported inside the commands that
+use them (see registry.py), so that `--help` and unrelated commands start quickly.
 """
 
 
@@ -23,10 +28,138 @@ This module handles ensuring that
 #   - e.g., output_file.write(json.dumps(data, indent=PRETTY_PRINT_INDENT if context.obj.get("pretty") else None,))
 
 
-@click.group()
-def cli():
+class ShardParamType(click.ParamType):
+    """Click parameter type for `--shard i/N` specifications."""
+    name = "shard"
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, Shard):
+            return value
+        try:
+            return Shard.parse(value)
+        except ValueError as error:
+            self.fail(str(error), param, ctx)
+
+
+shard_option = click.option(
+    '--shard', type=ShardParamType(), default=None,
+    help="Only process shard i of N (zero-based, e.g. 0/4) and write a partial output file"
+)
+
+
+def _output_path(name, timestamp, shard=None):
+    """Build the output path for a source, or its partial path when sharded."""
+    if shard:
+        output_path = shard_output_path(config.get_directory('output'), name, timestamp, shard)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        return output_path
+    return f"{name}_citations_{timestamp}.json"
+
+
+date_options = [
+    click.option('--start-date', type=click.DateTime(formats=["%Y-%m-%d"]), help="Start date for citation search (YYYY-MM-DD)", required=True),
+    click.option('--end-date', type=click.DateTime(formats=["%Y-%m-%d"]), help="End date for citation search (YYYY-MM-DD)", required=True),
+]
+
+
+def _plugin_command(name):
+    """Build the subcommand for a source registered through the `doi_trace.sources` entry point group."""
+    def run(start_date, end_date):
+        from .orchestrator import run_processor
+        processor = load_source(name)()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = run_processor(processor, start_date, end_date, _output_path(name.replace('-', '_'), timestamp))
+        click.echo(f"Results saved to {output_path}")
+
+    for option in reversed(date_options):
+        run = option(run)
+    return click.Command(name, callback=run, params=run.__click_params__,
+                         help=f"Fetch citations from the {name} source plugin.")
+
+
+class SourceGroup(click.Group):
+    """Click group that also offers a subcommand for every plugin source."""
+
+    def list_commands(self, ctx):
+        return super().list_commands(ctx) + sorted(plugin_sources())
+
+    def get_command(self, ctx, name):
+        command = super().get_command(ctx, name)
+        if command is None and name in plugin_sources():
+            command = _plugin_command(name)
+        return command
+
+
+@click.group(cls=SourceGroup)
+@click.option('--metrics', 'metrics_path', type=click.Path(dir_okay=False), default=None,
+              help="Write per-stage timings, HTTP, rate-limit and cache metrics to this JSON file")
+@click.option('--metrics-textfile', type=click.Path(dir_okay=False), default=None,
+              help="Also write the metrics in node exporter textfile format (e.g. doi_trace.prom)")
+@click.option('--profile', type=click.Choice(PROFILE_MODES), default=None,
+              help="Profile the command: 'cpu' writes pstats and collapsed stacks, "
+                   "'alloc' writes a tracemalloc report per pipeline stage")
+@click.option('--profile-dir', type=click.Path(file_okay=False), default=None,
+              help="Directory for profile files (defaults to <output directory>/profiles)")
+@click.option('--profile-top', default=25, show_default=True,
+              help="Allocation sites listed per stage with --profile alloc")
+@click.option('--archive/--no-archive', default=None,
+              help="Archive raw API responses for `reprocess` (defaults to archive.enabled in config)")
+@click.option('--parquet/--no-parquet', default=None,
+              help="Also export outputs as Parquet tables partitioned by source and year, needs pyarrow "
+                   "(defaults to parquet.enabled in config)")
+@click.pass_context
+def cli(ctx, metrics_path, metrics_textfile, profile, profile_dir, profile_top, archive, parquet):
     """DOI Trace - Track and analyze dataset citations."""
-    pass
+    metrics.reset()
+    ctx.ensure_object(dict)
+    ctx.obj['run_id'] = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    if parquet is not None:
+        config.data.setdefault('parquet', {})['enabled'] = parquet
+    if config.data.get('parquet', {}).get('enabled', False) and importlib.util.find_spec('pyarrow') is None:
+        # Fail before fetching anything rather than after the outputs are written
+        raise click.UsageError("Parquet export needs pyarrow (pip install 'DOITrace[parquet]')")
+
+    if archive is None:
+        archive = config.data.get('archive', {}).get('enabled', False)
+    if archive and ctx.invoked_subcommand != 'reprocess':
+        from .archive import ResponseArchive
+        from .transport import get_transport
+        response_archive = ResponseArchive(config.get_directory('archive'), ctx.obj['run_id'])
+        response_archive.describe(command=ctx.invoked_subcommand)
+        get_transport().archive = response_archive
+        click.echo(f"Archiving API responses as run {ctx.obj['run_id']}")
+
+    if profile:
+        profile_dir = Path(profile_dir) if profile_dir else config.get_directory('output') / 'profiles'
+        profiler = Profiler(profile, ctx.invoked_subcommand, profile_dir, profile_top)
+
+        def write_profile():
+            for path in profiler.stop():
+                click.echo(f"Profile saved to {path}")
+
+        profiler.start()
+        ctx.call_on_close(write_profile)
+
+    def write_metrics():
+        from .transport import transport_stats
+        command = ctx.invoked_subcommand or ''
+        if metrics_path:
+            metrics.write_json(metrics_path, {'command': command, 'connections': transport_stats()})
+            click.echo(f"Metrics saved to {metrics_path}")
+        if metrics_textfile:
+            metrics.write_openmetrics(metrics_textfile, {'command': command})
+            click.echo(f"Metrics textfile saved to {metrics_textfile}")
+
+    # Written on close so that failed runs still leave their metrics behind
+    ctx.call_on_close(write_metrics)
+
+
+@cli.result_callback()
+def report_transport_stats(*args, **kwargs):
+    """Report shared HTTP transport statistics once a command finishes."""
+    from .transport import report_transport
+    report_transport()
 
 
 @cli.command()
@@ -34,28 +167,23 @@ def cli():
 @click.option('--end-date', type=click.DateTime(formats=["%Y-%m-%d"]), help="End date for citation search (YYYY-MM-DD)", required=True)
 def wos(start_date, end_date):
     """Fetch citations from Web of Science."""
-    processor = WebOfScience()
-    citations = processor.fetch_citations(None, start_date, end_date)
-    processed = processor.process_results(citations)
-    
+    from .orchestrator import run_processor
+    processor = load_source("wos")()
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_path = f"wos_citations_{timestamp}.json"
-    processor.save_results(processed, output_path)
+    output_path = run_processor(processor, start_date, end_date, f"wos_citations_{timestamp}.json")
     click.echo(f"Results saved to {output_path}")
 
 
 @cli.command()
 @click.option('--start-date', type=click.DateTime(formats=["%Y-%m-%d"]), help="Start date for citation search (YYYY-MM-DD)", required=True)
 @click.option('--end-date', type=click.DateTime(formats=["%Y-%m-%d"]), help="End date for citation search (YYYY-MM-DD)", required=True)
-def scopus(start_date, end_date):
+@shard_option
+def scopus(start_date, end_date, shard):
     """Fetch citations from Scopus."""
-    processor = Scopus()
-    citations = processor.fetch_citations(None, start_date, end_date)
-    processed = processor.process_results(citations)
-    
+    from .orchestrator import run_processor
+    processor = load_source("scopus")(shard=shard)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_path = f"scopus_citations_{timestamp}.json"
-    processor.save_results(processed, output_path)
+    output_path = run_processor(processor, start_date, end_date, _output_path("scopus", timestamp, shard))
     click.echo(f"Results saved to {output_path}")
 
 
@@ -64,43 +192,37 @@ def scopus(start_date, end_date):
 @click.option('--end-date', type=click.DateTime(formats=["%Y-%m-%d"]), help="End date for citation search (YYYY-MM-DD)", required=True)
 def crossref(start_date, end_date):
     """Fetch citations from Crossref."""
-    processor = Crossref()
-    citations = processor.fetch_citations(None, start_date, end_date)
-    processed = processor.process_results(citations)
-    
+    from .orchestrator import run_processor
+    processor = load_source("crossref")()
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_path = f"crossref_citations_{timestamp}.json"
-    processor.save_results(processed, output_path)
+    output_path = run_processor(processor, start_date, end_date, f"crossref_citations_{timestamp}.json")
     click.echo(f"Results saved to {output_path}")
 
 
 @cli.command()
 @click.option('--start-date', type=click.DateTime(formats=["%Y-%m-%d"]), help="Start date for citation search (YYYY-MM-DD)", required=True)
 @click.option('--end-date', type=click.DateTime(formats=["%Y-%m-%d"]), help="End date for citation search (YYYY-MM-DD)", required=True)
-def datacite(start_date, end_date):
+@shard_option
+def datacite(start_date, end_date, shard):
     """Fetch citations from DataCite."""
-    processor = DataCite()
-    citations = processor.fetch_citations(None, start_date, end_date)
-    processed = processor.process_results(citations)
-    
+    from .orchestrator import run_processor
+    processor = load_source("datacite")(shard=shard)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_path = f"datacite_citations_{timestamp}.json"
-    processor.save_results(processed, output_path)
+    output_path = run_processor(processor, start_date, end_date, _output_path("datacite", timestamp, shard))
     click.echo(f"Results saved to {output_path}")
 
 
 @cli.command()
 @click.option('--start-date', type=click.DateTime(formats=["%Y-%m-%d"]), help="Start date for citation search (YYYY-MM-DD)", required=True)
 @click.option('--end-date', type=click.DateTime(formats=["%Y-%m-%d"]), help="End date for citation search (YYYY-MM-DD)", required=True)
-def google_scholar(start_date, end_date):
+@shard_option
+@click.option('--cache-only', is_flag=True, help="Answer searches only from the SerpAPI response cache (no searches spent)")
+def google_scholar(start_date, end_date, shard, cache_only):
     """Fetch citations from Google Scholar."""
-    processor = GoogleScholar()
-    citations = processor.fetch_citations(None, start_date, end_date)
-    processed = processor.process_results(citations)
-    
+    from .orchestrator import run_processor
+    processor = load_source("google-scholar")(shard=shard, cache_only=cache_only)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_path = f"google_scholar_citations_{timestamp}.json"
-    processor.save_results(processed, output_path)
+    output_path = run_processor(processor, start_date, end_date, _output_path("google_scholar", timestamp, shard))
     click.echo(f"Results saved to {output_path}")
 
 
@@ -109,15 +231,408 @@ def google_scholar(start_date, end_date):
               type=click.Choice(['wos', 'scopus', 'crossref', 'datacite', 'google-scholar']),
               help="Sources to combine (can specify multiple, defaults to all if none specified)")
 @click.option('--date', help="Date string to use in output filename (defaults to current date)")
-def combine(sources, date):
+@click.option('--manifest', type=click.Path(exists=True), default=None,
+              help="Combine the exact outputs recorded in a run manifest (file or run directory) instead of the newest files")
+@click.option('--layout', type=click.Choice(['nested', 'normalized']), default=None,
+              help="Output layout (defaults to [combine] layout): a record per publication, or dataset, "
+                   "publication and citation tables")
+@click.option('--from-store', is_flag=True,
+              help="Combine the publications stored in the citation store (as with [store] enabled) instead of files")
+def combine(sources, date, manifest, layout, from_store):
     """Combine citation data from multiple sources."""
+    if from_store:
+        if manifest:
+            raise click.UsageError("--from-store and --manifest can't be combined")
+        config.data.setdefault('store', {})['enabled'] = True
+    paths = None
+    if manifest:
+        from .orchestrator import load_manifest, manifest_outputs
+        paths = manifest_outputs(load_manifest(manifest))
+        if not sources:
+            sources = list(paths)
+
     # If no sources specified, use all available sources
     if not sources:
         sources = ['wos', 'scopus', 'crossref', 'datacite', 'google-scholar']
         print("No sources specified, using all available sources")
     
+    from .combine import CitationCombiner
     combiner = CitationCombiner()
-    combiner.combine_sources(sources, date)
+    if layout:
+        combiner.layout = layout
+    combiner.combine_sources(sources, date, paths=paths)
+
+
+# Sources whose work is CPU-bound parsing rather than waiting on APIs
+PROCESS_SOURCES = {'wos'}
+
+
+@cli.command()
+@click.option('--start-date', type=click.DateTime(formats=["%Y-%m-%d"]), help="Start date for citation search (YYYY-MM-DD)", required=True)
+@click.option('--end-date', type=click.DateTime(formats=["%Y-%m-%d"]), help="End date for citation search (YYYY-MM-DD)", required=True)
+@click.option('--sources', '-s', multiple=True,
+              help="Sources to run (can specify multiple, defaults to all built-in sources)")
+@click.option('--concurrency', type=int, default=None,
+              help="Sources fetched at the same time (defaults to run.concurrency in config)")
+@click.option('--processes', type=int, default=None,
+              help="Worker processes for WoS parsing (defaults to run.processes in config)")
+@click.option('--no-combine', is_flag=True, help="Only run the sources")
+@click.pass_context
+def run(ctx, start_date, end_date, sources, concurrency, processes, no_combine):
+    """Run the sources concurrently, then combine their outputs.
+
+    Every run gets a directory under <output directory>/runs/ whose
+    manifest.json records each task's status, timing and output file.
+    """
+    from .orchestrator import Orchestrator, Task, manifest_outputs, run_source
+
+    sources = list(dict.fromkeys(sources)) or list(BUILTIN_SOURCES)
+    unknown = [name for name in sources if name not in available_sources()]
+    if unknown:
+        raise click.BadParameter(f"unknown sources {', '.join(unknown)}; expected {', '.join(available_sources())}",
+                                 param_hint='--sources')
+
+    # Shared with the response archive, so `reprocess --run` takes the same id
+    run_id = ctx.obj['run_id']
+    output_dir = config.get_directory('output')
+    output_dir.mkdir(parents=True, exist_ok=True)
+    orchestrator = Orchestrator(
+        run_id,
+        concurrency=concurrency or config['run']['concurrency'],
+        processes=processes or config['run']['processes']
+    )
+
+    tasks = []
+    for name in sources:
+        output_path = output_dir / f"{name.replace('-', '_')}_citations_{run_id}.json"
+        tasks.append(Task(
+            name,
+            partial(run_source, name, start_date, end_date, str(output_path)),
+            kind='process' if name in PROCESS_SOURCES else 'thread',
+            meta={'type': 'source'}
+        ))
+
+    if not no_combine:
+        def combine_outputs():
+            from .combine import CitationCombiner
+            combiner = CitationCombiner()
+            combined = combiner.combine_sources(sources, run_id, paths=manifest_outputs(orchestrator.manifest))
+            return combiner.output_path(run_id) if combined is not None else None
+
+        # Combine whatever succeeded rather than losing the whole run to one failed source
+        tasks.append(Task('combine', combine_outputs, deps=sources, needs_all=False, meta={'type': 'combine'}))
+
+    manifest = orchestrator.run(tasks, options={
+        'start_date': start_date.strftime("%Y-%m-%d"),
+        'end_date': end_date.strftime("%Y-%m-%d"),
+        'sources': sources,
+        'concurrency': orchestrator.concurrency,
+        'processes': orchestrator.processes
+    })
+
+    click.echo(f"\nRun {run_id}:")
+    for name, info in manifest['tasks'].items():
+        timing = f" in {info['seconds']:.1f}s" if 'seconds' in info else ''
+        detail = f" -> {info['output']}" if info.get('output') else f" ({info['error']})" if info.get('error') else ''
+        click.echo(f"  {name}: {info['status']}{timing}{detail}")
+    critical_path = manifest['critical_path']
+    if critical_path:
+        total = sum(step['seconds'] for step in critical_path)
+        click.echo(f"Critical path ({total:.1f}s): " +
+                   " -> ".join(f"{step['task']} {step['seconds']:.1f}s" for step in critical_path))
+    click.echo(f"Manifest saved to {orchestrator.manifest_path}")
+
+    if any(info['status'] != 'done' for info in manifest['tasks'].values()):
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('source', type=click.Choice(['scopus', 'datacite', 'google-scholar']))
+@click.argument('files', nargs=-1, type=click.Path(exists=True, dir_okay=False))
+def merge_shards(source, files):
+    """Merge partial shard outputs into the normal per-source output.
+
+    When no FILES are given, the newest complete set of shard files for SOURCE
+    is taken from the `shards` subdirectory of the output directory.
+    """
+    name = source.replace('-', '_')
+    output_dir = config.get_directory('output')
+    if not files:
+        files = find_shard_files(output_dir, name)
+
+    merged = merge_shard_files(list(files))
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_path = output_dir / f"{name}_citations_{timestamp}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(merged, f, indent=4)
+    click.echo(f"Results saved to {output_path}")
+
+    from .orchestrator import export_parquet, ingest_output
+    export_parquet(output_path)
+    ingest_output(output_path)
+
+
+@cli.command()
+@click.argument('files', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--directory', type=click.Path(file_okay=False), default=None,
+              help="Root of the Parquet tables (defaults to the parquet directory in config)")
+def export_parquet(files, directory):
+    """Export existing source or combined output FILES as Parquet tables (needs pyarrow).
+
+    Writes `publications` and `citations` tables partitioned by source and
+    year; a file replaces what earlier exports of its source wrote for the
+    same years.
+    """
+    if importlib.util.find_spec('pyarrow') is None:
+        raise click.UsageError("Parquet export needs pyarrow (pip install 'DOITrace[parquet]')")
+    from .parquet import export_output
+    directory = Path(directory) if directory else config.get_directory('parquet')
+    for file in files:
+        export_output(file, directory)
+        click.echo(f"Exported {file}")
+    click.echo(f"Parquet tables saved to {directory}")
+
+
+@cli.command()
+@click.argument('old', type=click.Path(exists=True, dir_okay=False))
+@click.argument('new', type=click.Path(exists=True, dir_okay=False))
+@click.option('--buckets', type=click.IntRange(min=1), default=None,
+              help="Hash buckets the snapshots are split into (defaults to one per 64 MB of input)")
+@click.option('--summary', is_flag=True, help="Only print the number of added, removed and changed publications")
+def diff(old, new, buckets, summary):
+    """Compare two snapshots (source or combined outputs) of the same source.
+
+    Prints one JSON object per added or removed publication and per
+    publication whose dataset references or tags changed. Publications are
+    matched by DOI, or by title when they have none.
+    """
+    from .diff import diff_snapshots
+    counts = {'added': 0, 'removed': 0, 'changed': 0}
+    for change in diff_snapshots(old, new, buckets):
+        counts[change['change']] += 1
+        if not summary:
+            click.echo(json.dumps(change))
+    if summary:
+        click.echo(json.dumps(counts))
+
+
+@cli.command()
+@click.argument('table', type=click.Choice(['datasets', 'daacs', 'years']))
+@click.option('--from', 'combined_file', type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Update the counts from a combined output file (either layout) first")
+@click.option('--format', 'output_format', type=click.Choice(['csv', 'json']), default='csv', show_default=True)
+@click.option('--limit', type=int, default=None, help="Maximum number of rows")
+@click.option('--sources', '-s', multiple=True,
+              type=click.Choice(['wos', 'scopus', 'crossref', 'datacite', 'google-scholar']),
+              help="Sources of the combine to report on (defaults to the most recently updated set; "
+                   "with --from, to the sources tagged in the file)")
+@click.option('--reports', 'reports_path', type=click.Path(dir_okay=False), default=None,
+              help="Report database (defaults to [reports] path)")
+def report(table, combined_file, output_format, limit, sources, reports_path):
+    """Print citation counts per EOS DOI (datasets), DAAC (daacs) or year (years).
+
+    The counts are the number of distinct publications, kept per set of
+    combined sources and up to date with every `combine` when `[reports]
+    enabled` is set; only the publications that changed since the last
+    update of the same sources are recounted.
+    """
+    from .reports import CitationReports, record_sources, scope
+    path = reports_path or config.data['reports']['path']
+    if not combined_file and not Path(path).exists():
+        raise click.UsageError(f"No reports at {path} yet; enable [reports] and run `combine`, or pass --from")
+    with CitationReports(path) as reports:
+        if combined_file:
+            from .layout import load_combined
+            records = load_combined(combined_file)
+            sources = sources or record_sources(records)
+            update = reports.update(records, sources, origin=combined_file)
+            click.echo(f"Updated {scope(sources)} from {combined_file}: {update['changed']} publications changed, "
+                       f"{update['removed']} removed", err=True)
+        rows = reports.table(table, sources or None, limit)
+    if output_format == 'json':
+        click.echo(json.dumps(rows, indent=4))
+        return
+    import csv
+    writer = csv.writer(sys.stdout)
+    if rows:
+        writer.writerow(rows[0].keys())
+    for row in rows:
+        writer.writerow(row.values())
+
+
+@cli.command()
+@click.argument('files', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--store', 'store_path', type=click.Path(dir_okay=False), default=None,
+              help="Citation store (defaults to [store] path)")
+@click.option('--partial', is_flag=True,
+              help="Keep stored publications missing from FILES instead of removing them")
+def ingest(files, store_path, partial):
+    """Upsert existing source output FILES into the citation store.
+
+    The source is read from each file name (`<source>_citations_<timestamp>.json`).
+    Each file replaces its source's stored state, so ingest files oldest first.
+    """
+    from .store import CitationStore
+    with CitationStore(store_path or config.data['store']['path']) as store:
+        for file in files:
+            store.ingest_file(file, complete=not partial)
+            click.echo(f"Ingested {file}")
+        for row in store.sources():
+            click.echo(f"{row['source']}: {row['publications']} publications (last run {row['last_run']})")
+
+
+@cli.command()
+@click.option('--eos-doi', default=None, help="Cited EOS DOI")
+@click.option('--daac', default=None, help="DAAC of the cited datasets (LP Agency, case-insensitive)")
+@click.option('--year', type=int, default=None, help="Publication year")
+@click.option('--source', default=None, help="Source that reported the publication (e.g. google_scholar)")
+@click.option('--limit', type=int, default=None, help="Maximum number of rows")
+@click.option('--count', is_flag=True, help="Only print the number of matching rows")
+@click.option('--store', 'store_path', type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Citation store (defaults to [store] path)")
+def query(eos_doi, daac, year, source, limit, count, store_path):
+    """Look up citations in the citation store.
+
+    Prints one JSON object per (publication, cited dataset), streamed from
+    the store's indexes without loading any outputs.
+    """
+    path = store_path or config.data['store']['path']
+    if not Path(path).exists():
+        raise click.UsageError(f"No citation store at {path} (see `ingest` and [store] enabled)")
+    from .store import CitationStore
+    with CitationStore(path) as store:
+        rows = store.query(eos_doi=eos_doi, agency=daac, year=year, source=source, limit=limit)
+        if count:
+            click.echo(sum(1 for _ in rows))
+            return
+        for row in rows:
+            click.echo(json.dumps(row))
+
+
+@cli.command()
+@click.argument('source')
+@click.option('--run', 'run_id', required=True, help="Archived run to replay (a directory name under <archive>/runs/)")
+@click.option('--start-date', type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Start date the run was fetched with (defaults to the one recorded in the archive)")
+@click.option('--end-date', type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="End date the run was fetched with (defaults to the one recorded in the archive)")
+def reprocess(source, run_id, start_date, end_date):
+    """Re-run SOURCE from the API responses archived for a run, without network calls.
+
+    Use this after changing filtering or matching logic instead of fetching
+    (and spending API quota) again. The run must have been made with --archive.
+    """
+    if source not in available_sources():
+        raise click.BadParameter(f"unknown source {source}; expected {', '.join(available_sources())}",
+                                 param_hint='SOURCE')
+    from .archive import ResponseArchive
+    from .orchestrator import run_processor
+    from .transport import get_transport
+
+    archive = ResponseArchive(config.get_directory('archive'), run_id, mode='replay')
+    details = archive.details()
+    if start_date is None and details.get('start_date'):
+        start_date = datetime.fromisoformat(details['start_date'])
+    if end_date is None and details.get('end_date'):
+        end_date = datetime.fromisoformat(details['end_date'])
+    get_transport().archive = archive
+    click.echo(f"Replaying {len(archive.index)} archived responses from run {run_id}")
+
+    processor = load_source(source)()
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_path = run_processor(processor, start_date, end_date, _output_path(source.replace('-', '_'), timestamp))
+    click.echo(f"Results saved to {output_path}")
+    if archive.misses:
+        click.echo(f"Warning: {archive.misses} requests were not in the archive and were treated as failed; "
+                   "check that the dates match the archived run")
+
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', show_default=True, help="Interface to bind")
+@click.option('--port', default=8765, show_default=True, help="Port to bind")
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False), default=None,
+              help="Listen on a Unix domain socket instead of TCP")
+@click.option('--combined', type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Serve this combined output (defaults to the newest one in the output directory)")
+def serve(host, port, socket_path, combined):
+    """Answer citation lookups from warm in-memory indexes.
+
+    Loads the EOS catalog, the combined citations and a Crossref metadata
+    cache once, then answers GET /citations?eos_doi=&daac=&year=,
+    /datasets/<EOS DOI>, /publications/<DOI>, /works/<DOI> and /health, and
+    POST /scan and /reload. POST /reload after a `combine` picks up its output.
+    """
+    from .service import CitationService, create_server, load_catalog
+    started = datetime.now()
+    service = CitationService(load_catalog(config.get_directory('eosdis')), config.get_directory('output'), combined)
+    status = service.status()
+    click.echo(f"Indexed {status['publications']} publications from {status['combined']} and "
+               f"{status['catalog_datasets']} catalog datasets in {(datetime.now() - started).total_seconds():.1f}s")
+    server = create_server(service, host, port, socket_path)
+    if socket_path:
+        click.echo(f"Listening on {socket_path}")
+    else:
+        host, port = server.server_address[:2]
+        click.echo(f"Listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and Path(socket_path).exists():
+            Path(socket_path).unlink()
+
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', show_default=True, help="Interface to bind")
+@click.option('--port', default=8080, show_default=True, help="Port to bind")
+@click.option('--latency', default=0.0, show_default=True, help="Delay added to every response (seconds)")
+@click.option('--jitter', default=0.0, show_default=True, help="Maximum random delay on top of --latency (seconds)")
+@click.option('--rate-limit-every', default=0, show_default=True,
+              help="Answer every Nth request per service with its rate-limit error (0 disables)")
+@click.option('--citations-per-doi', default=5, show_default=True, help="Average DataCite citations per DOI")
+@click.option('--results-per-query', default=25, show_default=True, help="Results per SerpAPI/Scopus query")
+@click.option('--events-per-page', default=100, show_default=True, help="Crossref Event Data events per page")
+@click.option('--event-pages', default=3, show_default=True, help="Crossref Event Data pages per prefix")
+@click.option('--searches-left', default=100000, show_default=True, help="SerpAPI searches before quota errors")
+@click.option('--seed', default=0, show_default=True, help="Seed for the synthetic data")
+@click.option('--record', 'record_dir', type=click.Path(file_okay=False), default=None,
+              help="Forward requests to the real APIs and record the responses into this directory")
+@click.option('--replay', 'replay_dir', type=click.Path(exists=True, file_okay=False), default=None,
+              help="Serve previously recorded responses from this directory")
+def stub_server(host, port, latency, jitter, rate_limit_every, citations_per_doi, results_per_query,
+                events_per_page, event_pages, searches_left, seed, record_dir, replay_dir):
+    """Run a local stand-in for the Crossref, DataCite, SerpAPI and Elsevier APIs."""
+    from .stub_server import StubSettings, create_server, endpoints_config, load_eos_dois
+    if record_dir and replay_dir:
+        raise click.UsageError("--record and --replay cannot be used together")
+    settings = StubSettings(
+        latency=latency,
+        jitter=jitter,
+        rate_limit_every=rate_limit_every,
+        citations_per_doi=citations_per_doi,
+        results_per_query=results_per_query,
+        events_per_page=events_per_page,
+        event_pages=event_pages,
+        searches_left=searches_left,
+        seed=seed,
+        eos_dois=load_eos_dois(config.get_directory('eosdis')),
+        record_dir=record_dir,
+        replay_dir=replay_dir
+    )
+    server = create_server(host, port, settings)
+    host, port = server.server_address[:2]
+    click.echo(f"Stub server listening on http://{host}:{port}")
+    click.echo(f"Add this to config.toml to use it:\n\n{endpoints_config(host, port)}\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,179 @@
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from threading import Lock, get_ident
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .metrics import metrics
+
+
+# Parameters that carry credentials or contact details rather than select data
+VOLATILE_PARAMS = {'api_key', 'apikey', 'mailto'}
+
+
+class ArchiveMiss(requests.exceptions.ConnectionError):
+    """Raised when a replayed run asks for a response that was never archived.
+
+    Subclasses ConnectionError so sources handle it like any other failed request.
+    """
+
+
+class ResponseArchive:
+    """Archive of raw API responses, content-addressed and indexed per run.
+
+    Layout under the archive directory:
+
+        objects/<sha256[:2]>/<sha256>.gz   gzip-compressed response bodies, named by content
+        runs/<run id>/index.jsonl          one line per request: request key, URL, status, body hash
+        runs/<run id>/run.json             what ran (command, dates) so the run can be reprocessed
+
+    Identical bodies are stored once however many runs fetched them. In
+    `replay` mode the transport answers every request from the run's index and
+    never touches the network.
+    """
+
+    def __init__(self, directory: Path, run_id: str, mode: str = 'record') -> None:
+        """Initialize the archive.
+
+        Args:
+            directory: Archive directory
+            run_id: Run the responses belong to
+            mode: 'record' to archive responses, 'replay' to serve them
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown archive mode {mode!r}")
+        self.directory = Path(directory)
+        self.run_id = run_id
+        self.mode = mode
+        self.run_dir = self.directory / 'runs' / run_id
+        self.index_path = self.run_dir / 'index.jsonl'
+        self.lock = Lock()
+        self.misses = 0
+        self.index = {}
+        if mode == 'replay':
+            if not self.index_path.exists():
+                raise FileNotFoundError(f"No archived run {run_id} in {self.directory}")
+            with open(self.index_path) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self.index[entry['key']] = entry
+        else:
+            self.run_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    @staticmethod
+    def request_key(method: str, url: str, params: Optional[Dict[str, Any]] = None, data: Any = None) -> str:
+        """Build a stable key for a request.
+
+        Query parameters from the URL and from `params` are merged and sorted,
+        and credentials are dropped, so the same logical request always gets the
+        same key.
+        """
+        parts = urlsplit(url)
+        query = [(k, str(v)) for k, v in parse_qsl(parts.query)]
+        for key, value in (params or {}).items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            query.extend((key, str(v)) for v in values)
+        query = sorted((k, v) for k, v in query if k.lower() not in VOLATILE_PARAMS)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        body = hashlib.sha256(data).hexdigest() if isinstance(data, bytes) else None
+        base = urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))
+        return hashlib.sha256(json.dumps([method.upper(), base, query, body]).encode('utf-8')).hexdigest()
+
+    def _object_path(self, digest: str) -> Path:
+        return self.directory / 'objects' / digest[:2] / f"{digest}.gz"
+
+    def record(self, method: str, url: str, params: Optional[Dict[str, Any]], data: Any,
+               response: requests.Response) -> None:
+        """Archive a response.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            params: Query parameters passed separately from the URL
+            data: Request body, if any
+            response: Response received
+        """
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Threads may archive the same body at once; each writes its own temporary file
+            temp_path = path.with_suffix(f'.{os.getpid()}.{get_ident()}.tmp')
+            with gzip.open(temp_path, 'wb') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        entry = {
+            'key': self.request_key(method, url, params, data),
+            'method': method.upper(),
+            'url': urlunsplit(urlsplit(url)._replace(query='')),
+            'params': {k: v for k, v in (params or {}).items() if k.lower() not in VOLATILE_PARAMS},
+            'status': response.status_code,
+            'content_type': response.headers.get('Content-Type', ''),
+            'encoding': response.encoding,
+            'object': digest,
+            'size': len(content)
+        }
+        with self.lock:
+            with open(self.index_path, 'a') as f:
+                f.write(json.dumps(entry, default=str) + '\n')
+        metrics.count('archive_responses_recorded')
+
+    def replay(self, method: str, url: str, params: Optional[Dict[str, Any]] = None,
+               data: Any = None) -> requests.Response:
+        """Answer a request from the archive.
+
+        Raises:
+            ArchiveMiss: If the request was not archived in this run
+        """
+        entry = self.index.get(self.request_key(method, url, params, data))
+        if entry is None:
+            with self.lock:
+                self.misses += 1
+            metrics.cache_miss('archive')
+            raise ArchiveMiss(f"{method.upper()} {url} was not archived in run {self.run_id}")
+        metrics.cache_hit('archive')
+        with gzip.open(self._object_path(entry['object']), 'rb') as f:
+            content = f.read()
+        response = requests.Response()
+        response.status_code = entry['status']
+        response._content = content
+        response.headers = CaseInsensitiveDict({'Content-Type': entry['content_type']})
+        response.encoding = entry['encoding']
+        response.url = url
+        return response
+
+    def describe(self, **info: Any) -> None:
+        """Merge details about the run (command, dates, sources) into run.json."""
+        path = self.run_dir / 'run.json'
+        with self.lock:
+            details = self.details()
+            details.setdefault('run_id', self.run_id)
+            details.setdefault('started', datetime.now().isoformat(timespec='seconds'))
+            for key, value in info.items():
+                if isinstance(details.get(key), list):
+                    details[key] = list(dict.fromkeys(details[key] + list(value)))
+                else:
+                    details[key] = value
+            with open(path, 'w') as f:
+                json.dump(details, f, indent=4, default=str)
+
+    def details(self) -> Dict[str, Any]:
+        """Read run.json, or an empty dict if nothing was described."""
+        path = self.run_dir / 'run.json'
+        if not path.exists():
+            return {}
+        with open(path) as f:
+            return json.load(f)
@@ -0,0 +1,74 @@
+import time
+from threading import Lock
+from typing import Optional
+
+from .metrics import metrics
+
+
+class RequestBudget:
+    """Thread-safe request budget for a metered API.
+
+    Combines a token bucket that spreads `per_hour` requests evenly over the
+    hour (allowing short bursts of up to `burst` requests) with an optional
+    hard cap on the total number of requests, e.g. the searches left on the
+    account. Once the cap is reached, or `exhaust()` is called after the API
+    reports the quota is used up, `acquire()` returns False for every caller.
+    """
+
+    def __init__(self, per_hour: float, burst: int = 1, total: Optional[int] = None,
+                 limiter: str = 'api') -> None:
+        """Initialize the budget.
+
+        Args:
+            per_hour: Requests allowed per hour
+            burst: Requests that may be made back to back before pacing starts
+            total: Maximum requests overall (None for no cap)
+            limiter: Name waits are recorded under in the metrics
+        """
+        self.rate = per_hour / 3600
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.remaining = total
+        self.limiter = limiter
+        self.used = 0
+        self.lock = Lock()
+        self.last_refill = time.monotonic()
+
+    @property
+    def exhausted(self) -> bool:
+        return self.remaining is not None and self.remaining <= 0
+
+    def exhaust(self) -> None:
+        """Stop handing out requests (e.g. after a quota error from the API)."""
+        with self.lock:
+            self.remaining = 0
+
+    def acquire(self, wait: bool = True) -> bool:
+        """Take one request from the budget, waiting for the bucket to refill if needed.
+
+        Args:
+            wait: Whether to pace the request; False skips waiting (e.g. when replaying an archive)
+
+        Returns:
+            True if the request may be made, False once the budget is exhausted
+        """
+        start = time.perf_counter()
+        while True:
+            with self.lock:
+                if self.exhausted:
+                    return False
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1 or not wait:
+                    self.tokens = max(self.tokens - 1, 0)
+                    self.used += 1
+                    if self.remaining is not None:
+                        self.remaining -= 1
+                    break
+                delay = (1 - self.tokens) / self.rate if self.rate > 0 else 1.0
+            time.sleep(min(delay, 5.0))  # re-check periodically so exhaust() is noticed
+        waited = time.perf_counter() - start
+        if waited >= 0.1:
+            metrics.rate_limit_wait(self.limiter, waited)
+        return True
@@ -0,0 +1,97 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional
+
+from .metrics import metrics
+
+
+class ResponseCache:
+    """Persistent on-disk cache of API responses keyed by normalized query parameters.
+
+    Unlike the run archive (archive.py), which replays exactly what one run
+    saw, the cache is shared by every run: a query made in any earlier run is
+    answered from disk until its entry is older than the TTL. Entries are
+    stored gzip-compressed under <directory>/<key[:2]>/<key>.json.gz.
+    """
+
+    def __init__(self, directory: Path, name: str, key_params: Iterable[str],
+                 ttl_seconds: Optional[float] = None) -> None:
+        """Initialize the cache.
+
+        Args:
+            directory: Cache directory
+            name: Cache name, used for the hit/miss metrics (e.g. 'serpapi')
+            key_params: Parameters that identify a query; all others (e.g. api_key) are ignored
+            ttl_seconds: Entries older than this are treated as missing (None keeps them forever)
+        """
+        self.directory = Path(directory)
+        self.name = name
+        self.key_params = tuple(key_params)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def normalize(self, params: Dict[str, Any]) -> Dict[str, str]:
+        """Reduce a query to the parameters that identify it, as stripped strings."""
+        normalized = {}
+        for key in self.key_params:
+            value = params.get(key)
+            if value is None or str(value).strip() == '':
+                continue
+            normalized[key] = str(value).strip()
+        return normalized
+
+    def key(self, params: Dict[str, Any]) -> str:
+        """Build the cache key of a query."""
+        return hashlib.sha256(json.dumps(self.normalize(params), sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json.gz"
+
+    def get(self, params: Dict[str, Any]) -> Optional[Any]:
+        """Look up a query.
+
+        Args:
+            params: Query parameters
+
+        Returns:
+            The cached response body, or None on a miss or an expired entry
+        """
+        path = self._path(self.key(params))
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        if entry is not None and self.ttl_seconds is not None and time.time() - entry['stored'] > self.ttl_seconds:
+            entry = None
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            metrics.cache_miss(self.name)
+            return None
+        metrics.cache_hit(self.name)
+        return entry['body']
+
+    def put(self, params: Dict[str, Any], body: Any) -> None:
+        """Store the response to a query.
+
+        Args:
+            params: Query parameters
+            body: JSON-serializable response body
+        """
+        path = self._path(self.key(params))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(f'.{os.getpid()}.{id(body)}.tmp')
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            json.dump({'params': self.normalize(params), 'stored': time.time(), 'body': body}, f)
+        os.replace(temp_path, path)
@@ -1,11 +1,18 @@
-import json
 import re
 import glob
 import os
 from datetime import datetime
-from crossref.restful import Works, Etiquette
+from crossref.restful import Etiquette
 from habanero import cn
 from doi_trace.config import config
+from doi_trace.metrics import instrumented, metrics
+from doi_trace.crossref_works import CrossrefWorks
+from doi_trace.layout import save_combined
+from doi_trace.linkage import RecordLinker
+from doi_trace.orchestrator import export_parquet
+from doi_trace.records import Catalog, Citation
+from doi_trace.reports import CitationReports
+from doi_trace.reference_sources.base import read_records
 from tqdm import tqdm
 
 class CitationCombiner:
@@ -20,35 +27,61 @@ class CitationCombiner:
             config.data.get('organization', 'NASA'),
             config.data.get('email', '')
         )
-        self.works = Works(etiquette=self.etiquette)
+        self.works = CrossrefWorks(etiquette=self.etiquette)
+        # Link publications without a DOI to the same paper from other sources by title and year
+        combine = config.data.get('combine', {})
+        self.link_titles = combine.get('link_titles', True)
+        self.title_threshold = combine.get('title_threshold', 0.95)
+        # 'nested' (one record per publication) or 'normalized' (dataset, publication and citation tables)
+        self.layout = combine.get('layout', 'nested')
     
-    def combine_sources(self, sources, date=None):
+    def output_path(self, date):
+        """Get the path the combined results for a date are saved to."""
+        if self.layout == 'normalized':
+            return f'data/combined_citations_{date}.normalized.json'
+        return f'data/combined_citations_{date}.json'
+
+    @instrumented
+    def combine_sources(self, sources, date=None, paths=None):
         """Combine citation data from specified sources.
         
         Args:
             sources (list): List of source names to combine (e.g., ['wos', 'scopus'])
             date (str, optional): Date string to use in filenames. Defaults to current date.
+            paths (dict, optional): Exact output file per source (e.g. from a run manifest).
+                Sources missing from it are skipped; without it the newest file per source is used.
         """
         if not date:
             date = datetime.now().strftime("%Y%m%d")
-            
+
+        if paths is None and config.data.get('store', {}).get('enabled'):
+            combined_dois = self._combine_from_store(sources)
+            if combined_dois is None:
+                return None
+            return self._save(combined_dois, date, sources)
+
         # Load and combine data from each source
         eos_matched = []
         print("\nLoading source files...")
         for source in tqdm(sources, desc="Loading sources"):
-            pattern = f'data/{source}_citations_*.json'
-            files = glob.glob(pattern)
-            if not files:
-                print(f"No files found for source: {source}")
-                continue
-                
-            # Use most recent file for each source
-            latest_file = max(files, key=os.path.getctime)
+            if paths is not None:
+                if source not in paths:
+                    print(f"No output recorded for source: {source}")
+                    continue
+                latest_file = paths[source]
+            else:
+                # Streaming sources write JSON Lines
+                files = glob.glob(f'data/{source}_citations_*.json') + glob.glob(f'data/{source}_citations_*.jsonl')
+                if not files:
+                    print(f"No files found for source: {source}")
+                    continue
+
+                # Use most recent file for each source
+                latest_file = max(files, key=os.path.getctime)
             print(f"Loading {latest_file}")
             
-            with open(latest_file) as f:
-                data = json.load(f)
-                eos_matched.append([latest_file, source, data])
+            data = read_records(latest_file)
+            eos_matched.append([latest_file, source, data])
         
         if not eos_matched:
             print("No data found to combine")
@@ -64,88 +97,169 @@ class CitationCombiner:
         # Convert sets to lists
         combined_dois = self._convert_sets_to_lists(combined_dois)
         
+        return self._save(combined_dois, date, sources)
+
+    def _save(self, combined_dois, date, sources):
+        """Fill in missing years and save the combined records."""
         # Fill in missing years
         combined_dois = self._fill_missing_years(combined_dois)
-        
+
         # Save combined results
-        output_path = f'data/combined_citations_{date}.json'
-        with open(output_path, 'w') as f:
-            json.dump(combined_dois, f, indent=4)
+        output_path = self.output_path(date)
+        save_combined(combined_dois, output_path, self.layout)
+        export_parquet(output_path)
+        if config.data.get('reports', {}).get('enabled', False):
+            # Counted per set of sources, so combining a subset doesn't touch the counts of the others
+            with CitationReports(config.data['reports']['path']) as reports:
+                update = reports.update(combined_dois, sources, origin=output_path)
+            print(f"Citation reports updated in {reports.path} ({update['changed']} publications changed, "
+                  f"{update['removed']} removed)")
             
         print(f"\nCombined results saved to {output_path}")
         return combined_dois
     
+    @instrumented
     def _create_unique_dois(self, eos_matched):
-        """Create unique set of DOIs and convert to list of dictionaries."""
-        dois = set()
+        """Group the publications of all sources into combined records.
+
+        Publications are grouped by DOI. Publications without one are linked
+        to the same paper from another source by title and year (see
+        doi_trace.linkage); those left unlinked get a record of their own.
+        """
+        # References of all sources share one entry per catalog row
+        catalog = Catalog()
+        records = []
+        publications = []
         for source in tqdm(eos_matched, desc="Creating unique DOIs"):
             for publication in source[2]:
-                try:
-                    dois.add(publication['DOI'].upper())
-                except:
-                    pass
-                    
-        combined_dois = []
-        for doi in tqdm(list(dois), desc="Initializing DOI records"):
-            combined_dois.append({
-                'DOI': doi.upper(),
-                'Title': None,
-                'Year': None,
-                'Cited-References': set(),
-                'tags': set()
-            })
-            
-        print(f"Found {len(combined_dois)} unique DOIs")
+                citation = Citation.from_record(publication, source[1], catalog)
+                if citation.empty:
+                    continue
+                records.append({
+                    'source': citation.source,
+                    'doi': citation.doi,
+                    'title': citation.title,
+                    'year': citation.year
+                })
+                publications.append(citation)
+
+        groups = self._group(records)
+
+        combined = {}
+        for i, group in enumerate(groups):
+            if group not in combined:
+                combined[group] = {
+                    'DOI': '',
+                    'Title': None,
+                    'Year': None,
+                    'Cited-References': {},  # catalog entries, in order of first citation
+                    'tags': set(),
+                    '_publications': []
+                }
+            record = combined[group]
+            record['DOI'] = record['DOI'] or records[i]['doi']
+            record['_publications'].append(publications[i])
+        combined_dois = list(combined.values())
+
+        without_doi = sum(1 for record in combined_dois if not record['DOI'])
+        print(f"Found {len(combined_dois) - without_doi} unique DOIs and {without_doi} publications without a DOI")
         return combined_dois
     
+    def _group(self, records):
+        """Group publication records ('source', 'doi', 'title', 'year').
+
+        Returns:
+            list: The group of each record (the index of its group's first record)
+        """
+        if self.link_titles:
+            return RecordLinker(threshold=self.title_threshold).link(records)
+        first_with_doi = {}
+        return [first_with_doi.setdefault(record['doi'], i) if record['doi'] else i
+                for i, record in enumerate(records)]
+
+    @instrumented
+    def _combine_from_store(self, sources):
+        """Combine the publications the sources upserted into the citation store.
+
+        References and tags are collected by the store with SQL joins;
+        grouping and the title and year rules are the same as for files.
+        """
+        from doi_trace.store import CitationStore
+        with CitationStore(config.data['store']['path']) as store:
+            # Output files (and so stored sources) use underscores: google_scholar
+            stored = {row['source'] for row in store.sources()}
+            names = []
+            for source in sources:
+                name = source.replace('-', '_')
+                if name in stored:
+                    names.append(name)
+                else:
+                    print(f"No publications stored for source: {source}")
+            if not names:
+                print("No data found to combine")
+                return None
+            print(f"\nCombining {', '.join(names)} from {store.path}")
+            combined_dois = store.combine(names, self._group)
+        for doi in combined_dois:
+            for title, year in doi.pop('_publications'):
+                self._merge_title_and_year(doi, title, year)
+        without_doi = sum(1 for record in combined_dois if not record['DOI'])
+        print(f"Found {len(combined_dois) - without_doi} unique DOIs and {without_doi} publications without a DOI")
+        return combined_dois
+
+    @staticmethod
+    def _merge_title_and_year(doi, title, year):
+        """Take a grouped publication's year (the last one set wins) and title (the first one set wins)."""
+        # Update year if available
+        if year and not re.search('None', str(year)):
+            doi['Year'] = year
+            if re.search('"', str(doi['Year'])):
+                doi['Year'] = re.sub('"', '', str(doi['Year']))
+
+        # Update title if not set
+        if not doi.get('Title'):
+            doi['Title'] = title
+
+    @instrumented
     def _add_tags_and_references(self, combined_dois, eos_matched):
         """Add tags and references to each DOI."""
         for doi in tqdm(combined_dois, desc="Adding tags and references"):
-            for source in eos_matched:
-                for publication in source[2]:
-                    if doi['DOI'] == publication.get('DOI', '').upper():
-                        # Update year if available
-                        if publication.get('Year') and not re.search('None', str(publication['Year'])):
-                            doi['Year'] = publication['Year']
-                            if re.search('"', str(doi['Year'])):
-                                doi['Year'] = re.sub('"', '', str(doi['Year']))
-                                
-                        # Update title if not set
-                        if not doi.get('Title'):
-                            doi['Title'] = publication.get('Title')
-                            
-                        # Add references and tags
-                        for ref in publication.get('Cited-References', []):
-                            doi['Cited-References'].add(tuple(ref.items()))
-                            tag = ref.get('EOS DOI')
-                            agency = ref.get('LP Agency')
-                            if tag:
-                                doi['tags'].add(tuple(('tag', f'doi:{tag.upper()}')))
-                                doi['tags'].add(tuple(('tag', f'db:{source[1]}')))
-                            if agency:
-                                doi['tags'].add(tuple(('tag', f'DAAC:{agency}')))
+            for citation in doi.pop('_publications'):
+                self._merge_title_and_year(doi, citation.title, citation.year)
+
+                # Add references (shared catalog entries) and tags
+                for entry in citation.references:
+                    doi['Cited-References'][entry] = None
+                    if entry.doi:
+                        doi['tags'].add(tuple(('tag', f'doi:{entry.doi}')))
+                        doi['tags'].add(tuple(('tag', f'db:{citation.source}')))
+                    if entry.agency:
+                        doi['tags'].add(tuple(('tag', f'DAAC:{entry.agency}')))
         
         return combined_dois
     
+    @instrumented
     def _convert_sets_to_lists(self, combined_dois):
         """Convert sets to lists for JSON serialization."""
         for doi in tqdm(combined_dois, desc="Converting sets to lists"):
-            refs = [dict(ref) for ref in doi['Cited-References']]
+            refs = [entry.to_dict() for entry in doi['Cited-References']]
             tags = [dict([tag]) for tag in doi['tags']]
             doi['Cited-References'] = refs
             doi['tags'] = tags
         return combined_dois
     
+    @instrumented
     def _fill_missing_years(self, combined_dois):
         """Fill in missing years using Crossref and Habanero."""
         for doi in tqdm(combined_dois, desc="Filling missing years"):
-            if not doi.get('Year') or doi['Year'] in ('', 'None'):
+            if doi['DOI'] and (not doi.get('Year') or doi['Year'] in ('', 'None')):
                 # Try Crossref first
                 try:
                     record = self.works.doi(doi['DOI'])
                     if record and record.get('published', {}).get('date-parts'):
                         year = record['published']['date-parts'][0][0]
                         doi['Year'] = str(year)
+                        metrics.count('years_filled_from_crossref')
                         continue
                 except:
                     pass
@@ -155,6 +269,7 @@ class CitationCombiner:
                     bib = cn.content_negotiation(ids=doi['DOI'], format="bibentry")
                     year = re.search(r'year = (\S+),', bib).group(1)
                     doi['Year'] = year.replace('{', '').replace('}', '')
+                    metrics.count('years_filled_from_habanero')
                 except:
                     pass
         
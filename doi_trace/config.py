@@ -16,7 +16,8 @@ class Config(UserDict):
     2. User-supplied TOML configuration file
     3. Environment variables (for sensitive data like API keys)
     
-    The merge strategy is defined in the merge_configs method.
+    The merge strategy is defined in the merge_configs method. Nothing is read
+    until the configuration is first used, so importing the module has no side effects.
     """
     
     default_config = """
@@ -41,11 +42,78 @@ class Config(UserDict):
     wos = "WoS"
     eosdis = "eosdis_csv_files"
     output = "data"
+    archive = "data/archive"  # raw API responses archived with --archive
+    serpapi_cache = "data/cache/serpapi"  # SerpAPI responses reused across runs
+    parquet = "data/parquet"  # Parquet tables written with --parquet
     
     # API settings
     [api]
     serp_api_key = ""  # SerpAPI key for Google Scholar
     scopus_api_key = ""  # Scopus API key
+
+    # API base URLs (point these at `python -m doi_trace stub-server` for offline runs)
+    [endpoints]
+    datacite = "https://api.datacite.org"
+    eventdata = "https://api.eventdata.crossref.org"
+    crossref = "https://api.crossref.org"
+    serpapi = "https://serpapi.com"
+    elsevier = "https://api.elsevier.com"
+
+    # HTTP transport settings shared by all sources
+    [http]
+    pool_size = 10        # keep-alive connections kept per host
+    connect_timeout = 5   # seconds
+    read_timeout = 60     # seconds
+    retries = 3           # retries for connection errors and 429/5xx responses
+    backoff_factor = 1    # exponential backoff between retries (seconds); Retry-After takes precedence
+
+    # Per-host pool size overrides
+    [http.pool_sizes]
+    "api.datacite.org" = 8
+
+    # Scopus (Elsevier API) request pacing
+    [scopus]
+    min_request_interval = 1.0  # seconds between requests, as elsapy's own client waits
+
+    # SerpAPI (Google Scholar) search scheduling
+    [serpapi]
+    requests_per_hour = 1000  # pace searches to this rate (the account's hourly limit applies too)
+    concurrency = 4           # searches in flight at once
+    results_per_page = 20     # Google Scholar's maximum
+    max_searches = 0          # cap searches per run (0 = only the account's remaining searches)
+    cache = true              # reuse responses to identical searches across runs
+    cache_ttl_days = 30       # cached responses older than this are fetched again (0 = never expire)
+    parse_processes = 0       # worker processes parsing search results (0 = one per CPU, up to 8)
+    parse_chunk_size = 5000   # results per worker task; smaller result sets are parsed in-process
+
+    # Raw API response archive (see `reprocess`)
+    [archive]
+    enabled = false       # archive every run, as if --archive were given
+
+    # Parquet export of source and combined outputs (needs pyarrow)
+    [parquet]
+    enabled = false       # export every output, as if --parquet were given
+
+    # Embedded SQLite citation store (see `ingest` and `query`)
+    [store]
+    enabled = false       # upsert every source output and combine from the store
+    path = "data/citations.sqlite"
+
+    # Citation counts per EOS DOI, DAAC and year, updated by every combine (see `report`)
+    [reports]
+    enabled = false       # update the counts after every combine
+    path = "data/reports.sqlite"
+
+    # `run` command settings
+    [run]
+    concurrency = 3       # sources run at the same time
+    processes = 1         # worker processes for CPU-bound sources (WoS parsing)
+
+    # `combine` settings
+    [combine]
+    link_titles = true      # link publications without a DOI to the same paper from other sources
+    title_threshold = 0.95  # minimum Jaro-Winkler similarity of the titles
+    layout = "nested"       # or "normalized": dataset, publication and citation tables (see doi_trace/layout.py)
     """
     
     user_config_path = "config.toml"
@@ -58,9 +126,22 @@ class Config(UserDict):
         """
         if config_file:
             self.user_config_path = config_file
-            
-        # Load and merge configurations
-        self.data = self.merge_configs(
+        self._data = None
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """The merged configuration, loaded on first access."""
+        if self._data is None:
+            self.load()
+        return self._data
+
+    @data.setter
+    def data(self, value: Dict[str, Any]) -> None:
+        self._data = value
+
+    def load(self) -> None:
+        """Load and merge the default, user and environment configuration."""
+        self._data = self.merge_configs(
             base=loads(self.default_config),
             next=self.get_user_config()
         )
@@ -170,6 +251,17 @@ class Config(UserDict):
         """
         return self.data["api"].get(f"{service}_key")
     
+    def get_endpoint(self, service: str) -> str:
+        """Get an API base URL from configuration.
+        
+        Args:
+            service: Service name (e.g., 'datacite', 'crossref', 'serpapi')
+            
+        Returns:
+            Base URL without a trailing slash
+        """
+        return self.data["endpoints"][service].rstrip("/")
+    
     def dump(self) -> str:
         """Dump configuration to JSON string.
         
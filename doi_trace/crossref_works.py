@@ -0,0 +1,83 @@
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import quote
+
+from .config import config
+from .transport import get_transport
+
+
+# Works fetched per page of a bibliographic query (crossrefapi's page size)
+QUERY_ROWS = 100
+
+
+class CrossrefWorks:
+    """Minimal Crossref REST `works` client built on the shared transport.
+
+    It covers the two calls the sources need (DOI lookup and bibliographic
+    query) with the same return shapes as ``crossref.restful.Works``, but sends
+    them through the pooled transport and honors the configured ``crossref``
+    endpoint, so runs can be pointed at the local stub server.
+    """
+
+    def __init__(self, etiquette=None, base_url: Optional[str] = None) -> None:
+        """Initialize the client.
+
+        Args:
+            etiquette: Optional crossref.restful.Etiquette used for the polite pool
+            base_url: Optional API base URL (defaults to the configured endpoint)
+        """
+        self.base_url = base_url or config.get_endpoint('crossref')
+        self.headers = {'User-Agent': str(etiquette)} if etiquette else {}
+        self.mailto = getattr(etiquette, 'contact_email', '') if etiquette else ''
+
+    def _params(self, **params: Any) -> Dict[str, Any]:
+        """Add the polite-pool mailto parameter to request parameters."""
+        if self.mailto:
+            params['mailto'] = self.mailto
+        return params
+
+    def doi(self, doi: str) -> Optional[Dict[str, Any]]:
+        """Get the metadata record for a DOI.
+
+        Args:
+            doi: DOI to look up
+
+        Returns:
+            The work record, or None if Crossref does not know the DOI
+        """
+        response = get_transport().get(
+            f"{self.base_url}/works/{quote(doi, safe='/')}",
+            params=self._params(),
+            headers=self.headers
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json().get('message')
+
+    def query(self, bibliographic: str, select: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Run a bibliographic query, deep-paging through every matching work.
+
+        Like ``crossref.restful.Works.query()``, results are fetched lazily with
+        a cursor, QUERY_ROWS at a time.
+
+        Args:
+            bibliographic: Free-text citation query (author, year, title)
+            select: Optional list of fields to return
+
+        Yields:
+            Work records, best-ranked first
+        """
+        params = self._params(**{'query.bibliographic': bibliographic, 'rows': QUERY_ROWS, 'cursor': '*'})
+        if select:
+            params['select'] = ','.join(select)
+        while True:
+            response = get_transport().get(f"{self.base_url}/works", params=params, headers=self.headers)
+            if response.status_code == 404:
+                return
+            response.raise_for_status()
+            message = response.json().get('message', {})
+            items = message.get('items', [])
+            if not items:
+                return
+            yield from items
+            params['cursor'] = message.get('next-cursor')
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+from .records import canonical_doi
+
+
+# Target size of one bucket on disk; only one bucket of each snapshot is in memory at a time
+BUCKET_BYTES = 64 * 1024 * 1024
+MAX_BUCKETS = 256
+
+CHUNK_SIZE = 1 << 20
+
+# Snapshots cite the same catalog rows over and over; their comparison keys are computed once
+REFERENCE_KEY_CACHE_SIZE = 1 << 20
+_REFERENCE_KEYS: Dict[tuple, str] = {}
+
+
+def _iter_json_array(f: TextIO) -> Iterator[Tuple[Dict[str, Any], str]]:
+    """Decode the elements of a JSON array one at a time, reading the file in chunks.
+
+    Yields:
+        (element, its JSON text)
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError(f"Expected a JSON array in {f.name}")
+    position = 1
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position == len(buffer):
+            more = f.read(CHUNK_SIZE)
+            if not more:
+                raise ValueError(f"Unterminated JSON array in {f.name}")
+            buffer, position = more, 0
+            continue
+        if buffer[position] == ']':
+            return
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # The element continues in the next chunk
+            more = f.read(CHUNK_SIZE)
+            if not more:
+                raise
+            buffer, position = buffer[position:] + more, 0
+            continue
+        yield record, buffer[position:end]
+        position = end
+        if position > CHUNK_SIZE:
+            buffer, position = buffer[position:], 0
+
+
+def _read_snapshot(path: Union[str, Path]) -> Iterator[Tuple[Dict[str, Any], str]]:
+    """Stream (record, JSON text of the record) from a source or combined output file."""
+    with open(path) as f:
+        if str(path).endswith('.jsonl'):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line), line
+            return
+        start = f.read(CHUNK_SIZE).lstrip()[:1]
+        f.seek(0)
+        if start == '[':
+            yield from _iter_json_array(f)
+            return
+    from .layout import load_combined
+    for record in load_combined(path):
+        yield record, json.dumps(record)
+
+
+def iter_snapshot(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """Stream the records of a source or combined output file.
+
+    JSON Lines and JSON arrays are read a record at a time; normalized
+    combined files (see doi_trace.layout) are loaded whole and denormalized.
+
+    Args:
+        path: Output file
+
+    Yields:
+        The records
+    """
+    for record, _ in _read_snapshot(path):
+        yield record
+
+
+def publication_key(record: Dict[str, Any]) -> str:
+    """Key a publication is matched on between snapshots: its DOI, or its title when it has none."""
+    doi = canonical_doi(record.get('DOI', record.get('doi')))
+    if doi:
+        return doi
+    return 'title:' + ' '.join(str(record.get('Title', record.get('title')) or '').lower().split())
+
+
+def _reference_key(ref: Dict[str, Any]) -> str:
+    """Compare references on their canonical EOS DOI, agency and shortname."""
+    raw = (ref.get('EOS DOI'), ref.get('LP Agency'), ref.get('Shortname'))
+    key = _REFERENCE_KEYS.get(raw)
+    if key is None:
+        # Catalog fields read through pandas may be NaN floats
+        key = '\x1f'.join([canonical_doi(raw[0])] + [value if isinstance(value, str) else '' for value in raw[1:]])
+        if len(_REFERENCE_KEYS) < REFERENCE_KEY_CACHE_SIZE:
+            _REFERENCE_KEYS[raw] = key
+    return key
+
+
+def _references(record: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return record.get('Cited-References') or record.get('eosdis_matches') or []
+
+
+def _tags(record: Dict[str, Any]) -> List[str]:
+    return [tag['tag'] for tag in record.get('tags') or [] if 'tag' in tag]
+
+
+def fingerprint(record: Dict[str, Any]) -> str:
+    """Hash a publication's dataset references and tags, ignoring their order and duplicates.
+
+    Returns:
+        Hex digest of the references, a colon, and hex digest of the tags
+    """
+    references = hashlib.blake2b('\x1e'.join(sorted(set(map(_reference_key, _references(record))))).encode(),
+                                 digest_size=8)
+    tags = hashlib.blake2b('\x1e'.join(sorted(set(_tags(record)))).encode(), digest_size=8)
+    return f"{references.hexdigest()}:{tags.hexdigest()}"
+
+
+def _merge(record: Dict[str, Any], other: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge two records of the same publication in one snapshot (a source may report it twice)."""
+    merged = dict(record)
+    merged['Cited-References'] = _references(record) + _references(other)
+    merged.pop('eosdis_matches', None)
+    merged['tags'] = [{'tag': tag} for tag in dict.fromkeys(_tags(record) + _tags(other))]
+    return merged
+
+
+def _partition(path: Union[str, Path], directory: Path, buckets: int) -> List[Path]:
+    """Write a snapshot's records to bucket files by the hash of their key.
+
+    Each line is `<key as JSON>\\t<fingerprint>\\t<record as JSON>`.
+    """
+    paths = [directory / f"{i}.tsv" for i in range(buckets)]
+    files = [open(bucket, 'w') for bucket in paths]
+    try:
+        for record, text in _read_snapshot(path):
+            key = publication_key(record)
+            # Outputs are written indented; JSON strings can't hold raw line breaks, so these are whitespace
+            text = text.replace('\n', ' ')
+            line = f"{json.dumps(key)}\t{fingerprint(record)}\t{text}\n"
+            files[zlib.crc32(key.encode()) % buckets].write(line)
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def _load_bucket(path: Path) -> Dict[str, Tuple[str, str]]:
+    """Index a bucket file by key; records are kept as JSON text and only decoded when needed."""
+    index = {}
+    with open(path) as f:
+        for line in f:
+            key, digest, text = line.rstrip('\n').split('\t', 2)
+            if key in index:
+                record = _merge(json.loads(index[key][1]), json.loads(text))
+                index[key] = (fingerprint(record), json.dumps(record))
+            else:
+                index[key] = (digest, text)
+    return index
+
+
+def _changes(key: str, old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    old_references = {_reference_key(ref): ref for ref in _references(old)}
+    new_references = {_reference_key(ref): ref for ref in _references(new)}
+    old_tags = set(_tags(old))
+    new_tags = set(_tags(new))
+    return {
+        'change': 'changed',
+        'key': json.loads(key),
+        'DOI': new.get('DOI', new.get('doi')),
+        'Title': new.get('Title', new.get('title')),
+        'references': {
+            'added': [ref for ref_key, ref in new_references.items() if ref_key not in old_references],
+            'removed': [ref for ref_key, ref in old_references.items() if ref_key not in new_references]
+        },
+        'tags': {
+            'added': sorted(new_tags - old_tags),
+            'removed': sorted(old_tags - new_tags)
+        }
+    }
+
+
+def diff_snapshots(old_path: Union[str, Path], new_path: Union[str, Path],
+                   buckets: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Compare two snapshots (source or combined outputs) publication by publication.
+
+    Both snapshots are hash-partitioned by publication key into bucket
+    files, then compared a bucket at a time through a hash index of the old
+    bucket, so memory is bounded by the largest bucket rather than the
+    snapshots. Publications whose reference and tag fingerprints match are
+    skipped without decoding their records.
+
+    Args:
+        old_path: Earlier snapshot
+        new_path: Later snapshot
+        buckets: Number of buckets (defaults to one per BUCKET_BYTES of input)
+
+    Yields:
+        {'change': 'added' | 'removed', 'key', 'record'} per publication only in one
+        snapshot, and {'change': 'changed', 'key', 'DOI', 'Title', 'references',
+        'tags'} per publication whose dataset references or tags differ, with
+        what was added and removed. Changes come bucket by bucket, not in file order.
+    """
+    if buckets is None:
+        size = os.path.getsize(old_path) + os.path.getsize(new_path)
+        buckets = min(MAX_BUCKETS, max(1, -(-size // BUCKET_BYTES)))
+    with tempfile.TemporaryDirectory(prefix='doi-trace-diff-') as directory:
+        directory = Path(directory)
+        (directory / 'old').mkdir()
+        (directory / 'new').mkdir()
+        old_buckets = _partition(old_path, directory / 'old', buckets)
+        new_buckets = _partition(new_path, directory / 'new', buckets)
+        for old_bucket, new_bucket in zip(old_buckets, new_buckets):
+            old = _load_bucket(old_bucket)
+            for key, (digest, text) in _load_bucket(new_bucket).items():
+                previous = old.pop(key, None)
+                if previous is None:
+                    yield {'change': 'added', 'key': json.loads(key), 'record': json.loads(text)}
+                elif previous[0] != digest:
+                    yield _changes(key, json.loads(previous[1]), json.loads(text))
+            for key, (_, text) in old.items():
+                yield {'change': 'removed', 'key': json.loads(key), 'record': json.loads(text)}
@@ -0,0 +1,118 @@
+import re
+from typing import Callable, Dict, Optional
+
+
+# Generic rule: the DOI is in the URL path (doi.org, Wiley, Springer, T&F, AGU, ...)
+_GENERIC = re.compile(r'/(10\.\d+.*)$')
+_GENERIC_SUFFIX = re.compile(r'(/full|/meta|/pdf(?=$|[?#&])|\.pdf|\.abstract|\.short|&.*|/download|/html|\?.*|#.*|;|\)|/$|\.$)')
+
+_COPERNICUS = re.compile(r'//(\S+)\.copernicus\.org/articles/(\d+)/(\d+)/(\d+)')
+_NATURE = re.compile(r'nature\.com/articles/(\S+)')
+_NATURE_SUFFIX = re.compile(r'(\?.*|/briefing.*|\.pdf$)')
+# Percent-encoded Unicode dashes (U+2010 to U+2015)
+_NATURE_DASH = re.compile(r'%E2%80%9[0-5]', re.IGNORECASE)
+_NATURE_SDATA = re.compile(r'10.1038/sdata(\d{4})(\d+)')
+# Same strings as the old `/((\w+|\.+|\-+|_+)*)\.xml` without its nested quantifier, which backtracks
+# exponentially on long links that don't end in .xml
+_AMS = re.compile(r'/([\w.\-]*)\.xml')
+_AMS_LEGACY = re.compile(r'10.1175/(\w+)(d|D)(\d{2})(\d{4})')
+_PLOS = re.compile(r'[?&]id=(10\.\d+/[^&#]+)')
+
+_TRAILING = re.compile(r'(/|;|\)|\.|\.full)$')
+_ELEMENTA_ARTICLE = re.compile(r'/\d+$')
+_CRC_BOOK = re.compile(r'10.1201/(\S+)/')
+_HOST = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.\-]*://([^/?#:]+)')
+
+
+def _copernicus(url: str) -> str:
+    # https://acp.copernicus.org/articles/20/1234/2020/ -> 10.5194/acp-20-1234-2020
+    match = _COPERNICUS.search(url)
+    return f"10.5194/{match[1]}-{match[2]}-{match[3]}-{match[4]}" if match else ''
+
+
+def _nature(url: str) -> str:
+    # https://www.nature.com/articles/s41558%E2%80%92019%E2%80%920592%E2%80%928 -> 10.1038/s41558-019-0592-8
+    # https://www.nature.com/articles/sdata201812 -> 10.1038/sdata.2018.12
+    match = _NATURE.search(url)
+    if not match:
+        return ''
+    doi = _NATURE_DASH.sub('-', _NATURE_SUFFIX.sub('', f"10.1038/{match[1]}"))
+    match = _NATURE_SDATA.match(doi)
+    return f"10.1038/sdata.{match[1]}.{match[2]}" if match else doi
+
+
+def _ametsoc(url: str) -> str:
+    # https://journals.ametsoc.org/view/journals/clim/33/12/jcliD190123.xml -> 10.1175/jcli-D-19-0123.1
+    match = _AMS.search(url)
+    if not match:
+        return ''
+    doi = f"10.1175/{match[1]}".replace('_1', '.1')
+    if '-' not in doi:
+        match = _AMS_LEGACY.match(doi)
+        if match:
+            return f"10.1175/{match[1]}-{match[2]}-{match[3]}-{match[4]}.1"
+    return doi
+
+
+def _plos(url: str) -> str:
+    # https://journals.plos.org/plosone/article?id=10.1371/journal.pone.0234567 -> 10.1371/journal.pone.0234567
+    match = _PLOS.search(url)
+    return match[1] if match else ''
+
+
+# Publisher rules by host (or parent domain). Only the rule for the link's host runs, so adding
+# publishers doesn't slow down the others.
+HOST_RULES: Dict[str, Callable[[str], str]] = {
+    'copernicus.org': _copernicus,
+    'nature.com': _nature,
+    'journals.ametsoc.org': _ametsoc,
+    'journals.plos.org': _plos,
+}
+
+
+def _host_rule(url: str) -> Optional[Callable[[str], str]]:
+    """Find the rule for a URL's host, trying the host and then each parent domain."""
+    match = _HOST.match(url)
+    if not match:
+        return None
+    host = match[1].lower()
+    while host:
+        rule = HOST_RULES.get(host)
+        if rule:
+            return rule
+        _, _, host = host.partition('.')
+    return None
+
+
+def extract_doi(url: str) -> str:
+    """Extract the DOI of a publication from its landing page URL.
+
+    Links with the DOI in the path are handled by a generic rule; publishers
+    that encode it differently (Copernicus, Nature, AMS, PLOS) have a rule in
+    HOST_RULES, picked by the link's host.
+
+    Args:
+        url: Publication link (e.g. the `link` of a Google Scholar result)
+
+    Returns:
+        The DOI, or an empty string if none could be derived
+    """
+    if not url:
+        return ''
+    match = _GENERIC.search(url)
+    if match:
+        doi = _GENERIC_SUFFIX.sub('', match[1])
+    else:
+        rule = _host_rule(url)
+        doi = rule(url) if rule else ''
+    if not doi:
+        return ''
+
+    doi = _TRAILING.sub('', doi)
+    if 'elementa' in doi:
+        doi = _ELEMENTA_ARTICLE.sub('', doi)
+    else:
+        match = _CRC_BOOK.match(doi)
+        if match:
+            doi = f"10.1201/{match[1]}"
+    return doi
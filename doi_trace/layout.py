@@ -0,0 +1,140 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+
+# Marks a combined output file written in the normalized layout
+NORMALIZED_FORMAT = 'doi-trace-combined-normalized'
+NORMALIZED_VERSION = 1
+
+PUBLICATION_COLUMNS = ['DOI', 'Title', 'Year', 'sources']
+
+LAYOUTS = ('nested', 'normalized')
+
+
+def normalize(combined: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert combined records to the normalized layout.
+
+    The nested layout repeats each cited dataset in every publication
+    citing it and again in the tags. The normalized layout stores each
+    dataset once, each publication once (with the sources that reported it
+    instead of its tags) and the citations as two parallel columns of
+    publication and dataset indexes; `denormalize` rebuilds the nested
+    records, tags included.
+
+    Args:
+        combined: Combined records ('DOI', 'Title', 'Year', 'Cited-References', 'tags')
+
+    Returns:
+        The tables: 'datasets', 'publications' and 'citations'
+    """
+    datasets = []
+    dataset_index = {}
+    publications = []
+    citing = []
+    cited = []
+    for position, record in enumerate(combined):
+        sources = [tag['tag'][3:] for tag in record.get('tags', []) if tag.get('tag', '').startswith('db:')]
+        publications.append([record.get('DOI'), record.get('Title'), record.get('Year'), sorted(sources)])
+        for ref in record.get('Cited-References', []):
+            key = tuple(ref.items())
+            index = dataset_index.get(key)
+            if index is None:
+                index = dataset_index[key] = len(datasets)
+                datasets.append(ref)
+            citing.append(position)
+            cited.append(index)
+    return {
+        'format': NORMALIZED_FORMAT,
+        'version': NORMALIZED_VERSION,
+        'datasets': datasets,
+        'publications': {'columns': PUBLICATION_COLUMNS, 'rows': publications},
+        'citations': {'publication': citing, 'dataset': cited}
+    }
+
+
+def denormalize(tables: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rebuild the nested combined records from the normalized layout.
+
+    Args:
+        tables: Normalized layout, as written by `normalize`
+
+    Returns:
+        Combined records in the nested layout
+    """
+    if tables.get('format') != NORMALIZED_FORMAT or tables.get('version') != NORMALIZED_VERSION:
+        raise ValueError(f"Not a normalized combined output (version {NORMALIZED_VERSION}): "
+                         f"{tables.get('format')} {tables.get('version')}")
+    datasets = tables['datasets']
+    references = [[] for _ in tables['publications']['rows']]
+    for publication, dataset in zip(tables['citations']['publication'], tables['citations']['dataset']):
+        references[publication].append(datasets[dataset])
+
+    columns = tables['publications']['columns']
+    combined = []
+    for row, refs in zip(tables['publications']['rows'], references):
+        publication = dict(zip(columns, row))
+        tags = {}
+        for ref in refs:
+            if ref.get('EOS DOI'):
+                tags[f"doi:{ref['EOS DOI'].upper()}"] = None
+        if tags:
+            tags.update((f"db:{source}", None) for source in publication['sources'])
+        for ref in refs:
+            if ref.get('LP Agency'):
+                tags[f"DAAC:{ref['LP Agency']}"] = None
+        combined.append({
+            'DOI': publication['DOI'],
+            'Title': publication['Title'],
+            'Year': publication['Year'],
+            'Cited-References': [dict(ref) for ref in refs],
+            'tags': [{'tag': tag} for tag in tags]
+        })
+    return combined
+
+
+def save_combined(combined: List[Dict[str, Any]], path: Union[str, Path], layout: str = 'nested') -> None:
+    """Write combined records in a layout.
+
+    Args:
+        combined: Combined records in the nested layout
+        path: File to write
+        layout: 'nested' (a list of records) or 'normalized' (see `normalize`)
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown combined output layout: {layout} (expected one of {', '.join(LAYOUTS)})")
+    with open(path, 'w') as f:
+        if layout == 'normalized':
+            json.dump(normalize(combined), f, separators=(',', ':'))
+        else:
+            json.dump(combined, f, indent=4)
+
+
+def load_tables(path: Union[str, Path]) -> Dict[str, Any]:
+    """Read a normalized combined output file without rebuilding the nested records.
+
+    Args:
+        path: File written by `doi_trace combine --layout normalized`
+
+    Returns:
+        The tables: 'datasets', 'publications' and 'citations'
+    """
+    with open(path) as f:
+        tables = json.load(f)
+    if not isinstance(tables, dict) or tables.get('format') != NORMALIZED_FORMAT:
+        raise ValueError(f"{path} is not a normalized combined output")
+    return tables
+
+
+def load_combined(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """Read a combined output file in either layout.
+
+    Args:
+        path: File written by `doi_trace combine`
+
+    Returns:
+        Combined records in the nested layout
+    """
+    with open(path) as f:
+        data = json.load(f)
+    return denormalize(data) if isinstance(data, dict) else data
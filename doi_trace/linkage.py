@@ -0,0 +1,154 @@
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import jellyfish
+
+from .metrics import metrics
+from .normalize import normalize_title
+
+
+# Words too common in titles to say anything about a match
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'as', 'at', 'by', 'for', 'from', 'in', 'into', 'of', 'on', 'or', 'over', 'the', 'to',
+    'using', 'with', 'based', 'data', 'study', 'analysis'
+))
+
+_WORD = re.compile(r'[a-z0-9]+')
+_YEAR = re.compile(r'\d{4}')
+
+
+def title_tokens(title: Optional[str]) -> List[str]:
+    """Split a title into lowercase ASCII words, dropping markup and stop words."""
+    if not title:
+        return []
+    return [word for word in _WORD.findall(normalize_title(title).lower()) if word not in STOP_WORDS]
+
+
+def parse_year(year: Any) -> Optional[int]:
+    """Read a publication year from whatever a source stored ('2020', 2020, '(2020)', None)."""
+    match = _YEAR.search(str(year)) if year not in (None, '') else None
+    return int(match.group(0)) if match else None
+
+
+class RecordLinker:
+    """Link records of the same publication across sources when some lack a DOI.
+
+    Records are blocked on (title word bigram, year): each record is indexed
+    under its `block_grams` rarest bigrams, and a record without a DOI is only
+    scored against records from another source, published within a year of
+    it, that share at least two of its blocks (one for very short titles).
+    Scoring uses Jaro-Winkler similarity of the normalized titles, so the
+    work grows with the number of DOI-less records times the block sizes
+    instead of with every pair of records.
+
+    Records sharing a DOI always end up together; a DOI-less record joins its
+    best-scoring match, and records with two different DOIs are never merged.
+    """
+
+    def __init__(self, threshold: float = 0.95, block_grams: int = 3, max_block_size: int = 1000) -> None:
+        """Initialize the linker.
+
+        Args:
+            threshold: Minimum Jaro-Winkler similarity of two titles to link them
+            block_grams: Rarest title bigrams each record is blocked on
+            max_block_size: Blocks (bigram and year) with more records than this are too common to search
+        """
+        self.threshold = threshold
+        self.block_grams = block_grams
+        self.max_block_size = max_block_size
+        # Jaro-Winkler adds at most 0.4 * (1 - Jaro), and Jaro is at most (2 + shorter / longer) / 3,
+        # so titles whose lengths differ more than this can't reach the threshold
+        self.min_length_ratio = max(3 * (threshold - 0.4) / 0.6 - 2, 0)
+
+    def link(self, records: Sequence[Dict[str, Any]]) -> List[int]:
+        """Group records that describe the same publication.
+
+        Args:
+            records: Records with 'source', 'doi' (may be empty), 'title' and 'year'
+
+        Returns:
+            The group of each record, as the index of one record of the group
+        """
+        parent = list(range(len(records)))
+        group_doi = [record['doi'] or None for record in records]
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(a, b):
+            a, b = find(a), find(b)
+            if a == b or (group_doi[a] and group_doi[b] and group_doi[a] != group_doi[b]):
+                return False
+            parent[b] = a
+            group_doi[a] = group_doi[a] or group_doi[b]
+            return True
+
+        # Records with the same DOI belong together without scoring
+        first_with_doi = {}
+        for i, record in enumerate(records):
+            if record['doi']:
+                union(first_with_doi.setdefault(record['doi'], i), i)
+
+        tokens = [title_tokens(record['title']) for record in records]
+        keys = [' '.join(words) for words in tokens]
+        years = [parse_year(record['year']) for record in records]
+        grams = [set(map(' '.join, zip(words, words[1:]))) or set(words) for words in tokens]
+        frequency = {}
+        for record_grams in grams:
+            for gram in record_grams:
+                frequency[gram] = frequency.get(gram, 0) + 1
+
+        # Block index: bigram -> year -> records
+        blocks = {}
+        block_keys = []
+        for i, record_grams in enumerate(grams):
+            rarest = sorted(record_grams, key=lambda gram: (frequency[gram], gram))[:self.block_grams]
+            block_keys.append(rarest)
+            for gram in rarest:
+                blocks.setdefault(gram, {}).setdefault(years[i], []).append(i)
+
+        compared = linked = 0
+        for i, record in enumerate(records):
+            if record['doi'] or not keys[i]:
+                continue
+            gram_members = []
+            for gram in block_keys[i]:
+                by_year = blocks[gram]
+                if years[i] is None:
+                    year_lists = by_year.values()
+                else:
+                    year_lists = [by_year.get(year, ()) for year in (years[i] - 1, years[i], years[i] + 1, None)]
+                gram_members.append(set().union(*(members for members in year_lists
+                                                  if len(members) <= self.max_block_size)))
+            if len(gram_members) == 1:
+                candidates = gram_members[0]
+            else:
+                # Records sharing at least two of the blocks
+                candidates = set().union(*(gram_members[x] & gram_members[y] for x in range(len(gram_members))
+                                           for y in range(x + 1, len(gram_members))))
+            length = len(keys[i])
+            scored = []
+            for j in candidates:
+                if j == i or records[j]['source'] == record['source']:
+                    continue
+                if min(length, len(keys[j])) < self.min_length_ratio * max(length, len(keys[j])):
+                    continue
+                compared += 1
+                score = 1.0 if keys[i] == keys[j] else jellyfish.jaro_winkler_similarity(keys[i], keys[j])
+                if score >= self.threshold:
+                    scored.append((score, j))
+            # Only the best match is joined (the next one if it has a conflicting DOI), so a record
+            # that resembles two publications never chains their groups together
+            for score, j in sorted(scored, key=lambda pair: (-pair[0], pair[1])):
+                if find(j) == find(i):
+                    break
+                if union(j, i):
+                    linked += 1
+                    break
+
+        metrics.count('linkage_comparisons', compared)
+        metrics.count('linkage_links', linked)
+        return [find(i) for i in range(len(records))]
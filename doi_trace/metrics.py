@@ -0,0 +1,264 @@
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+class Metrics:
+    """Lightweight in-process instrumentation for pipeline runs.
+
+    Records, per run:
+    1. Wall time, call count and item count per pipeline stage
+    2. HTTP requests, statuses and latency histograms per host, plus retries
+    3. Time spent waiting on rate limiters
+    4. Cache hits and misses
+    5. Free-form counters
+
+    Recording is a few dictionary updates under a lock, so it is always on;
+    the CLI only decides whether to write the results out (`--metrics`).
+    """
+
+    latency_buckets = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+
+    def __init__(self) -> None:
+        """Initialize an empty metrics registry."""
+        self.lock = Lock()
+        self.listeners = []
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard everything recorded so far."""
+        with self.lock:
+            self.started = time.time()
+            self.stages = {}
+            self.http = {}
+            self.retries = {}
+            self.rate_limit_waits = {}
+            self.caches = {}
+            self.counters = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Time a pipeline stage.
+
+        Args:
+            name: Stage name (e.g. 'DataCite._extract_metadata')
+
+        Yields:
+            A dict; set its 'items' key to record how many items the stage produced
+        """
+        info = {'items': None}
+        for listener in self.listeners:
+            listener.stage_started(name)
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            elapsed = time.perf_counter() - start
+            for listener in self.listeners:
+                listener.stage_finished(name)
+            with self.lock:
+                stage = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'items': 0})
+                stage['calls'] += 1
+                stage['seconds'] += elapsed
+                if info['items'] is not None:
+                    stage['items'] += info['items']
+
+    def add_listener(self, listener: Any) -> None:
+        """Register an object notified through `stage_started(name)` / `stage_finished(name)`."""
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Any) -> None:
+        """Unregister a stage listener."""
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Increment a free-form counter."""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe_http(self, host: str, seconds: float, status: Any) -> None:
+        """Record one HTTP request.
+
+        Args:
+            host: Request host
+            seconds: Request latency, including transport-level retries
+            status: HTTP status code, or 'error' if no response was received
+        """
+        with self.lock:
+            stats = self.http.setdefault(host, {
+                'requests': 0,
+                'seconds': 0.0,
+                'statuses': {},
+                'buckets': [0] * len(self.latency_buckets)
+            })
+            stats['requests'] += 1
+            stats['seconds'] += seconds
+            stats['statuses'][str(status)] = stats['statuses'].get(str(status), 0) + 1
+            for i, bound in enumerate(self.latency_buckets):
+                if seconds <= bound:
+                    stats['buckets'][i] += 1
+                    break
+
+    def retry(self, host: str, count: int = 1) -> None:
+        """Record retried requests for a host."""
+        if count:
+            with self.lock:
+                self.retries[host] = self.retries.get(host, 0) + count
+
+    def rate_limit_wait(self, limiter: str, seconds: float) -> None:
+        """Record time spent waiting on a rate limiter."""
+        with self.lock:
+            self.rate_limit_waits[limiter] = self.rate_limit_waits.get(limiter, 0.0) + seconds
+
+    def cache_hit(self, cache: str, count: int = 1) -> None:
+        """Record cache hits."""
+        with self.lock:
+            self.caches.setdefault(cache, {'hits': 0, 'misses': 0})['hits'] += count
+
+    def cache_miss(self, cache: str, count: int = 1) -> None:
+        """Record cache misses."""
+        with self.lock:
+            self.caches.setdefault(cache, {'hits': 0, 'misses': 0})['misses'] += count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a JSON-serializable copy of everything recorded."""
+        with self.lock:
+            http = {}
+            for host, stats in self.http.items():
+                http[host] = {
+                    'requests': stats['requests'],
+                    'seconds': round(stats['seconds'], 6),
+                    'statuses': dict(stats['statuses']),
+                    'latency_histogram': {
+                        ('+Inf' if math.isinf(bound) else str(bound)): count
+                        for bound, count in zip(self.latency_buckets, stats['buckets'])
+                    },
+                    'retries': self.retries.get(host, 0)
+                }
+            caches = {}
+            for name, stats in self.caches.items():
+                total = stats['hits'] + stats['misses']
+                caches[name] = dict(stats, hit_ratio=round(stats['hits'] / total, 4) if total else None)
+            stages = {}
+            for name, stage in self.stages.items():
+                stages[name] = dict(stage, seconds=round(stage['seconds'], 6), items_per_second=(
+                    round(stage['items'] / stage['seconds'], 2) if stage['items'] and stage['seconds'] else None))
+            return {
+                'started': self.started,
+                'wall_seconds': round(time.time() - self.started, 6),
+                'stages': stages,
+                'http': http,
+                'rate_limit_wait_seconds': {name: round(seconds, 6) for name, seconds in self.rate_limit_waits.items()},
+                'caches': caches,
+                'counters': dict(self.counters)
+            }
+
+    def write_json(self, path: str, extra: Optional[Dict[str, Any]] = None) -> None:
+        """Write the metrics as JSON.
+
+        Args:
+            path: Output file
+            extra: Optional extra top-level entries (e.g. the command that ran)
+        """
+        data = self.snapshot()
+        data.update(extra or {})
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=4)
+
+    def write_openmetrics(self, path: str, labels: Optional[Dict[str, str]] = None) -> None:
+        """Write the metrics in the text format read by the node exporter textfile collector.
+
+        The file is written next to its destination and renamed into place so
+        the collector never reads a partial file.
+
+        Args:
+            path: Output file (should end in .prom)
+            labels: Optional labels added to every sample (e.g. {'command': 'datacite'})
+        """
+        data = self.snapshot()
+        base = dict(labels or {})
+
+        def sample(name, value, **extra):
+            merged = dict(base, **extra)
+            rendered = ','.join(f'{key}="{_escape(str(val))}"' for key, val in merged.items())
+            return f"{name}{{{rendered}}} {value}" if rendered else f"{name} {value}"
+
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            if samples:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(samples)
+
+        stages = data['stages']
+        family('doi_trace_stage_seconds', 'gauge', 'Wall time spent in a pipeline stage.',
+               [sample('doi_trace_stage_seconds', s['seconds'], stage=name) for name, s in stages.items()])
+        family('doi_trace_stage_calls', 'gauge', 'Number of times a pipeline stage ran.',
+               [sample('doi_trace_stage_calls', s['calls'], stage=name) for name, s in stages.items()])
+        family('doi_trace_stage_items', 'gauge', 'Items produced by a pipeline stage.',
+               [sample('doi_trace_stage_items', s['items'], stage=name) for name, s in stages.items()])
+
+        requests, latency, retries = [], [], []
+        for host, stats in data['http'].items():
+            for status, count in stats['statuses'].items():
+                requests.append(sample('doi_trace_http_requests_total', count, host=host, status=status))
+            cumulative = 0
+            for bound, count in stats['latency_histogram'].items():
+                cumulative += count
+                latency.append(sample('doi_trace_http_request_duration_seconds_bucket', cumulative, host=host, le=bound))
+            latency.append(sample('doi_trace_http_request_duration_seconds_sum', stats['seconds'], host=host))
+            latency.append(sample('doi_trace_http_request_duration_seconds_count', stats['requests'], host=host))
+            retries.append(sample('doi_trace_http_retries_total', stats['retries'], host=host))
+        family('doi_trace_http_requests_total', 'counter', 'HTTP requests by host and status.', requests)
+        family('doi_trace_http_request_duration_seconds', 'histogram', 'HTTP request latency by host.', latency)
+        family('doi_trace_http_retries_total', 'counter', 'HTTP requests retried by the transport.', retries)
+
+        family('doi_trace_rate_limit_wait_seconds_total', 'counter', 'Time spent waiting on rate limiters.',
+               [sample('doi_trace_rate_limit_wait_seconds_total', seconds, limiter=name)
+                for name, seconds in data['rate_limit_wait_seconds'].items()])
+        family('doi_trace_cache_hits_total', 'counter', 'Cache hits.',
+               [sample('doi_trace_cache_hits_total', c['hits'], cache=name) for name, c in data['caches'].items()])
+        family('doi_trace_cache_misses_total', 'counter', 'Cache misses.',
+               [sample('doi_trace_cache_misses_total', c['misses'], cache=name) for name, c in data['caches'].items()])
+        family('doi_trace_events_total', 'counter', 'Free-form pipeline counters.',
+               [sample('doi_trace_events_total', value, name=name) for name, value in data['counters'].items()])
+        family('doi_trace_run_duration_seconds', 'gauge', 'Wall time of the last run.',
+               [sample('doi_trace_run_duration_seconds', data['wall_seconds'])])
+        family('doi_trace_last_run_timestamp_seconds', 'gauge', 'Unix time the last run started.',
+               [sample('doi_trace_last_run_timestamp_seconds', data['started'])])
+        lines.append('# EOF')
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temp_path, path)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def instrumented(func: Callable) -> Callable:
+    """Decorator recording a method as a pipeline stage named `<Class>.<method>`.
+
+    When the method returns a list, its length is recorded as the stage's item count.
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with metrics.stage(f"{type(self).__name__}.{func.__name__}") as stage:
+            result = func(self, *args, **kwargs)
+            if isinstance(result, list):
+                stage['items'] = len(result)
+            return result
+    return wrapper
+
+
+metrics = Metrics()
@@ -0,0 +1,77 @@
+import re
+import unicodedata
+from functools import lru_cache
+from html import unescape
+from typing import Dict, Iterable, List
+
+
+# Characters lxml strips or rewrites in plain text: leading whitespace, carriage returns, NULs, byte order marks
+_PARSER_REWRITES = re.compile(r'[\r\x00\ufeff]|^\s')
+
+# Inline formatting tags publishers put in titles (e.g. <i>in situ</i>, CO<sub>2</sub>), without attributes
+_INLINE_TAG = re.compile(r'</?(?:i|b|em|strong|sub|sup|u|sc|scp|span|small|tt)>', re.IGNORECASE)
+
+# Cached titles per process; Scholar and Crossref return the same titles many times over
+TITLE_CACHE_SIZE = 65536
+
+
+def strip_markup(text: str) -> str:
+    """Unescape HTML entities and remove tags, as `BeautifulSoup(unescape(text), 'lxml').text` does.
+
+    Plain text is returned as is and simple inline tags are removed directly;
+    only text with other markup (or characters lxml rewrites) is parsed.
+
+    Args:
+        text: Text that may contain HTML
+
+    Returns:
+        The text content
+    """
+    if '<' not in text and '&' not in text and not _PARSER_REWRITES.search(text):
+        return text
+    unescaped = unescape(text)
+    segments = _INLINE_TAG.split(unescaped)
+    stripped = ''.join(segments)
+    # lxml collapses whitespace-only text between tags, so that case goes to the parser too
+    if ('<' not in stripped and '&' not in stripped and not _PARSER_REWRITES.search(stripped)
+            and not any(segment.isspace() for segment in segments[1:])):
+        return stripped
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(unescaped, 'lxml').text
+
+
+def to_ascii(text: str) -> str:
+    """Decompose accented characters and drop everything outside ASCII (e.g. 'é' -> 'e', '…' -> '...')."""
+    if text.isascii():
+        return text
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+@lru_cache(maxsize=TITLE_CACHE_SIZE)
+def normalize_title(title: str) -> str:
+    """Strip markup from a title and reduce it to ASCII.
+
+    Args:
+        title: Title as returned by an API
+
+    Returns:
+        The normalized title
+    """
+    return to_ascii(strip_markup(title))
+
+
+def normalize_titles(titles: Iterable[str]) -> List[str]:
+    """Normalize a list of titles, normalizing each distinct title once.
+
+    Args:
+        titles: Titles as returned by an API
+
+    Returns:
+        The normalized titles, in the same order
+    """
+    titles = list(titles)
+    normalized: Dict[str, str] = {}
+    for title in titles:
+        if title not in normalized:
+            normalized[title] = normalize_title(title)
+    return [normalized[title] for title in titles]
@@ -0,0 +1,293 @@
+import json
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import config
+from .registry import load_source
+
+
+def run_processor(processor: Any, start_date: Optional[datetime], end_date: Optional[datetime],
+                  output_path: str) -> str:
+    """Fetch, process and save a source instance.
+
+    Sources implementing the streaming contract are run through it and saved
+    as JSON Lines (the output path's suffix becomes `.jsonl`); the others are
+    run through the batch methods. The output is also exported as Parquet
+    and upserted into the citation store when enabled (see `export_parquet`
+    and `ingest_output`).
+
+    Args:
+        processor: ReferenceDataSource instance
+        start_date: Start date for the citation search
+        end_date: End date for the citation search
+        output_path: File the results are saved to
+
+    Returns:
+        The path actually written
+    """
+    from .transport import get_transport
+    archive = get_transport().archive
+    if archive is not None and not archive.replaying:
+        archive.describe(start_date=start_date, end_date=end_date, sources=[processor.get_source_name()])
+
+    if processor.supports_streaming():
+        output_path = Path(output_path).with_suffix('.jsonl')
+        records = processor.process_stream(processor.iter_citations(None, start_date, end_date))
+        output_path = processor.save_stream(records, output_path)
+    else:
+        citations = processor.fetch_citations(None, start_date, end_date)
+        processed = processor.process_results(citations)
+        # Sources may save elsewhere (Google Scholar puts bare filenames in data/); sources
+        # written before save_results returned the path save where they were told
+        output_path = processor.save_results(processed, Path(output_path)) or output_path
+    export_parquet(output_path)
+    ingest_output(output_path)
+    return str(output_path)
+
+
+def export_parquet(output_path: str) -> None:
+    """Export an output file as Parquet tables if `[parquet] enabled` is set (or --parquet was given).
+
+    Partial shard outputs are skipped; their merged output is exported by `merge-shards`.
+
+    Args:
+        output_path: Source or combined output file
+    """
+    if not config.data.get('parquet', {}).get('enabled', False) or Path(output_path).parent.name == 'shards':
+        return
+    from .parquet import export_output
+    written = export_output(output_path, config.get_directory('parquet'))
+    print(f"Parquet tables updated in {', '.join(str(path) for path in written.values())}")
+
+
+def ingest_output(output_path: str) -> None:
+    """Upsert a source output file into the citation store if `[store] enabled` is set.
+
+    Partial shard outputs are skipped; their merged output is ingested by `merge-shards`.
+
+    Args:
+        output_path: Source output file
+    """
+    if not config.data.get('store', {}).get('enabled', False) or Path(output_path).parent.name == 'shards':
+        return
+    from .store import CitationStore
+    with CitationStore(config.data['store']['path']) as store:
+        store.ingest_file(output_path)
+    print(f"Citation store updated: {config.data['store']['path']}")
+
+
+def run_source(name: str, start_date: Optional[datetime], end_date: Optional[datetime], output_path: str,
+               **options: Any) -> str:
+    """Fetch, process and save one registered source.
+
+    Module-level so it can run in a worker process.
+
+    Args:
+        name: Registered source name (e.g. 'datacite')
+        start_date: Start date for the citation search
+        end_date: End date for the citation search
+        output_path: File the results are saved to
+        **options: Extra keyword arguments for the source (e.g. shard)
+
+    Returns:
+        The path actually written
+    """
+    return run_processor(load_source(name)(**options), start_date, end_date, output_path)
+
+
+def _timed(func: Callable, *args: Any) -> Tuple[float, float, Any]:
+    """Run a task and return its start time, end time and result."""
+    started = time.time()
+    result = func(*args)
+    return started, time.time(), result
+
+
+class Task:
+    """One node of the run graph.
+
+    Args:
+        name: Task name
+        func: Callable run with no arguments; must be picklable for process tasks
+        deps: Names of the tasks that must finish first
+        kind: 'thread' for network-bound work, 'process' for CPU-bound work
+        needs_all: When False the task still runs if some (but not all) dependencies failed
+        meta: Extra entries recorded for the task in the manifest
+    """
+
+    def __init__(self, name: str, func: Callable, deps: Tuple[str, ...] = (), kind: str = 'thread',
+                 needs_all: bool = True, meta: Optional[Dict[str, Any]] = None) -> None:
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown task kind {kind!r}")
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.kind = kind
+        self.needs_all = needs_all
+        self.meta = meta or {}
+
+
+class Orchestrator:
+    """Run a graph of tasks under a shared concurrency budget and keep a run manifest.
+
+    Thread tasks share a pool of `concurrency` workers; process tasks run on a
+    separate process pool so CPU-bound parsing doesn't hold the GIL against
+    the network-bound sources. The manifest is rewritten after every task so
+    an interrupted run still records what finished and where its output is.
+    """
+
+    def __init__(self, run_id: str, concurrency: int = 3, processes: int = 1,
+                 runs_dir: Optional[Path] = None) -> None:
+        """Initialize the orchestrator.
+
+        Args:
+            run_id: Identifier of the run (used for the run directory)
+            concurrency: Thread tasks allowed to run at once
+            processes: Worker processes for process tasks
+            runs_dir: Parent directory of run directories (defaults to <output directory>/runs)
+        """
+        self.run_id = run_id
+        self.concurrency = max(concurrency, 1)
+        self.processes = max(processes, 1)
+        self.run_dir = Path(runs_dir or config.get_directory('output') / 'runs') / run_id
+        self.manifest_path = self.run_dir / 'manifest.json'
+        self.manifest = {
+            'run_id': run_id,
+            'started': datetime.now().isoformat(timespec='seconds'),
+            'finished': None,
+            'tasks': {},
+            'critical_path': []
+        }
+
+    def run(self, tasks: List[Task], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run every task once its dependencies have finished.
+
+        Args:
+            tasks: Tasks of the graph
+            options: Run options recorded in the manifest
+
+        Returns:
+            The run manifest
+        """
+        graph = {task.name: task for task in tasks}
+        for task in tasks:
+            missing = [dep for dep in task.deps if dep not in graph]
+            if missing:
+                raise ValueError(f"Task {task.name} depends on unknown tasks: {', '.join(missing)}")
+        self.manifest['options'] = options or {}
+        for name in graph:
+            self.manifest['tasks'][name] = dict(graph[name].meta, status='pending', deps=list(graph[name].deps))
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self._write_manifest()
+
+        pending = dict(graph)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as threads, \
+                ProcessPoolExecutor(max_workers=self.processes) as processes:
+            while pending or running:
+                progressed = False
+                for name, task in list(pending.items()):
+                    states = [self.manifest['tasks'][dep]['status'] for dep in task.deps]
+                    if any(state in ('pending', 'running') for state in states):
+                        continue
+                    del pending[name]
+                    progressed = True
+                    ok = all(state == 'done' for state in states) or (
+                        not task.needs_all and any(state == 'done' for state in states))
+                    if not ok:
+                        self._update(name, status='skipped', error='a dependency failed')
+                        continue
+                    executor = processes if task.kind == 'process' else threads
+                    running[executor.submit(_timed, task.func)] = name
+                    self._update(name, status='running', kind=task.kind)
+
+                if not running:
+                    if not progressed:
+                        raise ValueError(f"Dependency cycle between tasks: {', '.join(pending)}")
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        started, finished, result = future.result()
+                    except Exception as error:
+                        traceback.print_exception(error)
+                        self._update(name, status='failed', error=f"{type(error).__name__}: {error}")
+                        print(f"[{self.run_id}] {name} failed: {error}")
+                        continue
+                    self._update(name, status='done', started=started, finished=finished,
+                                 seconds=round(finished - started, 3), output=result)
+                    print(f"[{self.run_id}] {name} finished in {finished - started:.1f}s")
+
+        self.manifest['critical_path'] = self.critical_path()
+        self.manifest['finished'] = datetime.now().isoformat(timespec='seconds')
+        self._write_manifest()
+        return self.manifest
+
+    def critical_path(self) -> List[Dict[str, Any]]:
+        """Find the chain of tasks that determined the run's wall time.
+
+        Starting from the task that finished last, repeatedly step to the
+        dependency that finished last; those are the tasks that held everything
+        after them back.
+
+        Returns:
+            Tasks on the critical path in run order, with their durations
+        """
+        tasks = {name: info for name, info in self.manifest['tasks'].items() if info.get('finished')}
+        if not tasks:
+            return []
+        name = max(tasks, key=lambda task: tasks[task]['finished'])
+        path = []
+        while name:
+            path.append({'task': name, 'seconds': tasks[name]['seconds']})
+            deps = [dep for dep in tasks[name]['deps'] if dep in tasks]
+            name = max(deps, key=lambda dep: tasks[dep]['finished']) if deps else None
+        return list(reversed(path))
+
+    def _update(self, name: str, **values: Any) -> None:
+        self.manifest['tasks'][name].update(values)
+        self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        temp_path = self.manifest_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=4)
+        os.replace(temp_path, self.manifest_path)
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """Read a run manifest.
+
+    Args:
+        path: Manifest file, or the run directory containing it
+
+    Returns:
+        The manifest
+    """
+    path = Path(path)
+    if path.is_dir():
+        path = path / 'manifest.json'
+    with open(path) as f:
+        return json.load(f)
+
+
+def manifest_outputs(manifest: Dict[str, Any], sources: Optional[List[str]] = None) -> Dict[str, str]:
+    """Get the source output files recorded in a manifest.
+
+    Args:
+        manifest: Run manifest
+        sources: Only these sources (defaults to all recorded ones)
+
+    Returns:
+        Mapping of source name to output file
+    """
+    outputs = {}
+    for name, info in manifest['tasks'].items():
+        if info.get('status') == 'done' and info.get('type') == 'source' and (not sources or name in sources):
+            outputs[name] = info['output']
+    return outputs
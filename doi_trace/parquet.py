@@ -0,0 +1,133 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from .linkage import parse_year
+from .records import canonical_doi
+
+
+# Both tables are partitioned as <table>/source=<source>/year=<year>/, so readers can prune by either
+PARTITION_COLUMNS = ['source', 'year']
+
+
+def _pyarrow():
+    """Import pyarrow, which is only needed for Parquet export."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError("Parquet export needs pyarrow (pip install 'DOITrace[parquet]')") from error
+    return pyarrow, pyarrow.parquet
+
+
+def _text(value: Any) -> Any:
+    # Catalog fields read through pandas may be NaN floats
+    return value if isinstance(value, str) and value else None
+
+
+def tables(records: Iterable[Dict[str, Any]], source: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Flatten output records into a publication table and a citation edge table.
+
+    Reads source outputs ('DOI', 'Title', 'Year', 'Cited-References'), Web
+    of Science outputs ('doi', 'title', 'year', 'eosdis_matches') and
+    combined records, whose 'db:' tags give the sources of a publication.
+
+    Args:
+        records: Output records
+        source: Source name written to the 'source' column
+
+    Returns:
+        (publications, citations) rows; citations refer to their publication by
+        its 'publication' number, which is unique within a source's export
+    """
+    publications = []
+    citations = []
+    for number, record in enumerate(records):
+        doi = canonical_doi(record.get('DOI', record.get('doi'))) or None
+        year = parse_year(record.get('Year', record.get('year')))
+        if 'tags' in record:
+            sources = sorted(tag['tag'][3:] for tag in record['tags'] if str(tag.get('tag')).startswith('db:'))
+        else:
+            sources = [source]
+        publications.append({
+            'source': source,
+            'year': year,
+            'publication': number,
+            'doi': doi,
+            'title': _text(record.get('Title', record.get('title'))),
+            'sources': sources
+        })
+        for ref in record.get('Cited-References') or record.get('eosdis_matches') or []:
+            citations.append({
+                'source': source,
+                'year': year,
+                'publication': number,
+                'doi': doi,
+                'eos_doi': canonical_doi(ref.get('EOS DOI')) or None,
+                'agency': _text(ref.get('LP Agency')),
+                'shortname': _text(ref.get('Shortname'))
+            })
+    return publications, citations
+
+
+def write_parquet(records: Iterable[Dict[str, Any]], source: str, directory: Union[str, Path],
+                  name: str) -> Dict[str, Path]:
+    """Write output records as partitioned Parquet tables.
+
+    Writes `<directory>/publications/` and `<directory>/citations/`, both
+    partitioned by source and year. The partitions written replace the ones
+    an earlier export of the same source wrote for the same years.
+
+    Args:
+        records: Output records (see `tables`)
+        source: Source name, used as the 'source' partition
+        directory: Root of the Parquet tables
+        name: Base name of the files written (e.g. the output file's stem)
+
+    Returns:
+        The directory of each table
+    """
+    pa, pq = _pyarrow()
+    schemas = {
+        'publications': pa.schema([
+            ('source', pa.string()), ('year', pa.int32()), ('publication', pa.int64()), ('doi', pa.string()),
+            ('title', pa.string()), ('sources', pa.list_(pa.string()))
+        ]),
+        'citations': pa.schema([
+            ('source', pa.string()), ('year', pa.int32()), ('publication', pa.int64()), ('doi', pa.string()),
+            ('eos_doi', pa.string()), ('agency', pa.string()), ('shortname', pa.string())
+        ])
+    }
+    written = {}
+    for table, rows in zip(('publications', 'citations'), tables(records, source)):
+        path = Path(directory) / table
+        pq.write_to_dataset(
+            pa.Table.from_pylist(rows, schema=schemas[table]),
+            root_path=str(path),
+            partition_cols=PARTITION_COLUMNS,
+            basename_template=f"{name}-{{i}}.parquet",
+            existing_data_behavior='delete_matching'
+        )
+        written[table] = path
+    return written
+
+
+def export_output(path: Union[str, Path], directory: Union[str, Path]) -> Dict[str, Path]:
+    """Export a source or combined output file as Parquet.
+
+    The source is read from the file name (`<source>_citations_<timestamp>.json`
+    or `combined_citations_<date>.json`, in either combined layout).
+
+    Args:
+        path: Output file written by a source or by `combine`
+        directory: Root of the Parquet tables
+
+    Returns:
+        The directory of each table
+    """
+    from .layout import load_combined
+    from .reference_sources.base import read_records
+    path = Path(path)
+    source = path.name.split('_citations_')[0]
+    # Streaming sources write JSON Lines; load_combined also reads plain JSON arrays
+    records = read_records(path) if path.suffix == '.jsonl' else load_combined(path)
+    return write_parquet(records, source, directory, path.name.split('.')[0])
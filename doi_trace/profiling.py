@@ -0,0 +1,244 @@
+import cProfile
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from .metrics import metrics
+
+
+PROFILE_MODES = ('cpu', 'alloc')
+
+
+class StackSampler:
+    """Sample the Python stacks of all threads at a fixed interval.
+
+    The samples are written in the collapsed stack format read by
+    flamegraph.pl, speedscope and inferno (`frame;frame;frame count`).
+    Sampling sees time spent waiting on the network as well as time on the
+    CPU, which cProfile's per-function totals make hard to read.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """Initialize the sampler.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        self._thread = threading.Thread(target=self._run, name='doi-trace-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def write(self, path: Path) -> None:
+        """Write the samples as collapsed stacks."""
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class AllocationTracker:
+    """Record the allocations of each pipeline stage with tracemalloc.
+
+    Registered as a `metrics` stage listener, and aggregated per stage name so
+    a stage called once per batch still gets a single section. Every call
+    adds its change in traced memory; allocation sites come from tracemalloc
+    snapshots around the 1st, 2nd, 4th, 8th... call of each stage only, so
+    snapshots don't dominate the profile of stages called thousands of times.
+    Stages may nest; each one is measured from when it started.
+    """
+
+    def __init__(self, top: int = 25, frames: int = 10) -> None:
+        """Initialize the tracker.
+
+        Args:
+            top: Allocation sites reported per stage
+            frames: Frames stored per traceback by tracemalloc
+        """
+        self.top = top
+        self.frames = frames
+        self.stages = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start tracing allocations and listening for stages."""
+        tracemalloc.start(self.frames)
+        self._baseline = self._snapshot()
+        metrics.add_listener(self)
+
+    def stop(self) -> None:
+        """Stop listening and take the whole-run report."""
+        metrics.remove_listener(self)
+        current, peak = tracemalloc.get_traced_memory()
+        whole_run = self._stage('(whole run)')
+        whole_run['calls'] = 1
+        whole_run['peak'] = peak
+        self._add_sites(whole_run, self._baseline)
+        whole_run['growth'] = sum(whole_run['sizes'].values())
+        tracemalloc.stop()
+
+    def stage_started(self, name: str) -> None:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        with self._lock:
+            stage = self._stage(name)
+            stage['calls'] += 1
+            # Sample the 1st, 2nd, 4th, 8th... call
+            sampled = stage['calls'] & (stage['calls'] - 1) == 0
+        stack.append((tracemalloc.get_traced_memory()[0], self._snapshot() if sampled else None))
+
+    def stage_finished(self, name: str) -> None:
+        stack = getattr(self._local, 'stack', None)
+        if not stack:
+            return
+        before, snapshot = stack.pop()
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            stage = self._stage(name)
+            stage['growth'] += current - before
+            stage['peak'] = max(stage['peak'], peak)
+        if snapshot is not None:
+            self._add_sites(stage, snapshot)
+
+    def _stage(self, name: str) -> dict:
+        if name not in self.stages:
+            self.stages[name] = {'calls': 0, 'sampled': 0, 'growth': 0, 'peak': 0,
+                                 'sizes': Counter(), 'counts': Counter()}
+        return self.stages[name]
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    def _add_sites(self, stage: dict, before: tracemalloc.Snapshot) -> None:
+        diff = self._snapshot().compare_to(before, 'lineno')
+        with self._lock:
+            stage['sampled'] += 1
+            for stat in diff:
+                frame = stat.traceback[0]
+                stage['sizes'][frame.filename, frame.lineno] += stat.size_diff
+                stage['counts'][frame.filename, frame.lineno] += stat.count_diff
+
+    def write(self, path: Path) -> None:
+        """Write the per-stage allocation report as text."""
+        with open(path, 'w') as f:
+            for name, stage in self.stages.items():
+                f.write(f"== {name} ==\n")
+                f.write(f"calls: {stage['calls']}, net growth: {_format_size(stage['growth'])}, "
+                        f"traced peak so far: {_format_size(stage['peak'])}\n")
+                if stage['sampled'] < stage['calls']:
+                    f.write(f"allocation sites summed over {stage['sampled']} sampled calls\n")
+                sites = sorted(stage['sizes'].items(), key=lambda item: abs(item[1]), reverse=True)
+                for (filename, lineno), size in sites[:self.top]:
+                    f.write(f"  {_format_size(size):>10} {stage['counts'][filename, lineno]:+8d} blocks  "
+                            f"{filename}:{lineno}\n")
+                f.write("\n")
+
+
+def _format_size(size: int) -> str:
+    """Format a signed byte count for reading."""
+    sign = '-' if size < 0 else '+'
+    size = abs(size)
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f"{sign}{size:.0f} {unit}" if unit == 'B' else f"{sign}{size:.1f} {unit}"
+        size /= 1024
+    return f"{sign}{size:.1f} GiB"
+
+
+class Profiler:
+    """Profile one CLI command.
+
+    `cpu` mode runs cProfile and writes a `.pstats` file (open it with
+    `python -m pstats` or snakeviz) plus a `.collapsed` stack file for flame
+    graphs. `alloc` mode writes a tracemalloc top-N report per pipeline stage.
+    Files are named `<command>_<timestamp>` so repeated runs don't overwrite
+    each other.
+    """
+
+    def __init__(self, mode: str, command: str, output_dir: Path, top: int = 25) -> None:
+        """Initialize the profiler.
+
+        Args:
+            mode: 'cpu' or 'alloc'
+            command: Name of the command being profiled
+            output_dir: Directory the profile files are written to
+            top: Allocation sites reported per stage in `alloc` mode
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {', '.join(PROFILE_MODES)}")
+        self.mode = mode
+        self.output_dir = Path(output_dir)
+        self.prefix = f"{command or 'cli'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.top = top
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._tracker: Optional[AllocationTracker] = None
+
+    def start(self) -> None:
+        """Start profiling."""
+        if self.mode == 'cpu':
+            self._sampler = StackSampler()
+            self._sampler.start()
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._tracker = AllocationTracker(self.top)
+            self._tracker.start()
+
+    def stop(self) -> List[Path]:
+        """Stop profiling and write the profile files.
+
+        Returns:
+            Paths of the files written
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        if self._profile:
+            self._profile.disable()
+            self._sampler.stop()
+            pstats_path = self.output_dir / f"{self.prefix}.pstats"
+            self._profile.dump_stats(pstats_path)
+            collapsed_path = self.output_dir / f"{self.prefix}.collapsed"
+            self._sampler.write(collapsed_path)
+            written += [pstats_path, collapsed_path]
+        if self._tracker:
+            self._tracker.stop()
+            alloc_path = self.output_dir / f"{self.prefix}_alloc.txt"
+            self._tracker.write(alloc_path)
+            written.append(alloc_path)
+        return written
@@ -0,0 +1,128 @@
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# URL and scheme prefixes sources leave on DOIs (https://doi.org/10..., doi:10...)
+_DOI_PREFIX = re.compile(r'^\s*(?:(?:https?://)?(?:dx\.)?doi\.org/|doi:\s*)', re.IGNORECASE)
+
+# Reference fields every source writes; anything else is kept in CatalogEntry.extra
+REFERENCE_FIELDS = ('EOS DOI', 'LP Agency', 'Shortname')
+
+
+def canonical_doi(doi: Any) -> str:
+    """Reduce a DOI to the form records are keyed on: no URL prefix, uppercase, interned.
+
+    Args:
+        doi: DOI as stored by a source (may be None or a URL)
+
+    Returns:
+        The canonical DOI, or an empty string if there is none
+    """
+    if not isinstance(doi, str):
+        return ''
+    if not doi.startswith('10.'):
+        doi = _DOI_PREFIX.sub('', doi)
+    doi = doi.strip()
+    return sys.intern(doi.upper()) if doi else ''
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class CatalogEntry:
+    """An EOS catalog row as cited by a publication.
+
+    Entries come from a Catalog, which hands out one shared object per
+    distinct row, so they compare and hash by identity.
+    """
+    doi: str
+    agency: Any = None
+    shortname: Any = None
+    extra: Tuple[Tuple[str, Any], ...] = ()  # other fields a source kept, in order
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the entry in the 'Cited-References' format of the source outputs."""
+        return {'EOS DOI': self.doi, 'LP Agency': self.agency, 'Shortname': self.shortname, **dict(self.extra)}
+
+
+class Catalog:
+    """Shared CatalogEntry objects, one per distinct reference.
+
+    Source outputs repeat the same catalog row (agency and shortname
+    included) for every publication citing it; references read through a
+    Catalog point to a single entry instead.
+    """
+
+    __slots__ = ('entries', '_seen')
+
+    def __init__(self) -> None:
+        self.entries: Dict[tuple, CatalogEntry] = {}
+        self._seen: Dict[tuple, CatalogEntry] = {}  # by the reference's raw items, to skip canonicalizing repeats
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def reference(self, ref: Dict[str, Any]) -> CatalogEntry:
+        """Get the shared entry for a 'Cited-References' item.
+
+        Args:
+            ref: Reference as written by a source ('EOS DOI', 'LP Agency', 'Shortname', ...)
+
+        Returns:
+            The entry, created on first use
+        """
+        items = tuple(ref.items())
+        entry = self._seen.get(items)
+        if entry is not None:
+            return entry
+        doi = canonical_doi(ref.get('EOS DOI'))
+        extra = tuple((key, value) for key, value in ref.items() if key not in REFERENCE_FIELDS)
+        key = (doi, ref.get('LP Agency'), ref.get('Shortname'), extra)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = CatalogEntry(doi, _intern(key[1]), _intern(key[2]),
+                                 tuple((_intern(name), _intern(value)) for name, value in extra))
+            self.entries[key] = entry
+        self._seen[items] = entry
+        return entry
+
+
+@dataclass(slots=True)
+class Citation:
+    """A publication citing EOS data, as reported by one source."""
+    source: str
+    doi: str
+    title: Optional[str] = None
+    year: Any = None
+    references: List[CatalogEntry] = field(default_factory=list)
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any], source: str, catalog: Catalog) -> 'Citation':
+        """Read a publication from a source output.
+
+        Args:
+            record: Publication with 'DOI', 'Title', 'Year' and 'Cited-References' (Web of
+                Science outputs use 'doi', 'title', 'year' and 'eosdis_matches')
+            source: Name of the source that reported it
+            catalog: Catalog the references are resolved through
+
+        Returns:
+            The citation
+        """
+        return cls(
+            source=sys.intern(source),
+            doi=canonical_doi(record.get('DOI', record.get('doi'))),
+            title=record.get('Title', record.get('title')),
+            year=record.get('Year', record.get('year')),
+            references=[catalog.reference(ref)
+                        for ref in record.get('Cited-References') or record.get('eosdis_matches') or []]
+        )
+
+    @property
+    def empty(self) -> bool:
+        """Whether the publication has no DOI, no title and no references to combine."""
+        return not (self.doi or self.title or self.references)
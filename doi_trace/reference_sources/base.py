@@ -1,5 +1,7 @@
+import json
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from pathlib import Path
 
 
@@ -9,6 +11,11 @@ class ReferenceDataSource(ABC):
     This class defines the interface that all data sources must implement.
     Each data source is responsible for fetching and processing citation data
     from a specific source (e.g., Web of Science, Scopus, etc.).
+
+    Sources may also implement the optional streaming contract
+    (`iter_citations` -> `process_stream` -> `save_stream`), which passes
+    records through generators so only a batch is held in memory at a time.
+    Callers check `supports_streaming()` and fall back to the batch methods.
     """
     
     @abstractmethod
@@ -39,12 +46,15 @@ class ReferenceDataSource(ABC):
         pass
     
     @abstractmethod
-    def save_results(self, processed_data: Dict[str, Any], output_path: Path) -> None:
+    def save_results(self, processed_data: Dict[str, Any], output_path: Path) -> Path:
         """Save the processed results to a file.
         
         Args:
             processed_data: Processed data to save
             output_path: Path to save the results to
+            
+        Returns:
+            Path the results were written to (a source may place them elsewhere)
         """
         pass
     
@@ -56,3 +66,85 @@ class ReferenceDataSource(ABC):
             Name of the data source
         """
         pass
+
+    def iter_citations(self, dois: List[str], start_date: Optional[str] = None,
+                       end_date: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream raw citation records from the data source (optional).
+
+        Args:
+            dois: List of DOIs to search for citations
+            start_date: Optional start date for the search (format: YYYY-MM-DD)
+            end_date: Optional end date for the search (format: YYYY-MM-DD)
+
+        Yields:
+            Raw citation records
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming")
+
+    def process_stream(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Process streamed raw records into the standardized format (optional).
+
+        Args:
+            records: Raw records from `iter_citations`
+
+        Yields:
+            Processed records
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming")
+
+    def save_stream(self, records: Iterable[Dict[str, Any]], output_path: Path) -> Path:
+        """Write streamed records to a JSON Lines file, one record per line.
+
+        Args:
+            records: Processed records from `process_stream`
+            output_path: Path to save the results to
+
+        Returns:
+            Path the records were written to
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        return output_path
+
+    @classmethod
+    def supports_streaming(cls) -> bool:
+        """Check whether the source implements `iter_citations` and `process_stream`.
+
+        Returns:
+            True if the streaming methods are overridden
+        """
+        return (cls.iter_citations is not ReferenceDataSource.iter_citations
+                and cls.process_stream is not ReferenceDataSource.process_stream)
+
+
+def batched(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most `size` items.
+
+    Args:
+        records: Items to group
+        size: Maximum items per batch
+
+    Yields:
+        Lists of items
+    """
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+def read_records(path: Path) -> List[Dict[str, Any]]:
+    """Read a source output file, either a JSON array or JSON Lines.
+
+    Args:
+        path: Output file (`.json` or `.jsonl`)
+
+    Returns:
+        List of records
+    """
+    with open(path) as f:
+        if str(path).endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
@@ -1,17 +1,18 @@
 from datetime import datetime
 from .base import ReferenceDataSource
 from ..config import config
+from ..metrics import instrumented
+from ..transport import get_transport
+from ..crossref_works import CrossrefWorks
+from ..normalize import normalize_title
 import json
 import requests
-from crossref.restful import Works, Etiquette
+from crossref.restful import Etiquette
 from habanero import cn
 import eosutilities as eosutil
 from tqdm import tqdm
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
 import requests.exceptions
-import unicodedata
-from bs4 import BeautifulSoup
-from html import unescape
 import pandas as pd
 import concurrent.futures
 import os
@@ -33,7 +34,8 @@ class Crossref(ReferenceDataSource):
             config.data.get('organization', 'NASA'),
             config.data.get('email', '')
         )
-        self.works = Works(etiquette=self.etiquette)
+        self.works = CrossrefWorks(etiquette=self.etiquette)
+        self.event_data_url = f"{config.get_endpoint('eventdata')}/v1/events"
         self.prefixes = ["10.5067", "10.7927", "10.3334"]
         self.bad_source_ids = [
             'cambia-lens',
@@ -50,6 +52,7 @@ class Crossref(ReferenceDataSource):
         """Get the name of the data source."""
         return "Crossref"
     
+    @instrumented
     def fetch_citations(self, dois, start_date=None, end_date=None):
         """Fetch citations from Crossref Event Data API."""
         eos_dois = eosutil.getEOSCSV()  # Load EOS DOIs from CSV
@@ -106,20 +109,21 @@ class Crossref(ReferenceDataSource):
             API response data
         """
         try:
-            url = f'https://api.eventdata.crossref.org/v1/events'
+            url = self.event_data_url
             params = {
                 'mailto': self.etiquette.contact_email,
                 'obj-id.prefix': prefix,
                 'cursor': cursor
             }
 
-            response = requests.get(url, params=params)
+            response = get_transport().get(url, params=params)
             response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"Error fetching Event Data for prefix {prefix}: {e}")
             return None
     
+    @instrumented
     def _combine_duplicates(self, citations):
         """Combine entries with the same DOI and add agency information."""
         df = pd.DataFrame(eosutil.getEOSCSV())
@@ -152,8 +156,7 @@ class Crossref(ReferenceDataSource):
             record = self.works.doi(citation['DOI'])
             if record and record.get('subtype') != 'preprint':
                 title = record.get('title', [''])[0]
-                title = BeautifulSoup(unescape(title), 'lxml').text
-                title = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
+                title = normalize_title(title)
                 citation['Title'] = title
                 
                 try:
@@ -171,6 +174,7 @@ class Crossref(ReferenceDataSource):
             print(f"Error extracting metadata for {citation['DOI']}: {e}")
         return citation
     
+    @instrumented
     def _extract_metadata(self, citations):
         """Extract metadata from Crossref for each citation using parallel processing."""
         with tqdm(total=len(citations), desc="Extracting metadata") as pbar:
@@ -187,6 +191,7 @@ class Crossref(ReferenceDataSource):
         
         return citations
     
+    @instrumented
     def process_results(self, raw_data):
         """Process the raw data to match with EOS data."""
         # Filter out bad types
@@ -196,7 +201,9 @@ class Crossref(ReferenceDataSource):
                 processed_data.append(citation)
         return processed_data
     
+    @instrumented
     def save_results(self, processed_data, output_path):
         """Save the processed data to a JSON file."""
         with open(output_path, 'w') as f:
-            json.dump(processed_data, f, indent=4) 
\ No newline at end of file
+            json.dump(processed_data, f, indent=4)
+        return output_path
\ No newline at end of file
@@ -1,17 +1,18 @@
 from datetime import datetime, timedelta
 from .base import ReferenceDataSource
 from ..config import config
+from ..metrics import instrumented, metrics
+from ..transport import get_transport, rate_limit_sleep
+from ..crossref_works import CrossrefWorks
+from ..normalize import normalize_title
 import json
 import requests
-from crossref.restful import Works, Etiquette
+from crossref.restful import Etiquette
 from habanero import cn
 import eosutilities as eosutil
 from tqdm import tqdm
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type, retry_if_exception
 import requests.exceptions
-import unicodedata
-from bs4 import BeautifulSoup
-from html import unescape
 import concurrent.futures
 import os
 import pandas as pd
@@ -30,9 +31,14 @@ class DataCite(ReferenceDataSource):
     This class handles fetching and processing citation data from DataCite API.
     """
     
-    def __init__(self):
-        """Initialize the DataCite data source."""
+    def __init__(self, shard=None):
+        """Initialize the DataCite data source.
+        
+        Args:
+            shard: Optional Shard restricting the run to a slice of the EOS catalog
+        """
         super().__init__()
+        self.shard = shard
         # Create etiquette from config for Crossref API
         self.etiquette = Etiquette(
             config.data.get('project_name', 'DOI Trace'),
@@ -40,7 +46,8 @@ class DataCite(ReferenceDataSource):
             config.data.get('organization', 'NASA'),
             config.data.get('email', '')
         )
-        self.works = Works(etiquette=self.etiquette)
+        self.works = CrossrefWorks(etiquette=self.etiquette)
+        self.base_url = config.get_endpoint('datacite')
         # Set number of workers based on CPU count, but limit to avoid overwhelming the API
         self.max_workers = min(os.cpu_count() or 4, 8)
         
@@ -63,22 +70,31 @@ class DataCite(ReferenceDataSource):
     
     def _consume_token(self):
         """Consume a token, waiting if necessary."""
+        if get_transport().replaying:
+            return
+        start = time.perf_counter()
         while True:
             self._refill_tokens()
             with self.token_lock:
                 if self.tokens > 0:
                     self.tokens -= 1
-                    return
+                    break
             time.sleep(0.1)  # Wait a bit before checking again
+        waited = time.perf_counter() - start
+        if waited >= 0.1:
+            metrics.rate_limit_wait('datacite', waited)
     
     def get_source_name(self) -> str:
         """Get the name of the data source."""
         return "DataCite"
     
+    @instrumented
     def fetch_citations(self, dois, start_date=None, end_date=None):
         """Fetch citations from DataCite API."""
         eos_dois = eosutil.getEOSCSV()  # Load EOS DOIs from CSV
         eos_dois = eosutil.getAcronyms(eos_dois)  # Process DOIs
+        if self.shard:
+            eos_dois = self.shard.select(eos_dois)
         citations = []
         
         # Fetch citations in parallel
@@ -133,12 +149,12 @@ class DataCite(ReferenceDataSource):
         """
         try:
             self._consume_token()  # Wait for a token before making the request
-            url = f'https://api.datacite.org/dois/{doi}'
-            response = requests.get(url)
+            url = f'{self.base_url}/dois/{doi}'
+            response = get_transport().get(url)
             
             if self._is_rate_limit_error(response):
                 print("\nRate limit hit! Waiting 5 minutes before retrying...")
-                time.sleep(300)  # Wait 5 minutes
+                rate_limit_sleep('datacite', 300)  # Wait 5 minutes
                 raise RateLimitError("Rate limit exceeded")
             
             response.raise_for_status()
@@ -160,6 +176,7 @@ class DataCite(ReferenceDataSource):
             print(f"Error fetching DataCite data for {doi}: {e}")
             return None
     
+    @instrumented
     def _extract_metadata(self, citations):
         """Extract metadata from Crossref for each citation."""
         # First deduplicate DOIs to avoid unnecessary API calls
@@ -171,6 +188,9 @@ class DataCite(ReferenceDataSource):
             if doi not in doi_to_citations:
                 doi_to_citations[doi] = []
             doi_to_citations[doi].append(citation)
+        # Repeated DOIs are served from the metadata fetched for their first occurrence
+        metrics.cache_hit('crossref_metadata', len(citations) - len(unique_dois))
+        metrics.cache_miss('crossref_metadata', len(unique_dois))
         
         # Fetch metadata for unique DOIs in parallel
         metadata_cache = {}
@@ -206,8 +226,7 @@ class DataCite(ReferenceDataSource):
             record = self.works.doi(doi)
             if record and record.get('subtype') != 'preprint':
                 title = record.get('title', [''])[0]
-                title = BeautifulSoup(unescape(title), 'lxml').text
-                title = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
+                title = normalize_title(title)
                 
                 try:
                     year = record['created'].get('date-parts')[0][0]
@@ -226,6 +245,7 @@ class DataCite(ReferenceDataSource):
             print(f"Error extracting metadata for {doi}: {e}")
         return None
     
+    @instrumented
     def _combine_duplicates(self, citations):
         """Combine entries with the same DOI and add agency information."""
         df = pd.DataFrame(eosutil.getEOSCSV())
@@ -252,6 +272,7 @@ class DataCite(ReferenceDataSource):
                 pbar.update(1)
         return combined
     
+    @instrumented
     def process_results(self, raw_data):
         """Process the raw data to match with EOS data."""
         # Filter out bad types
@@ -261,7 +282,9 @@ class DataCite(ReferenceDataSource):
                 processed_data.append(citation)
         return processed_data
     
+    @instrumented
     def save_results(self, processed_data, output_path):
         """Save the processed data to a JSON file."""
         with open(output_path, 'w') as f:
-            json.dump(processed_data, f, indent=4) 
\ No newline at end of file
+            json.dump(processed_data, f, indent=4)
+        return output_path
\ No newline at end of file
@@ -1,23 +1,27 @@
 from datetime import datetime
-from .base import ReferenceDataSource
+from .base import ReferenceDataSource, batched
 from ..config import config
+from ..metrics import instrumented, metrics
+from ..transport import get_transport
+from ..budget import RequestBudget
+from ..cache import ResponseCache
+from ..crossref_works import CrossrefWorks
+from ..doi_extract import extract_doi
+from ..normalize import normalize_title, normalize_titles, strip_markup
 import json
 import requests
-from serpapi import GoogleSearch
 import eosutilities as eosutil
 from tqdm import tqdm
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
 import requests.exceptions
-import unicodedata
-from bs4 import BeautifulSoup
-from html import unescape
 import concurrent.futures
+import glob
+from itertools import repeat
 import os
 import pandas as pd
 import re
 import jellyfish
-from crossref.restful import Works, Etiquette
-import time
+from crossref.restful import Etiquette
 from urllib.parse import parse_qsl, urlsplit
 
 
@@ -27,9 +31,19 @@ class GoogleScholar(ReferenceDataSource):
     This class handles fetching and processing citation data from Google Scholar via SerpAPI.
     """
     
-    def __init__(self):
-        """Initialize the Google Scholar data source."""
+    # Parameters that identify a search for the response cache (api_key and friends are ignored)
+    cache_key_params = ('engine', 'q', 'as_ylo', 'start', 'num', 'hl', 'lr', 'as_vis')
+
+    def __init__(self, shard=None, cache_only=False):
+        """Initialize the Google Scholar data source.
+        
+        Args:
+            shard: Optional Shard restricting the run to a slice of the EOS catalog
+            cache_only: Answer searches only from the response cache, never calling SerpAPI
+        """
         super().__init__()
+        self.shard = shard
+        self.cache_only = cache_only
         # Create etiquette from config for Crossref API
         self.etiquette = Etiquette(
             config.data.get('project_name', 'DOI Trace'),
@@ -37,7 +51,7 @@ class GoogleScholar(ReferenceDataSource):
             config.data.get('organization', 'NASA'),
             config.data.get('email', '')
         )
-        self.works = Works(etiquette=self.etiquette)
+        self.works = CrossrefWorks(etiquette=self.etiquette)
         # Set number of workers based on CPU count, but limit to avoid overwhelming the API
         self.max_workers = min(os.cpu_count() or 4, 8)
 
@@ -47,6 +61,20 @@ class GoogleScholar(ReferenceDataSource):
             raise ValueError("SerpAPI key not found in config.toml")
         
         # Configuration
+        self.serpapi_url = f"{config.get_endpoint('serpapi')}/search.json"
+        self.account_url = f"{config.get_endpoint('serpapi')}/account.json"
+        serpapi = config.data.get('serpapi', {})
+        self.requests_per_hour = serpapi.get('requests_per_hour', 1000)
+        self.search_concurrency = max(serpapi.get('concurrency', 4), 1)
+        self.results_per_page = min(serpapi.get('results_per_page', 20), 20)  # Scholar returns at most 20
+        self.max_searches = serpapi.get('max_searches', 0)
+        self.parse_processes = serpapi.get('parse_processes', 0) or min(os.cpu_count() or 1, 8)
+        self.parse_chunk_size = max(serpapi.get('parse_chunk_size', 5000), 1)
+        self.cache = None
+        if serpapi.get('cache', True) or cache_only:
+            ttl_days = serpapi.get('cache_ttl_days', 30)
+            self.cache = ResponseCache(config.get_directory('serpapi_cache'), 'serpapi', self.cache_key_params,
+                                       ttl_seconds=ttl_days * 86400 if ttl_days else None)
         self.exclude_preprints = True
         self.exclude_pdf = True
         self.bad_type_list = [
@@ -60,46 +88,72 @@ class GoogleScholar(ReferenceDataSource):
         """Get the name of the data source."""
         return "Google Scholar"
     
+    @instrumented
     def fetch_citations(self, dois, start_date=None, end_date=None):
         """Fetch citations from Google Scholar via SerpAPI."""
         eos_dois = eosutil.getEOSCSV()  # Load EOS DOIs from CSV
         eos_dois = eosutil.getAcronyms(eos_dois)  # Process DOIs
+        if self.shard:
+            eos_dois = self.shard.select(eos_dois)
         citations = []
         
-        # Load previously searched DOIs if they exist
+        # Load previously searched DOIs if they exist (tracked per shard so parallel runs don't clobber each other)
         searched_dois_file = 'data/searched_dois.json'
+        if self.shard:
+            searched_dois_file = f'data/searched_dois_{self.shard.suffix}.json'
         searched_dois = []
-        if os.path.exists(searched_dois_file):
+        # Replayed and cache-only runs don't search for real, so the progress file is left alone
+        replaying = get_transport().replaying or self.cache_only
+        if os.path.exists(searched_dois_file) and not replaying:
             with open(searched_dois_file) as f:
                 searched_dois = json.load(f)
             print(f"Already searched {len(searched_dois)} DOIs")
-        
-        # Process DOIs sequentially with rate limiting
-        with tqdm(total=len(eos_dois), desc="Fetching Google Scholar citations") as pbar:
-            for i, doi in enumerate(eos_dois):
-                doi_str = doi['EOS DOI']
-                
-                if doi_str in searched_dois:
-                    pbar.update(1)
-                    continue
-                
-                # Fetch citations for this DOI
-                results = self._get_scholar(doi_str, start_date)
+
+        pending = []
+        searched = set(searched_dois)
+        for doi in eos_dois:
+            if doi['EOS DOI'] in searched:
+                metrics.cache_hit('searched_dois')
+            else:
+                metrics.cache_miss('searched_dois')
+                pending.append(doi['EOS DOI'])
+
+        # Highest-value DOIs first, so a run cut short by the quota still covers them
+        pending = self._prioritize(pending)
+        budget = self._search_budget()
+
+        # Searches run concurrently; the budget paces them to the hourly limit and stops them at the quota
+        with tqdm(total=len(eos_dois), initial=len(eos_dois) - len(pending),
+                  desc="Fetching Google Scholar citations") as pbar, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=self.search_concurrency) as executor:
+            futures = {executor.submit(self._get_scholar, doi_str, start_date, budget): doi_str for doi_str in pending}
+            completed = 0
+            found = {}
+            for future in concurrent.futures.as_completed(futures):
+                doi_str = futures[future]
+                results = future.result()
                 if results:
-                    citations.extend(results)
-                
-                # Save progress
-                searched_dois.append(doi_str)
-                with open(searched_dois_file, 'w') as f:
-                    json.dump(searched_dois, f, indent=4)
-                
+                    found[doi_str] = results
+
+                # Save progress, except for DOIs the quota cut short (they are searched again next run)
+                if results is not None or not budget.exhausted:
+                    completed += 1
+                    searched_dois.append(doi_str)
+                    if not replaying:
+                        with open(searched_dois_file, 'w') as f:
+                            json.dump(searched_dois, f, indent=4)
+
                 pbar.update(1)
-                
-                # Rate limiting: sleep after every 50 DOIs
-                if (i + 1) % 50 == 0:
-                    print("\nRate limit pause: sleeping for 60 seconds...")
-                    time.sleep(60)
-        
+
+        # Collect in search order rather than completion order so the output doesn't depend on thread timing
+        for doi_str in pending:
+            citations.extend(found.get(doi_str, []))
+
+        if self.cache:
+            print(f"\nSerpAPI cache: {self.cache.hits} searches answered from the cache, {self.cache.misses} misses")
+        if budget.exhausted:
+            print(f"\nSearch quota reached after {budget.used} searches; "
+                  f"{len(pending) - completed} DOIs are left for the next run")
         print(f"\nFound {len(citations)} citations. Processing...")
         
         # Process results
@@ -115,8 +169,17 @@ class GoogleScholar(ReferenceDataSource):
         wait=wait_fixed(1),
         retry=retry_if_exception_type((requests.exceptions.RequestException, requests.exceptions.HTTPError))
     )
-    def _get_scholar(self, doi: str, start_date=None):
-        """Fetch citations from Google Scholar for a given DOI."""
+    def _get_scholar(self, doi: str, start_date=None, budget=None):
+        """Fetch citations from Google Scholar for a given DOI.
+
+        Args:
+            doi: EOS DOI to search for
+            start_date: Optional start date; only publications from its year on are returned
+            budget: Optional RequestBudget every page is taken from
+
+        Returns:
+            List of results, or None if the search failed or the quota ran out
+        """
         try:
             params = {
                 "api_key": self.api_key,
@@ -124,22 +187,32 @@ class GoogleScholar(ReferenceDataSource):
                 "q": doi,
                 "hl": "en",
                 "lr": "lang_en",
-                "as_vis": "1"
+                "as_vis": "1",
+                "num": self.results_per_page
             }
             
             if start_date:
                 params["as_ylo"] = start_date.year
             
-            search = GoogleSearch(params)
             page = 1
             citations = []
             
             while True:
-                search_results = search.get_dict()
+                search_results = self.cache.get(params) if self.cache else None
+                if search_results is None:
+                    if self.cache_only:
+                        return None
+                    if budget and not budget.acquire(wait=not get_transport().replaying):
+                        return None
+                    search_results = self._serpapi_search(params)
+                    if self.cache and self._cacheable(search_results):
+                        self.cache.put(params, search_results)
                 
                 # Check for rate limit error
                 if 'error' in search_results and 'Your account has run out of searches' in search_results['error']:
                     print("\nRate limit reached. Please wait an hour before trying again.")
+                    if budget:
+                        budget.exhaust()
                     return None
                 
                 # Only show errors that aren't "no results" messages
@@ -157,12 +230,8 @@ class GoogleScholar(ReferenceDataSource):
                 if 'serpapi_pagination' not in search_results or 'next' not in search_results['serpapi_pagination']:
                     break
                     
-                search.params_dict.update(dict(parse_qsl(urlsplit(search_results["serpapi_pagination"]["next"]).query)))
+                params.update(dict(parse_qsl(urlsplit(search_results["serpapi_pagination"]["next"]).query)))
                 page += 1
-                
-                # Rate limiting: sleep after every 10 pages
-                if page % 10 == 0:
-                    time.sleep(60)
             
             return citations
             
@@ -171,29 +240,137 @@ class GoogleScholar(ReferenceDataSource):
                 print(f"Error fetching Google Scholar data for {doi}: {e}")
             return None
     
+    def _cacheable(self, search_results):
+        """Check whether a search response is worth caching (results, or a genuine "no results")."""
+        error = search_results.get('error')
+        return not error or error.startswith('Google hasn\'t returned any results')
+
+    def _get_account(self):
+        """Get the SerpAPI account details (searches left, hourly limit), or {} if unavailable."""
+        try:
+            response = get_transport().get(self.account_url, params={"api_key": self.api_key})
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            print(f"Could not check the SerpAPI account: {e}")
+            return {}
+
+    def _search_budget(self):
+        """Build the search budget from the configured rate and the account's quota."""
+        if self.cache_only:
+            return RequestBudget(self.requests_per_hour, burst=self.search_concurrency, limiter='serpapi')
+        account = self._get_account()
+        per_hour = self.requests_per_hour
+        if account.get('account_rate_limit_per_hour'):
+            per_hour = min(per_hour, account['account_rate_limit_per_hour'])
+        searches_left = account.get('total_searches_left', account.get('plan_searches_left'))
+        if self.max_searches:
+            searches_left = self.max_searches if searches_left is None else min(searches_left, self.max_searches)
+        print(f"SerpAPI budget: {per_hour} searches/hour, "
+              f"{'unknown' if searches_left is None else searches_left} searches available")
+        return RequestBudget(per_hour, burst=self.search_concurrency, total=searches_left, limiter='serpapi')
+
+    def _prioritize(self, dois):
+        """Order EOS DOIs by how many Google Scholar citations they had in earlier runs.
+
+        The counts are read from the small per-DOI files written by
+        `save_results`, not from the accumulated outputs.
+
+        Args:
+            dois: EOS DOIs to search
+
+        Returns:
+            The DOIs, most-cited first; DOIs never seen keep their catalog order
+        """
+        counts = {}
+        for path in glob.glob(os.path.join('data', 'google_scholar_counts*.json')):
+            try:
+                with open(path) as f:
+                    saved = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for eos_doi, count in saved.items():
+                counts[eos_doi] = max(count, counts.get(eos_doi, 0))
+        return sorted(dois, key=lambda doi: -counts.get(doi, 0))
+
+    def _save_counts(self, processed_data):
+        """Record how many citations each EOS DOI got in this run, for `_prioritize`.
+
+        Counts of DOIs the run found are replaced; the others are kept.
+        """
+        counts_file = 'data/google_scholar_counts.json'
+        if self.shard:
+            counts_file = f'data/google_scholar_counts_{self.shard.suffix}.json'
+        counts = {}
+        if os.path.exists(counts_file):
+            with open(counts_file) as f:
+                counts = json.load(f)
+        found = {}
+        for record in processed_data:
+            for eos_doi in {ref.get('EOS DOI') for ref in record.get('Cited-References', [])} - {None, ''}:
+                found[eos_doi] = found.get(eos_doi, 0) + 1
+        counts.update(found)
+        temp_file = f'{counts_file}.{os.getpid()}.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(counts, f)
+        os.replace(temp_file, counts_file)
+
+    def _serpapi_search(self, params):
+        """Run a single SerpAPI search through the shared transport.
+        
+        SerpAPI reports errors (including quota errors) in the JSON body, so the
+        body is returned regardless of the HTTP status.
+        """
+        response = get_transport().get(self.serpapi_url, params=params)
+        return response.json()
+    
+    @instrumented
     def _process_urls(self, citations):
-        """Process URLs and extract metadata from citations."""
+        """Process URLs and extract metadata from citations.
+
+        Large result sets are split into chunks parsed on a process pool; the
+        chunks are reassembled in order, so the output matches a serial run.
+        """
+        if self.parse_processes <= 1 or len(citations) <= self.parse_chunk_size:
+            return self._process_chunk(citations, self.exclude_pdf, self.exclude_preprints)
+
         processed = []
+        chunks = batched(citations, self.parse_chunk_size)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.parse_processes) as executor:
+            for chunk in executor.map(GoogleScholar._process_chunk, chunks,
+                                      repeat(self.exclude_pdf), repeat(self.exclude_preprints)):
+                processed.extend(chunk)
+        return processed
+
+    @staticmethod
+    def _process_chunk(citations, exclude_pdf=True, exclude_preprints=True):
+        """Filter organic results and extract their metadata (runs in worker processes)."""
+        kept = []
         
         for citation in citations:
             # Skip if it's a PDF or preprint
-            if self.exclude_pdf and (
+            if exclude_pdf and (
                 citation.get('type') == 'Pdf' or 
                 '.pdf' in citation.get('link', '')
             ):
                 continue
                 
-            if self.exclude_preprints and any(x in citation.get('link', '') for x in [
+            if exclude_preprints and any(x in citation.get('link', '') for x in [
                 'preprint', 'researchsquare.com', 'essopenarchive.org', 
                 'biorxiv.org', 'medrxiv.org', 'authorea.com', 'techrxiv.org'
             ]):
                 continue
-            
+            kept.append(citation)
+
+        # Titles repeat across searches, so they are normalized together
+        titles = normalize_titles(citation.get('title', '') for citation in kept)
+        processed = []
+        for citation, title in zip(kept, titles):
             # Extract metadata
-            title = self._clean_title(citation.get('title', ''))
-            author = self._extract_author(citation)
-            year = self._extract_year(citation)
-            pub_doi = self._extract_doi_from_url(citation.get('link', ''))
+            title = title.replace('...', '')
+            author = GoogleScholar._extract_author(citation)
+            year = GoogleScholar._extract_year(citation)
+            pub_doi = GoogleScholar._extract_doi_from_url(citation.get('link', ''))
             
             processed.append({
                 'result_id': citation['result_id'],
@@ -207,6 +384,7 @@ class GoogleScholar(ReferenceDataSource):
         
         return processed
     
+    @instrumented
     def _get_crossref_metadata(self, citations):
         """Get metadata from Crossref for citations without DOIs."""
         for citation in citations:
@@ -214,7 +392,7 @@ class GoogleScholar(ReferenceDataSource):
                 query = f"{citation['author']} + {citation['year']} + {citation['title']}"
                 query = query.replace('+  +', '+')
                 
-                works = self.works.query(bibliographic=query).select('DOI', 'title', 'published-print', 'issue', 'type')
+                works = self.works.query(bibliographic=query, select=['DOI', 'title', 'published-print', 'issue', 'type'])
                 
                 best_match = None
                 best_score = 0
@@ -240,16 +418,30 @@ class GoogleScholar(ReferenceDataSource):
         
         return citations
     
-    def _match_with_eos(self, citations, eos_dois):
-        """Match citations with EOS data."""
+    @instrumented
+    def _match_with_eos(self, citations, eos_dois, eos_index=None):
+        """Match citations with EOS data.
+
+        Args:
+            citations: Processed citations, each with the EOS DOIs it was found for in 'dois'
+            eos_dois: EOS catalog rows
+            eos_index: Optional prebuilt mapping of EOS DOI to (catalog position, row) pairs
+
+        Returns:
+            Citations that cite at least one catalog row; the rows are shared, not copied
+        """
+        if eos_index is None:
+            eos_index = self._index_eos(eos_dois)
         matched = []
         
         for citation in citations:
-            cited_references = []
-            
-            for eos_doi in eos_dois:
-                if eos_doi['EOS DOI'] in citation['dois']:
-                    cited_references.append(eos_doi)
+            dois = citation['dois']
+            if len(dois) == 1:
+                cited_references = [row for _, row in eos_index.get(dois[0], ())]
+            else:
+                # Several searched DOIs: keep the rows in catalog order
+                rows = [entry for doi in dict.fromkeys(dois) for entry in eos_index.get(doi, ())]
+                cited_references = [row for _, row in sorted(rows, key=lambda entry: entry[0])]
             
             if cited_references:
                 matched.append({
@@ -261,13 +453,22 @@ class GoogleScholar(ReferenceDataSource):
                 })
         
         return matched
+
+    @staticmethod
+    def _index_eos(eos_dois):
+        """Map each EOS DOI to its (catalog position, row) pairs; the catalog may list a DOI more than once."""
+        index = {}
+        for position, row in enumerate(eos_dois):
+            index.setdefault(row['EOS DOI'], []).append((position, row))
+        return index
     
+    @instrumented
     def _combine_duplicates(self, citations):
-        """Combine citations with the same DOI."""
+        """Combine citations with the same DOI (citations without one are combined by title)."""
         doi_to_citation = {}
         
         for citation in citations:
-            doi = citation['DOI']
+            doi = citation['DOI'] or ('', citation['Title'])
             if doi not in doi_to_citation:
                 doi_to_citation[doi] = citation
             else:
@@ -283,76 +484,40 @@ class GoogleScholar(ReferenceDataSource):
         
         return list(doi_to_citation.values())
     
-    def _clean_title(self, title):
+    @staticmethod
+    def _clean_title(title):
         """Clean and normalize a title."""
-        title = BeautifulSoup(unescape(title), 'lxml').text
-        title = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
-        return title.replace('...', '')
+        return normalize_title(title).replace('...', '')
     
-    def _extract_author(self, citation):
+    @staticmethod
+    def _extract_author(citation):
         """Extract author name from citation."""
         try:
             return citation['authors'][0]['name']
         except:
             try:
-                pub_info = BeautifulSoup(unescape(citation['publication_info']['summary']), 'lxml').text
+                pub_info = strip_markup(citation['publication_info']['summary'])
                 match = re.match(r'^((?:\S+\s+){1}[^\r\n\t\f\v ,]+).*', pub_info)
                 return match.group(1) if match else ''
             except:
                 return ''
     
-    def _extract_year(self, citation):
+    @staticmethod
+    def _extract_year(citation):
         """Extract year from citation."""
         try:
-            pub_info = BeautifulSoup(unescape(citation['publication_info']['summary']), 'lxml').text
+            pub_info = strip_markup(citation['publication_info']['summary'])
             match = re.search(r'\s+(\d{4})\s+', pub_info)
             return f"({match.group(1)})" if match else ''
         except:
             return ''
     
-    def _extract_doi_from_url(self, url):
+    @staticmethod
+    def _extract_doi_from_url(url):
         """Extract DOI from various URL formats."""
-        if not url:
-            return ''
-            
-        # Direct DOI in URL
-        match = re.search(r'\/(10\.\d+.*)$', url)
-        if match:
-            doi = match.group(1)
-            return re.sub(r'(\/full|\/meta|\.pdf|\.abstract|\.short|\&.*|\/download|\/html|\?.*|\#.*|\;|\)|\/$|\.$)', '', doi)
-        
-        # Copernicus
-        if 'copernicus.org' in url:
-            match = re.search(r'\//(\S+)\.copernicus\.org\/articles\/(\d+)\/(\d+)\/(\d+)', url)
-            if match:
-                return f"10.5194/{match.group(1)}-{match.group(2)}-{match.group(3)}-{match.group(4)}"
-        
-        # Nature
-        if 'nature.com/articles/' in url:
-            match = re.search(r'nature\.com\/articles\/(\S+)', url)
-            if match:
-                doi = f"10.1038/{match.group(1)}"
-                doi = re.sub(r'(\?.*|\/briefing.*)', '', doi)
-                doi = re.sub(r'%E2%80%', '-', doi)
-                match = re.match(r'10.1038\/sdata(\d{4})(\d+)', doi)
-                if match:
-                    return f"10.1038/sdata.{match.group(1)}.{match.group(2)}"
-                return doi
-        
-        # AMS
-        if 'journals.ametsoc.org' in url:
-            match = re.search(r'\/((\w+|\.+|\-+|_+)*)\.xml', url)
-            if match:
-                doi = f"10.1175/{match.group(1)}"
-                doi = re.sub(r'_1', '.1', doi)
-                if not '-' in doi:
-                    match = re.match(r'10.1175\/(\w+)(d|D)(\d{2})(\d{4})', doi)
-                    if match:
-                        return f"10.1175/{match.group(1)}-{match.group(2)}-{match.group(3)}-{match.group(4)}.1"
-                return doi
-        
-        return ''
+        return extract_doi(url)
     
+    @instrumented
     def process_results(self, raw_data):
         """Process the raw data to match with EOS data."""
         # Filter out bad types
@@ -362,10 +527,15 @@ class GoogleScholar(ReferenceDataSource):
                 processed_data.append(citation)
         return processed_data
     
+    @instrumented
     def save_results(self, processed_data, output_path):
         """Save the processed data to a JSON file."""
-        os.makedirs('data', exist_ok=True)
+        # Bare filenames go into data/, explicit paths (e.g. shard partials) are kept
+        if not os.path.dirname(output_path):
+            output_path = os.path.join('data', output_path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        output_path = os.path.join('data', os.path.basename(output_path))
         with open(output_path, 'w') as f:
-            json.dump(processed_data, f, indent=4) 
\ No newline at end of file
+            json.dump(processed_data, f, indent=4)
+        self._save_counts(processed_data)
+        return output_path 
\ No newline at end of file
@@ -1,7 +1,10 @@
 import re
+import time
 from datetime import datetime
 from .base import ReferenceDataSource
 from ..config import config
+from ..metrics import instrumented
+from ..transport import get_transport, rate_limit_sleep
 import json
 from elsapy.elsclient import ElsClient
 from elsapy.elssearch import ElsSearch
@@ -11,11 +14,54 @@ import requests.exceptions
 from tqdm import tqdm
 
 
+class ScopusClient(ElsClient):
+    """ElsClient that sends its requests through the shared pooled transport.
+
+    Requests for api.elsevier.com are redirected to the configured `elsevier`
+    endpoint so that searches can run against the local stub server. Like
+    ElsClient, requests are spaced at least `[scopus] min_request_interval`
+    seconds apart (one per second by default) to stay within the API key's
+    rate limit.
+    """
+
+    elsevier_url = 'https://api.elsevier.com'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.min_request_interval = config.data.get('scopus', {}).get('min_request_interval', 1.0)
+        self._last_request = None
+
+    def exec_request(self, URL):
+        """Send the request; returns the decoded JSON response."""
+        if self._last_request is not None:
+            wait = self.min_request_interval - (time.monotonic() - self._last_request)
+            if wait > 0:
+                rate_limit_sleep('elsevier', wait)
+        self._last_request = time.monotonic()
+        URL = URL.replace(self.elsevier_url, config.get_endpoint('elsevier'), 1)
+        headers = {
+            "X-ELS-APIKey": self.api_key,
+            "Accept": 'application/json'
+        }
+        if self.inst_token:
+            headers["X-ELS-Insttoken"] = self.inst_token
+        response = get_transport().get(URL, headers=headers)
+        self._status_code = response.status_code
+        if response.status_code == 200:
+            self._status_msg = 'data retrieved'
+            return response.json()
+        self._status_msg = f"HTTP {response.status_code} Error from {URL}: {response.text}"
+        raise requests.exceptions.HTTPError(self._status_msg)
+
+
 class Scopus(ReferenceDataSource):
-    def __init__(self):
+    def __init__(self, shard=None):
         super().__init__()
+        self.shard = shard
         self.scopus_api_key = config.get('api', {}).get('scopus_api_key')
+        self.client = ScopusClient(self.scopus_api_key)
 
+    @instrumented
     def fetch_citations(self, dois, start_date=None, end_date=None):
         """Fetch citations from Scopus."""
         if not self.scopus_api_key:
@@ -23,6 +69,8 @@ class Scopus(ReferenceDataSource):
         
         eos_dois = eosutil.getEOSCSV()  # Load EOS DOIs from CSV
         eos_dois = eosutil.getAcronyms(eos_dois)  # Process DOIs
+        if self.shard:
+            eos_dois = self.shard.select(eos_dois)
         citations = []
 
         with tqdm(eos_dois, desc="Fetching Scopus citations") as pbar:
@@ -32,14 +80,17 @@ class Scopus(ReferenceDataSource):
                 citations.extend(results)
         return citations
 
+    @instrumented
     def process_results(self, raw_data):
         """Process the raw data to match with EOS data."""
         return self._match_scopus_eos(raw_data)
 
+    @instrumented
     def save_results(self, processed_data, output_path):
         """Save the processed data to a JSON file."""
         with open(output_path, 'w') as f:
             json.dump(processed_data, f, indent=4)
+        return output_path
 
     def get_source_name(self):
         """Return the name of the source."""
@@ -54,11 +105,11 @@ class Scopus(ReferenceDataSource):
         """Fetch Scopus citations for a given term."""
         term = f'"{term}"'
         term = term.split('(', 1)[0]  # for ORNLS that have parenthesis in the doi name
-        client = ElsClient(self.scopus_api_key)
         doc_srch = ElsSearch(term, 'scopus')
-        doc_srch.execute(client, get_all=True)
+        doc_srch.execute(self.client, get_all=True)
         return doc_srch.results
 
+    @instrumented
     def _match_scopus_eos(self, eos_dois):
         """Match Scopus citations with EOS data."""
         full_scopus = []
@@ -101,7 +152,7 @@ class Scopus(ReferenceDataSource):
         # create unique list of scopus DOIs
         unique = set()
         for doi in full_scopus:
-            unique.add(tuple(doi.items()))
+            unique.add(tuple((k, v) for k, v in doi.items() if k != 'Cited-References'))
         unique_list = []
         for u in unique:
             unique_list.append(dict(u))
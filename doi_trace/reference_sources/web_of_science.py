@@ -1,18 +1,28 @@
 import os
 import re
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 import pandas as pd
 
-from .base import ReferenceDataSource
+from .base import ReferenceDataSource, batched
+from ..doi_scanner import OCR_VARIANTS, DOIScanner
+from ..metrics import instrumented, metrics
+
+
+# Lines starting a BibTeX entry that `_parse_bibtex_entries` keeps (after cleaning)
+ENTRY_STARTS = ('@article', '@inproceedings', '@incollection')
 
 
 class WebOfScience(ReferenceDataSource):
     """Web of Science data source implementation.
     
     This class handles fetching and processing citation data from Web of Science
-    BibTeX files.
+    BibTeX files. It supports streaming: `iter_citations` reads the exports
+    a batch of entries at a time, so peak memory no longer grows with the
+    size of the exports.
     """
+
+    stream_batch_size = 1000  # BibTeX entries held in memory at a time when streaming
     
     def __init__(self, wos_dir: str = "WoS", eosdis_csv_dir: str = "eosdis_csv_files"):
         """Initialize the Web of Science data source.
@@ -24,6 +34,9 @@ class WebOfScience(ReferenceDataSource):
         self.wos_dir = Path(wos_dir)
         self.eosdis_csv_dir = Path(eosdis_csv_dir)
         self.prefixes = ["10.5067", "10.7927", "10.3334"]
+        # EOS-prefix DOIs the catalog scanner doesn't know, up to the end of the cited reference
+        self._unknown_doi = re.compile('((?:' + '|'.join(map(re.escape, self.prefixes)) + r').*?)(?:,|])')
+        self._scanner = None
     
     def get_source_name(self) -> str:
         """Get the name of the data source.
@@ -33,6 +46,7 @@ class WebOfScience(ReferenceDataSource):
         """
         return "Web of Science"
     
+    @instrumented
     def fetch_citations(self, dois: List[str], start_date: Optional[str] = None, 
                        end_date: Optional[str] = None) -> Dict[str, Any]:
         """Fetch citations from Web of Science BibTeX files.
@@ -71,6 +85,75 @@ class WebOfScience(ReferenceDataSource):
             }
         }
     
+    def iter_citations(self, dois: List[str], start_date: Optional[str] = None,
+                       end_date: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream parsed entries from the Web of Science BibTeX files.
+
+        Args:
+            dois: List of DOIs to search for citations
+            start_date: Optional start date for the search (format: YYYY-MM-DD)
+            end_date: Optional end date for the search (format: YYYY-MM-DD)
+
+        Yields:
+            Parsed BibTeX entries
+        """
+        wos_files = [f for f in self.wos_dir.glob("*.bib")]
+        if not wos_files:
+            raise FileNotFoundError(f"No BibTeX files found in {self.wos_dir}")
+
+        for wos_file in wos_files:
+            print(f"Processing {wos_file.name}")
+            for chunk in self._read_bibtex_chunks(wos_file):
+                yield from self._parse_bibtex_entries(self._clean_bibtex_data(chunk))
+
+    def process_stream(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Deduplicate, validate and match streamed entries, a batch at a time.
+
+        Invalid entries are counted (metrics counter `wos_invalid_entries`)
+        rather than kept, since only the valid ones are saved.
+
+        Args:
+            records: Parsed entries from `iter_citations`
+
+        Yields:
+            Entries matched to EOSDIS data
+        """
+        eosdis_data = self._get_eosdis_data()
+        valid_dois = {d['EOS DOI'] for d in eosdis_data}
+        eosdis_map = {d['EOS DOI']: d for d in eosdis_data}
+        seen_wos = set()
+        for batch in batched(records, self.stream_batch_size):
+            unique_entries = self._remove_duplicates(batch, seen_wos)
+            valid_entries, invalid_entries = self._validate_dois(unique_entries, eosdis_data, valid_dois)
+            metrics.count('wos_invalid_entries', len(invalid_entries))
+            yield from self._match_to_eosdis(valid_entries, eosdis_data, eosdis_map)
+
+    def _read_bibtex_chunks(self, path: Path) -> Iterator[str]:
+        """Read a BibTeX file in chunks of whole entries.
+
+        Chunks always start at an entry, so cleaning and parsing a chunk gives
+        the same entries as cleaning and parsing the whole file.
+
+        Args:
+            path: BibTeX file
+
+        Yields:
+            Chunks of at most `stream_batch_size` entries
+        """
+        lines = []
+        entries = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith(ENTRY_STARTS):
+                    if entries >= self.stream_batch_size:
+                        yield ''.join(lines)
+                        lines, entries = [], 0
+                    entries += 1
+                lines.append(line)
+        if lines:
+            yield ''.join(lines)
+
+    @instrumented
     def process_results(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process the raw Web of Science data into a standardized format.
         
@@ -96,12 +179,16 @@ class WebOfScience(ReferenceDataSource):
             }
         }
     
-    def save_results(self, processed_data: Dict[str, Any], output_path: Path) -> None:
+    @instrumented
+    def save_results(self, processed_data: Dict[str, Any], output_path: Path) -> Path:
         """Save the processed results to a JSON file.
         
         Args:
             processed_data: Processed data to save
             output_path: Path to save the results to
+            
+        Returns:
+            Path the results were written to
         """
         # Convert to DataFrame for easier handling
         df = pd.DataFrame(processed_data["valid_entries"])
@@ -109,7 +196,9 @@ class WebOfScience(ReferenceDataSource):
         # Save to JSON
         output_path.parent.mkdir(parents=True, exist_ok=True)
         df.to_json(output_path, orient="records", indent=2)
+        return output_path
     
+    @instrumented
     def _clean_bibtex_data(self, data: str) -> str:
         """Clean up BibTeX data by replacing problematic characters and formats.
         
@@ -126,72 +215,8 @@ class WebOfScience(ReferenceDataSource):
             '%2D': '-',
             '%2B': '+',
             '%5F': '_',
-            'M0D': 'MOD',
             '(Terra)': '',
-            '0BBHQ5W22HME': 'OBBHQ5W22HME',
-            '2XX6ZY3DUGNQ': '2XXGZY3DUGNQ',
-            '3420HQM9AK6Q': '342OHQM9AK6Q',
-            '3MJC62': '3MJC6',
-            '3RQ5YS674DG': '3RQ5YS674DGQ',
-            '6116VW8LLWJ7': '6II6VW8LLWJ7',
-            '6J5LHH0HZHN4': '6J5LHHOHZHN4',
-            '7MCPBJ41YOK6': '7MCPBJ41Y0K6',
-            '7Q8HCCWS410R': '7Q8HCCWS4I0R',
-            '8GQ8LZQVLOVL': '8GQ8LZQVL0VL',
-            '9EBR2T0VXUFG': '9EBR2T0VXUDG',
-            '9EBR2TOVXUDG': '9EBR2T0VXUDG',
-            'AOPMUXXVUYNH': 'A0PMUXXVUYNH',
-            'AD7B-0HQNSJ29': 'AD7B0HQNSJ29',
-            'AJMZ0503TGUR': 'AJMZO5O3TGUR',
-            'C98E2L0ZTWO': 'C98E2L0ZTWO4',
-            'CRY0SPHERE': 'CRYOSPHERE',
-            'CYGNSL1X20': 'CYGNS-L1X20',
-            'D7GK8F5J8M8': 'D7GK8F5J8M8R',
-            'D7GK8F5J8M8RR': 'D7GK8F5J8M8R',
-            'FCCZIIFRPZ30': 'FCCZIIFRPZ3O',
-            'FQPTQ40J22TL': 'FQPTQ4OJ22TL',
-            'G0ZCARDS': 'GOZCARDS',
-            'GDQOCUCVTE2Q': 'GDQ0CUCVTE2Q',
-            'GESAD/GESAD': 'GFSAD/GFSAD',
-            'GRSAD/GRSAD': 'GFSAD/GFSAD',
-            'NEW-TOCOKVZHF': 'NEWTOCOKVZHF',
-            'NPZYNEEGQUO': 'NPZYNEEUGQUO',
-            '04HAQJEWWUU8': 'O4HAQJEWWUU8',
-            '057VAIT2AYYY': 'O57VAIT2AYYY',
-            '0C7B04ZM9G6Q': 'OBBHQ5W22HME',
-            '0MGEV': 'OMGEV',
-            'OFTBVIEW': 'ORBVIEW',
-            '0RBVIEW': 'ORBVIEW',
-            '0SCT2-L2BV2': 'OSCT2-L2BV2',
-            'LOU3HJDS97300': 'OU3HJDS973O0',
-            'Q0310G10G1XULZS': 'Q0310G1XULZS',
-            'Q5GVUVUIVG07': 'Q5GVUVUIVGO7',
-            'SEAVVIFS': 'SEAWIFS',
-            'SEAWIF-S': 'SEAWIFS',
-            'SEAWIFSOC': 'SEAWIFS_OC',
-            'SEAWIFS_0C': 'SEAWIFS_OC',
-            'SMAP20': 'SMP20',
-            'SYN1DEG3H0UR': 'SYN1DEG3HOUR',
-            'TEMSC2LCR5': 'TEMSC-2LCR5',
-            'TERRA1AQUA': 'TERRA+AQUA',
-            'TERRATHORN+AQUA': 'TERRA+AQUA',
-            'TRMM/TMPAOH-E/7': 'TRMM/TMPA/3H/7',
-            'UBKO5ZUI715V': 'UBKO5ZUI7I5V',
-            'VFMSTANDARD': 'VFM-STANDARD',
-            'VJAPPLI1CSIV': 'VJAFPLI1CSIV',
-            'L3CLOUDOCCURRENCE': 'L3_CLOUD_OCCURRENCE',
-            'LIS-0TD': 'LIS-OTD',
-            'MODO8': 'MOD08',
-            'MODO9GA006': 'MODO9GA.006',
-            'MODI3': 'MOD13',
-            'MOD15A2.006': 'MOD15A2H.006',
-            'MOD17A3.006': 'MOD17A3H.006',
-            'MQD35': 'MOD35',
-            'MODATML2.06': 'MODATML2.006',
-            'MODIS?L3B': 'MODIS/L3B',
-            'MYD06_GL2': 'MYD06_L2',
-            'MYD08-M3': 'MYD08_M3',
-            'MODO9': 'MOD09'
+            **OCR_VARIANTS
         }
         
         for old, new in replacements.items():
@@ -199,6 +224,7 @@ class WebOfScience(ReferenceDataSource):
         
         return data
     
+    @instrumented
     def _parse_bibtex_entries(self, data: str) -> List[Dict[str, Any]]:
         """Parse BibTeX entries into a list of dictionaries.
         
@@ -208,6 +234,7 @@ class WebOfScience(ReferenceDataSource):
         Returns:
             List of parsed entries
         """
+        scanner = self._get_scanner()
         entries = []
         data_entries = data.split('@article')[1:]  # Skip the first empty entry
         
@@ -265,15 +292,22 @@ class WebOfScience(ReferenceDataSource):
                 if author_match := re.search(r'Author = (.*)', line):
                     entry_dict['author'] = author_match.group(1).split(' and')[0]
                 
-                # Extract cited references
-                for prefix in self.prefixes:
-                    sub_prefix = prefix.split('10.', 1)[1]
-                    if ref_match := re.search(f'(10\.{sub_prefix}.*?)(,|])', line):
-                        ref = ref_match.group(1).strip()
-                        ref = re.sub(r'(\s+|DOI|\\|}|\)|]|)', '', ref)
-                        ref = re.sub(r'\.$', '', ref)
-                        if ref.upper() not in entry_dict['cited_references']:
-                            entry_dict['cited_references'].append(ref.upper())
+                # Extract cited references: every EOS DOI on the line, in one pass
+                unmatched = []
+                last = 0
+                for start, end, ref in scanner.finditer(line):
+                    if ref not in entry_dict['cited_references']:
+                        entry_dict['cited_references'].append(ref)
+                    unmatched.append(line[last:start])
+                    last = end
+                unmatched.append(line[last:])
+                # EOS-prefix DOIs outside the catalog (e.g. new misreadings) are kept so that
+                # _validate_dois reports them as invalid references
+                for ref_match in self._unknown_doi.finditer(', '.join(unmatched)):
+                    ref = re.sub(r'(\s+|DOI|\\|}|\)|])', '', ref_match.group(1))
+                    ref = re.sub(r'\.$', '', ref).upper()
+                    if ref and ref not in entry_dict['cited_references']:
+                        entry_dict['cited_references'].append(ref)
             
             # Use early access date as year if year is missing
             if not entry_dict['year'] and entry_dict['early_access_date']:
@@ -283,16 +317,29 @@ class WebOfScience(ReferenceDataSource):
         
         return entries
     
-    def _remove_duplicates(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _get_scanner(self) -> DOIScanner:
+        """Get the scanner for EOS DOIs in cited references, built from the EOSDIS CSV files on first use.
+
+        Returns:
+            Scanner over every DOI of the catalog (and its known OCR misreadings)
+        """
+        if self._scanner is None:
+            self._scanner = DOIScanner(d['EOS DOI'] for d in self._get_eosdis_data())
+        return self._scanner
+
+    @instrumented
+    def _remove_duplicates(self, entries: List[Dict[str, Any]], seen_wos: Optional[set] = None) -> List[Dict[str, Any]]:
         """Remove duplicate entries based on WOS ID.
         
         Args:
             entries: List of entries to deduplicate
+            seen_wos: WOS IDs already seen (kept across batches when streaming)
             
         Returns:
             Deduplicated list of entries
         """
-        seen_wos = set()
+        if seen_wos is None:
+            seen_wos = set()
         unique_entries = []
         
         for entry in entries:
@@ -302,6 +349,7 @@ class WebOfScience(ReferenceDataSource):
         
         return unique_entries
     
+    @instrumented
     def _get_eosdis_data(self) -> List[Dict[str, Any]]:
         """Get EOSDIS data from CSV files.
         
@@ -338,17 +386,21 @@ class WebOfScience(ReferenceDataSource):
         df_all['EOS DOI'] = df_all['EOS DOI'].str.upper()
         return df_all.to_dict('records')
     
-    def _validate_dois(self, entries: List[Dict[str, Any]], eosdis_data: List[Dict[str, Any]]) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    @instrumented
+    def _validate_dois(self, entries: List[Dict[str, Any]], eosdis_data: List[Dict[str, Any]],
+                       valid_dois: Optional[set] = None) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         """Validate DOIs against EOSDIS data.
         
         Args:
             entries: List of entries to validate
             eosdis_data: List of EOSDIS entries
+            valid_dois: Optional prebuilt set of EOSDIS DOIs (reused across batches when streaming)
             
         Returns:
             Tuple of (valid entries, invalid entries)
         """
-        valid_dois = {d['EOS DOI'] for d in eosdis_data}
+        if valid_dois is None:
+            valid_dois = {d['EOS DOI'] for d in eosdis_data}
         valid_entries = []
         invalid_entries = []
         
@@ -372,18 +424,22 @@ class WebOfScience(ReferenceDataSource):
         
         return valid_entries, invalid_entries
     
-    def _match_to_eosdis(self, entries: List[Dict[str, Any]], eosdis_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    @instrumented
+    def _match_to_eosdis(self, entries: List[Dict[str, Any]], eosdis_data: List[Dict[str, Any]],
+                         eosdis_map: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """Match entries to EOSDIS data.
         
         Args:
             entries: List of entries to match
             eosdis_data: List of EOSDIS entries
+            eosdis_map: Optional prebuilt mapping of DOIs to EOSDIS data (reused across batches when streaming)
             
         Returns:
             List of matched entries
         """
         # Create a mapping of DOIs to EOSDIS data
-        eosdis_map = {d['EOS DOI']: d for d in eosdis_data}
+        if eosdis_map is None:
+            eosdis_map = {d['EOS DOI']: d for d in eosdis_data}
         
         for entry in entries:
             entry['eosdis_matches'] = []
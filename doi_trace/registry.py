@@ -0,0 +1,77 @@
+from importlib import import_module
+from importlib.metadata import entry_points
+from typing import Dict, Type
+
+"""
+Registry of reference data sources.
+
+Sources are registered as "module:Class" strings and only imported when they
+are used, so that commands which don't touch a source (including `--help`)
+don't pay for pandas, bs4, elsapy and the other heavy imports the sources pull in.
+
+Third-party packages can add sources through the `doi_trace.sources` entry point
+group; the entry point name becomes the CLI subcommand and its value must point at
+a `ReferenceDataSource` subclass, e.g. in pyproject.toml:
+
+    [project.entry-points."doi_trace.sources"]
+    my-source = "my_package.sources:MySource"
+"""
+
+ENTRY_POINT_GROUP = 'doi_trace.sources'
+
+BUILTIN_SOURCES = {
+    'wos': 'doi_trace.reference_sources.web_of_science:WebOfScience',
+    'scopus': 'doi_trace.reference_sources.scopus:Scopus',
+    'crossref': 'doi_trace.reference_sources.crossref:Crossref',
+    'datacite': 'doi_trace.reference_sources.datacite:DataCite',
+    'google-scholar': 'doi_trace.reference_sources.google_scholar:GoogleScholar',
+}
+
+_plugins = None
+
+
+def plugin_sources() -> Dict[str, str]:
+    """Get the sources registered by other packages through entry points.
+
+    Entry points are read from package metadata without importing anything;
+    built-in names cannot be overridden.
+
+    Returns:
+        Mapping of source name to "module:Class"
+    """
+    global _plugins
+    if _plugins is None:
+        _plugins = {
+            entry_point.name: entry_point.value
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP)
+            if entry_point.name not in BUILTIN_SOURCES
+        }
+    return _plugins
+
+
+def available_sources() -> Dict[str, str]:
+    """Get every registered source, built-in ones first.
+
+    Returns:
+        Mapping of source name to "module:Class"
+    """
+    return {**BUILTIN_SOURCES, **plugin_sources()}
+
+
+def load_source(name: str) -> Type:
+    """Import and return the class of a registered source.
+
+    Args:
+        name: Source name (e.g. 'datacite')
+
+    Returns:
+        The source class
+
+    Raises:
+        KeyError: If no source is registered under that name
+    """
+    sources = available_sources()
+    if name not in sources:
+        raise KeyError(f"Unknown source {name!r}, expected one of {', '.join(sources)}")
+    module_name, _, attribute = sources[name].partition(':')
+    return getattr(import_module(module_name), attribute)
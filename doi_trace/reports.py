@@ -0,0 +1,228 @@
+import json
+import sqlite3
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from .diff import publication_key
+from .linkage import parse_year
+from .records import canonical_doi
+
+
+SCHEMA = """
+-- Every table is kept per scope: the sorted, comma-separated sources a combine covered (see `scope`)
+
+-- What each reported publication adds to the counts, so an update only touches the ones that changed
+CREATE TABLE IF NOT EXISTS contributions (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    contribution TEXT NOT NULL,  -- JSON [year, [EOS DOIs], [agencies]]
+    PRIMARY KEY (scope, key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS dataset_counts (
+    scope TEXT NOT NULL, eos_doi TEXT NOT NULL, publications INTEGER NOT NULL, PRIMARY KEY (scope, eos_doi)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daac_counts (
+    scope TEXT NOT NULL, agency TEXT NOT NULL, publications INTEGER NOT NULL, PRIMARY KEY (scope, agency)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS year_counts (
+    scope TEXT NOT NULL, year INTEGER NOT NULL, publications INTEGER NOT NULL, PRIMARY KEY (scope, year)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS updates (
+    id INTEGER PRIMARY KEY,
+    created TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    origin TEXT,
+    publications INTEGER NOT NULL,
+    changed INTEGER NOT NULL,
+    removed INTEGER NOT NULL
+);
+"""
+
+# Report name -> (table, key column)
+TABLES = {
+    'datasets': ('dataset_counts', 'eos_doi'),
+    'daacs': ('daac_counts', 'agency'),
+    'years': ('year_counts', 'year')
+}
+
+
+def scope(sources: Iterable[str]) -> str:
+    """Name the counts of a set of sources: their sorted output names ('google-scholar' is google_scholar)."""
+    return ','.join(sorted({source.replace('-', '_') for source in sources}))
+
+
+def record_sources(records: Iterable[Dict[str, Any]]) -> List[str]:
+    """Get the sources named by the 'db:' tags of combined records."""
+    sources = set()
+    for record in records:
+        sources.update(tag['tag'][3:] for tag in record.get('tags', []) if str(tag.get('tag')).startswith('db:'))
+    return sorted(sources)
+
+
+def contribution(record: Dict[str, Any]) -> List[Any]:
+    """Get what a combined record adds to the counts.
+
+    Returns:
+        [year or None, sorted distinct EOS DOIs, sorted distinct agencies]
+    """
+    datasets = set()
+    agencies = set()
+    for ref in record.get('Cited-References') or record.get('eosdis_matches') or []:
+        doi = canonical_doi(ref.get('EOS DOI'))
+        if doi:
+            datasets.add(doi)
+        agency = ref.get('LP Agency')
+        # Catalog fields read through pandas may be NaN floats
+        if isinstance(agency, str) and agency:
+            agencies.add(agency)
+    return [parse_year(record.get('Year', record.get('year'))), sorted(datasets), sorted(agencies)]
+
+
+class CitationReports:
+    """Materialized citation counts per EOS DOI, per DAAC and per year.
+
+    Each count is the number of distinct publications citing the dataset,
+    citing any dataset of the DAAC, or published in the year (publications
+    without a year are left out of the year counts). The contribution of
+    every publication is stored alongside, so an update subtracts and adds
+    only the publications that changed instead of recounting everything.
+
+    Counts are kept per scope, the set of sources combined, so combining a
+    subset of the sources neither overwrites nor subtracts from the counts
+    of a combine of all of them.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        """Open (or create) the report database.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=60)
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def __enter__(self) -> 'CitationReports':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def update(self, records: Iterable[Dict[str, Any]], sources: Iterable[str], complete: bool = True,
+               origin: Optional[str] = None) -> Dict[str, int]:
+        """Bring the counts of a scope up to date with combined records.
+
+        Args:
+            records: Combined records (or source outputs)
+            sources: Sources the records were combined from; their counts are updated
+            complete: The records are the whole current state of these sources, so publications
+                of the scope missing from them are removed; otherwise they are merged into it
+            origin: What the records came from, recorded with the update (e.g. the output file)
+
+        Returns:
+            Number of publications read, changed (new ones included) and removed
+        """
+        selected = scope(sources)
+        current = {}
+        for record in records:
+            key = publication_key(record)
+            year, datasets, agencies = contribution(record)
+            if key in current:
+                # The same DOI-less title twice: count the publication once
+                previous = json.loads(current[key])
+                year = year if year is not None else previous[0]
+                datasets = sorted(set(datasets) | set(previous[1]))
+                agencies = sorted(set(agencies) | set(previous[2]))
+            current[key] = json.dumps([year, datasets, agencies])
+
+        stored = dict(self.connection.execute(
+            'SELECT key, contribution FROM contributions WHERE scope = ?', (selected,)))
+        deltas = {table: Counter() for table in TABLES}
+        changed = []
+        for key, value in current.items():
+            previous = stored.pop(key, None)
+            if previous == value:
+                continue
+            if previous is not None:
+                self._count(deltas, previous, -1)
+            self._count(deltas, value, 1)
+            changed.append((key, value))
+        removed = list(stored.items()) if complete else []
+        for _, previous in removed:
+            self._count(deltas, previous, -1)
+
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO contributions (scope, key, contribution) VALUES (?, ?, ?) '
+                'ON CONFLICT (scope, key) DO UPDATE SET contribution = excluded.contribution',
+                ((selected, key, value) for key, value in changed))
+            self.connection.executemany('DELETE FROM contributions WHERE scope = ? AND key = ?',
+                                        ((selected, key) for key, _ in removed))
+            for report, (table, column) in TABLES.items():
+                self.connection.executemany(
+                    f'INSERT INTO {table} (scope, {column}, publications) VALUES (?, ?, ?) '
+                    f'ON CONFLICT (scope, {column}) DO UPDATE SET publications = publications + excluded.publications',
+                    ((selected, value, delta) for value, delta in deltas[report].items() if delta))
+                self.connection.execute(f'DELETE FROM {table} WHERE scope = ? AND publications <= 0', (selected,))
+            self.connection.execute(
+                'INSERT INTO updates (created, scope, origin, publications, changed, removed) VALUES (?, ?, ?, ?, ?, ?)',
+                (datetime.now().isoformat(timespec='seconds'), selected, origin,
+                 len(current), len(changed), len(removed)))
+        return {'publications': len(current), 'changed': len(changed), 'removed': len(removed)}
+
+    @staticmethod
+    def _count(deltas: Dict[str, Counter], value: str, sign: int) -> None:
+        year, datasets, agencies = json.loads(value)
+        if year is not None:
+            deltas['years'][year] += sign
+        for doi in datasets:
+            deltas['datasets'][doi] += sign
+        for agency in agencies:
+            deltas['daacs'][agency] += sign
+
+    def scopes(self) -> List[str]:
+        """Get the scopes with counts, most recently updated first."""
+        rows = self.connection.execute('SELECT scope FROM updates GROUP BY scope ORDER BY max(id) DESC')
+        return [row[0] for row in rows]
+
+    def table(self, name: str, sources: Optional[Iterable[str]] = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Read a report.
+
+        Args:
+            name: 'datasets', 'daacs' or 'years'
+            sources: Sources of the scope to read (defaults to the most recently updated scope)
+            limit: Maximum number of rows
+
+        Returns:
+            Rows ordered by count (years in order), e.g. {'eos_doi': ..., 'publications': ...}
+        """
+        table, column = TABLES[name]
+        if sources is not None:
+            selected = scope(sources)
+        else:
+            update = self.last_update()
+            selected = update['scope'] if update else ''
+        order = column if name == 'years' else f'publications DESC, {column}'
+        sql = f'SELECT {column}, publications FROM {table} WHERE scope = ? ORDER BY {order}'
+        params = [selected]
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [{column: value, 'publications': count} for value, count in self.connection.execute(sql, params)]
+
+    def last_update(self) -> Optional[Dict[str, Any]]:
+        """Get the most recent update, if any."""
+        row = self.connection.execute(
+            'SELECT created, scope, origin, publications, changed, removed FROM updates ORDER BY id DESC LIMIT 1'
+        ).fetchone()
+        return dict(zip(('created', 'scope', 'origin', 'publications', 'changed', 'removed'), row)) if row else None
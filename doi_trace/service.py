@@ -0,0 +1,290 @@
+import csv
+import glob
+import json
+import os
+import socketserver
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from .doi_scanner import DOIScanner
+from .layout import load_combined
+from .linkage import parse_year
+from .records import canonical_doi
+
+
+# Crossref records kept in memory by /works
+WORKS_CACHE_SIZE = 10000
+
+
+def load_catalog(eosdis_dir: Union[str, Path]) -> Dict[str, Dict[str, Any]]:
+    """Read the EOS catalog CSV files into an index by EOS DOI.
+
+    Args:
+        eosdis_dir: Directory of catalog CSV files
+
+    Returns:
+        {'EOS DOI', 'LP Agency', 'Shortname'} rows by canonical EOS DOI
+    """
+    catalog = {}
+    for file in sorted(Path(eosdis_dir).glob('*.csv')):
+        with open(file, encoding='unicode_escape', newline='') as f:
+            for row in csv.DictReader(f):
+                doi = canonical_doi(row.get('DOI_NAME'))
+                if doi:
+                    catalog.setdefault(doi, {
+                        'EOS DOI': row['DOI_NAME'],
+                        'LP Agency': row.get('LP_AGENCY') or None,
+                        'Shortname': row.get('SPECIAL') or None
+                    })
+    return catalog
+
+
+def latest_combined(directory: Union[str, Path]) -> Optional[Path]:
+    """Find the newest combined output (either layout) in a directory."""
+    files = glob.glob(str(Path(directory) / 'combined_citations_*.json'))
+    return Path(max(files, key=os.path.getmtime)) if files else None
+
+
+class CitationIndex:
+    """Combined citations indexed by publication DOI, cited EOS DOI, DAAC and year."""
+
+    def __init__(self, records: List[Dict[str, Any]], path: Optional[Path] = None) -> None:
+        """Index combined records.
+
+        Args:
+            records: Combined records in the nested layout
+            path: File the records were read from
+        """
+        self.records = records
+        self.path = path
+        self.loaded = time.time()
+        self.by_doi: Dict[str, int] = {}
+        self.by_dataset: Dict[str, List[int]] = {}
+        self.by_agency: Dict[str, List[int]] = {}
+        self.by_year: Dict[int, List[int]] = {}
+        for position, record in enumerate(records):
+            doi = canonical_doi(record.get('DOI'))
+            if doi:
+                self.by_doi.setdefault(doi, position)
+            year = parse_year(record.get('Year'))
+            if year is not None:
+                self.by_year.setdefault(year, []).append(position)
+            datasets = {canonical_doi(ref.get('EOS DOI')) for ref in record.get('Cited-References', [])}
+            agencies = {ref['LP Agency'].lower() for ref in record.get('Cited-References', [])
+                        if isinstance(ref.get('LP Agency'), str) and ref['LP Agency']}
+            for dataset in datasets - {''}:
+                self.by_dataset.setdefault(dataset, []).append(position)
+            for agency in agencies:
+                self.by_agency.setdefault(agency, []).append(position)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'CitationIndex':
+        """Index a combined output file (either layout)."""
+        return cls(load_combined(path), Path(path))
+
+    def find(self, eos_doi: Optional[str] = None, agency: Optional[str] = None,
+             year: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get the publications matching every given filter, in combined output order."""
+        selections = []
+        if eos_doi:
+            selections.append(self.by_dataset.get(canonical_doi(eos_doi), []))
+        if agency:
+            selections.append(self.by_agency.get(agency.lower(), []))
+        if year is not None:
+            selections.append(self.by_year.get(year, []))
+        if not selections:
+            return []
+        selections.sort(key=len)
+        positions = set(selections[0])
+        for selection in selections[1:]:
+            positions.intersection_update(selection)
+        return [self.records[position] for position in sorted(positions)]
+
+
+class CitationService:
+    """Lookups answered from warm in-memory indexes.
+
+    Holds the EOS catalog (by DOI, and as a DOIScanner for free text), the
+    newest combined output indexed by CitationIndex, and Crossref records
+    fetched so far, so each request is a few dictionary lookups instead of a
+    CLI start-up that reloads all of them.
+    """
+
+    def __init__(self, catalog: Dict[str, Dict[str, Any]], combined_dir: Union[str, Path],
+                 combined_path: Optional[Union[str, Path]] = None) -> None:
+        """Initialize the service and load its indexes.
+
+        Args:
+            catalog: Catalog rows by EOS DOI (see load_catalog)
+            combined_dir: Directory the newest combined output is taken from
+            combined_path: Serve this combined output instead of the newest one
+        """
+        self.catalog = catalog
+        self.scanner = DOIScanner(row['EOS DOI'] for row in catalog.values())
+        self.combined_dir = Path(combined_dir)
+        self.combined_path = Path(combined_path) if combined_path else None
+        self.citations = CitationIndex([])
+        self.works: 'OrderedDict[str, Optional[Dict[str, Any]]]' = OrderedDict()
+        self.works_client = None
+        self.lock = Lock()
+        self.reload()
+
+    def reload(self) -> Dict[str, Any]:
+        """Re-index the combined output (the newest one unless a file was given)."""
+        path = self.combined_path or latest_combined(self.combined_dir)
+        if path is not None:
+            # Built aside and swapped in, so requests in flight keep a consistent index
+            self.citations = CitationIndex.load(path)
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        """Describe what is loaded."""
+        return {
+            'combined': str(self.citations.path) if self.citations.path else None,
+            'loaded': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.citations.loaded)),
+            'publications': len(self.citations.records),
+            'cited_datasets': len(self.citations.by_dataset),
+            'catalog_datasets': len(self.catalog),
+            'cached_works': len(self.works)
+        }
+
+    def work(self, doi: str) -> Optional[Dict[str, Any]]:
+        """Get a work's Crossref metadata, fetched once and then kept in memory."""
+        key = canonical_doi(doi)
+        with self.lock:
+            if key in self.works:
+                self.works.move_to_end(key)
+                return self.works[key]
+            if self.works_client is None:
+                from .crossref_works import CrossrefWorks
+                self.works_client = CrossrefWorks()
+        record = self.works_client.doi(doi)
+        with self.lock:
+            self.works[key] = record
+            if len(self.works) > WORKS_CACHE_SIZE:
+                self.works.popitem(last=False)
+        return record
+
+    def handle(self, method: str, target: str, body: bytes) -> Tuple[int, bytes]:
+        """Answer a request.
+
+        GET /health, /citations?eos_doi=&daac=&year=&limit=, /datasets/<EOS DOI>,
+        /publications/<DOI> and /works/<DOI>; POST /scan (text in the body) and /reload.
+
+        Args:
+            method: HTTP method
+            target: Request path and query string
+            body: Request body
+
+        Returns:
+            Tuple of (status, JSON response body)
+        """
+        parts = urlsplit(target)
+        resource, _, name = parts.path.lstrip('/').partition('/')
+        name = unquote(name)
+        params = dict(parse_qsl(parts.query))
+        try:
+            if method == 'POST' and resource == 'reload':
+                return self._json(200, self.reload())
+            if method == 'POST' and resource == 'scan':
+                text = body.decode('utf-8', errors='replace')
+                return self._json(200, {'dois': self.scanner.scan(text)})
+            if method != 'GET':
+                return self._json(405, {'error': f"{method} /{resource} is not supported"})
+            if resource == 'health':
+                return self._json(200, self.status())
+            if resource == 'citations':
+                year = int(params['year']) if params.get('year') else None
+                if not (params.get('eos_doi') or params.get('daac') or year is not None):
+                    return self._json(400, {'error': "Give at least one of eos_doi, daac and year"})
+                publications = self.citations.find(params.get('eos_doi'), params.get('daac'), year)
+                limit = int(params['limit']) if params.get('limit') else None
+                return self._json(200, {'count': len(publications), 'publications': publications[:limit]})
+            if resource == 'datasets' and name:
+                doi = canonical_doi(name)
+                citing = self.citations.by_dataset.get(doi, [])
+                if doi not in self.catalog and not citing:
+                    return self._json(404, {'error': f"Unknown EOS DOI: {name}"})
+                return self._json(200, {
+                    'dataset': self.catalog.get(doi),
+                    'citations': len(citing),
+                    'citing': [self.citations.records[position]['DOI'] for position in citing]
+                })
+            if resource == 'publications' and name:
+                position = self.citations.by_doi.get(canonical_doi(name))
+                if position is None:
+                    return self._json(404, {'error': f"No combined record for DOI: {name}"})
+                return self._json(200, self.citations.records[position])
+            if resource == 'works' and name:
+                record = self.work(name)
+                if record is None:
+                    return self._json(404, {'error': f"Crossref does not know DOI: {name}"})
+                return self._json(200, record)
+        except ValueError as error:
+            return self._json(400, {'error': str(error)})
+        return self._json(404, {'error': f"Unknown resource: {parts.path}"})
+
+    def _json(self, status: int, payload: Any) -> Tuple[int, bytes]:
+        return status, json.dumps(payload).encode('utf-8')
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler delegating to the server's CitationService."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, so repeated lookups skip the connection set-up
+
+    def _respond(self) -> None:
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status, payload = self.server.service.handle(self.command, self.path, body)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Silence per-request logging."""
+        pass
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server on a Unix domain socket (e.g. for `curl --unix-socket`)."""
+
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        # A socket file left behind by a server that didn't shut down cleanly
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        super().server_bind()
+
+
+def create_server(service: CitationService, host: str = '127.0.0.1', port: int = 8765,
+                  socket_path: Optional[str] = None) -> socketserver.BaseServer:
+    """Create the service's HTTP server.
+
+    Args:
+        service: Service answering the requests
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        socket_path: Listen on this Unix domain socket instead of TCP
+
+    Returns:
+        Server instance; call ``serve_forever()`` to run it
+    """
+    if socket_path:
+        server = UnixHTTPServer(socket_path, ServiceRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+        server.daemon_threads = True
+    server.service = service
+    return server
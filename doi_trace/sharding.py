@@ -0,0 +1,153 @@
+import glob
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import List, Dict, Any
+
+
+SHARD_FILE_PATTERN = re.compile(r'_shard-(\d+)-of-(\d+)\.json$')
+
+
+class Shard:
+    """A deterministic slice of the EOS DOI catalog.
+
+    A catalog row belongs to shard ``index`` of ``count`` when a stable hash of
+    its EOS DOI modulo ``count`` equals ``index``. The hash does not depend on
+    the process, host or catalog order, so every node running ``index/count``
+    agrees on the same slice.
+    """
+
+    def __init__(self, index: int, count: int):
+        """Initialize the shard.
+
+        Args:
+            index: Zero-based shard index
+            count: Total number of shards
+        """
+        if count < 1:
+            raise ValueError(f"Shard count must be at least 1, got {count}")
+        if not 0 <= index < count:
+            raise ValueError(f"Shard index must be between 0 and {count - 1}, got {index}")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, value: str) -> "Shard":
+        """Parse a shard specification of the form ``i/N``.
+
+        Args:
+            value: Shard specification, e.g. ``0/4``
+
+        Returns:
+            Shard instance
+        """
+        match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', value or '')
+        if not match:
+            raise ValueError(f"Invalid shard '{value}', expected the form i/N (e.g. 0/4)")
+        return cls(int(match.group(1)), int(match.group(2)))
+
+    def contains(self, doi: str) -> bool:
+        """Check whether a DOI belongs to this shard."""
+        digest = hashlib.sha1(doi.strip().upper().encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big') % self.count == self.index
+
+    def select(self, eos_dois: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep only the catalog rows whose EOS DOI belongs to this shard."""
+        selected = [row for row in eos_dois if self.contains(row['EOS DOI'])]
+        print(f"Shard {self}: {len(selected)} of {len(eos_dois)} EOS DOIs")
+        return selected
+
+    @property
+    def suffix(self) -> str:
+        """Filename suffix identifying this shard's partial output."""
+        return f"shard-{self.index}-of-{self.count}"
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def shard_output_path(output_dir: Path, name: str, timestamp: str, shard: Shard) -> Path:
+    """Build the partial output path for one shard of a source.
+
+    Partial files live in a ``shards`` subdirectory so that they are never
+    mistaken for a complete per-source output by ``combine``.
+    """
+    return Path(output_dir) / "shards" / f"{name}_citations_{timestamp}_{shard.suffix}.json"
+
+
+def find_shard_files(output_dir: Path, name: str) -> List[str]:
+    """Find the newest complete set of partial files for a source.
+
+    Args:
+        output_dir: Output directory containing the ``shards`` subdirectory
+        name: Source file prefix (e.g. ``datacite``)
+
+    Returns:
+        One file per shard index, taken from the most recent shard count
+    """
+    files = glob.glob(str(Path(output_dir) / "shards" / f"{name}_citations_*_shard-*-of-*.json"))
+    if not files:
+        raise FileNotFoundError(f"No shard files found for {name} in {Path(output_dir) / 'shards'}")
+
+    # Use the shard count of the most recent partial file, then the newest file per index
+    newest = max(files, key=os.path.getctime)
+    count = int(SHARD_FILE_PATTERN.search(newest).group(2))
+    latest = {}
+    for file in files:
+        match = SHARD_FILE_PATTERN.search(file)
+        if not match or int(match.group(2)) != count:
+            continue
+        index = int(match.group(1))
+        if index not in latest or os.path.getctime(file) > os.path.getctime(latest[index]):
+            latest[index] = file
+
+    missing = sorted(set(range(count)) - set(latest))
+    if missing:
+        raise FileNotFoundError(
+            f"Missing shard files for {name}: indexes {', '.join(str(i) for i in missing)} of {count}"
+        )
+    return [latest[index] for index in range(count)]
+
+
+def merge_shard_files(files: List[str]) -> List[Dict[str, Any]]:
+    """Merge partial per-source outputs into a single citation list.
+
+    Publications are keyed by DOI (or Scopus ID when the DOI is missing) and
+    their cited references are combined by EOS DOI. Records without either
+    identifier are kept as they are.
+
+    Args:
+        files: Partial output files written by sharded runs
+
+    Returns:
+        Merged list of publications
+    """
+    merged = {}
+    unkeyed = []
+    for file in files:
+        print(f"Loading {file}")
+        with open(file) as f:
+            records = json.load(f)
+        for record in records:
+            key = record.get('DOI') or record.get('SCOPUS_ID')
+            if not key:
+                unkeyed.append(record)
+                continue
+            if key not in merged:
+                merged[key] = record
+                continue
+
+            existing = merged[key]
+            for field, value in record.items():
+                if field != 'Cited-References' and value and not existing.get(field):
+                    existing[field] = value
+            seen = {ref.get('EOS DOI') for ref in existing.get('Cited-References', [])}
+            for ref in record.get('Cited-References', []):
+                if ref.get('EOS DOI') not in seen:
+                    existing.setdefault('Cited-References', []).append(ref)
+                    seen.add(ref.get('EOS DOI'))
+
+    print(f"Merged {len(files)} shard files into {len(merged) + len(unkeyed)} publications")
+    return list(merged.values()) + unkeyed
@@ -0,0 +1,327 @@
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from .linkage import parse_year
+from .records import Catalog, canonical_doi
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    path TEXT,
+    created TEXT NOT NULL,
+    records INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS sources (
+    name TEXT PRIMARY KEY,
+    last_run INTEGER REFERENCES runs(id)
+);
+
+-- One row per distinct cited catalog row (see doi_trace.records.Catalog)
+CREATE TABLE IF NOT EXISTS datasets (
+    id INTEGER PRIMARY KEY,
+    eos_doi TEXT NOT NULL,
+    agency TEXT,
+    shortname TEXT,
+    extra TEXT,  -- other reference fields as a JSON array of [name, value] pairs
+    key TEXT NOT NULL UNIQUE
+);
+CREATE INDEX IF NOT EXISTS datasets_eos_doi ON datasets(eos_doi);
+CREATE INDEX IF NOT EXISTS datasets_agency ON datasets(agency COLLATE NOCASE);
+
+-- A publication as reported by one source; `key` is its DOI, or its title when it has none
+CREATE TABLE IF NOT EXISTS publications (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL REFERENCES sources(name),
+    key TEXT NOT NULL,
+    doi TEXT NOT NULL,
+    title TEXT,
+    year,  -- as the source wrote it
+    year_number INTEGER,
+    run INTEGER REFERENCES runs(id),
+    position INTEGER,  -- first position in the run's output, so combining keeps the output's order
+    UNIQUE (source, key)
+);
+CREATE INDEX IF NOT EXISTS publications_doi ON publications(doi);
+CREATE INDEX IF NOT EXISTS publications_year ON publications(year_number);
+
+CREATE TABLE IF NOT EXISTS citations (
+    publication INTEGER NOT NULL REFERENCES publications(id),
+    dataset INTEGER NOT NULL REFERENCES datasets(id),
+    position INTEGER NOT NULL DEFAULT 0,  -- order of first citation within the publication
+    PRIMARY KEY (publication, dataset)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS citations_dataset ON citations(dataset, publication);
+
+-- The tags of the combined output, per publication
+CREATE VIEW IF NOT EXISTS tags AS
+    SELECT c.publication, 'doi:' || d.eos_doi AS tag, 0 AS kind
+    FROM citations c JOIN datasets d ON d.id = c.dataset WHERE d.eos_doi != ''
+    UNION
+    SELECT c.publication, 'db:' || p.source, 1
+    FROM citations c JOIN datasets d ON d.id = c.dataset JOIN publications p ON p.id = c.publication
+    WHERE d.eos_doi != ''
+    UNION
+    SELECT c.publication, 'DAAC:' || d.agency, 2
+    FROM citations c JOIN datasets d ON d.id = c.dataset WHERE d.agency IS NOT NULL AND d.agency != '';
+"""
+
+
+def _source_name(path: Union[str, Path]) -> str:
+    # data/google_scholar_citations_20250101_000000.json -> google_scholar
+    return Path(path).name.split('_citations_')[0]
+
+
+def _value(value: Any) -> Any:
+    # Years are stored as the source wrote them, which SQLite can't always hold as is
+    return value if value is None or isinstance(value, (str, int, float)) else str(value)
+
+
+class CitationStore:
+    """Embedded SQLite store of the publications each source reported.
+
+    Sources upsert their outputs into it (one run per output), keyed by
+    source and DOI (or title for publications without one). Each run
+    replaces the references of the publications it reports and, being the
+    source's whole current output, removes the publications it no longer
+    reports, so the store holds the latest state of every source (what
+    combining its newest output file gives) instead of a snapshot per run. `combine` groups the stored publications and collects their
+    references and tags with SQL joins, and `query` looks publications up
+    by EOS DOI, DAAC or year through the indexes.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        """Open (or create) the store.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Sources run in parallel processes may write at the same time; wait for each other's transactions
+        self.connection = sqlite3.connect(self.path, timeout=60)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def __enter__(self) -> 'CitationStore':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def ingest(self, source: str, records: Iterable[Dict[str, Any]], path: Optional[str] = None,
+               complete: bool = True) -> int:
+        """Upsert a source's output records.
+
+        Publications already stored for the source are updated (their title,
+        year and references replaced), new ones are inserted.
+
+        Args:
+            source: Source name (e.g. 'datacite')
+            records: Output records ('DOI', 'Title', 'Year', 'Cited-References'; Web of Science
+                outputs use 'doi', 'title', 'year' and 'eosdis_matches')
+            path: Output file the records came from
+            complete: The records are the source's whole current output, so its stored
+                publications missing from them are removed; otherwise they are kept
+
+        Returns:
+            The id of the run recorded for this ingest
+        """
+        catalog = Catalog()
+        dataset_ids = {}
+        cited = {}  # publication -> references stored for it by this run
+        count = 0
+        with self.connection:
+            run = self.connection.execute(
+                'INSERT INTO runs (source, path, created) VALUES (?, ?, ?)',
+                (source, str(path) if path else None, datetime.now().isoformat(timespec='seconds'))
+            ).lastrowid
+            self.connection.execute(
+                'INSERT INTO sources (name, last_run) VALUES (?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET last_run = excluded.last_run', (source, run))
+            for record in records:
+                doi = canonical_doi(record.get('DOI', record.get('doi')))
+                title = record.get('Title', record.get('title'))
+                year = record.get('Year', record.get('year'))
+                refs = record.get('Cited-References') or record.get('eosdis_matches') or []
+                if not (doi or title or refs):
+                    continue
+                key = doi or f"title:{str(title or '').strip().lower()}"
+                publication = self.connection.execute(
+                    'INSERT INTO publications (source, key, doi, title, year, year_number, run, position) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                    # Within a run the first title and the last year win, as when combining files;
+                    # a later run replaces both
+                    'ON CONFLICT (source, key) DO UPDATE SET '
+                    'title = CASE WHEN run = excluded.run THEN coalesce(title, excluded.title) ELSE excluded.title END, '
+                    'year = CASE WHEN run = excluded.run THEN coalesce(excluded.year, year) ELSE excluded.year END, '
+                    'year_number = CASE WHEN run = excluded.run THEN coalesce(excluded.year_number, year_number) '
+                    'ELSE excluded.year_number END, '
+                    'position = CASE WHEN run = excluded.run THEN position ELSE excluded.position END, '
+                    'run = excluded.run RETURNING id',
+                    (source, key, doi, title, _value(year), parse_year(year), run, count)
+                ).fetchone()[0]
+                if publication not in cited:
+                    # References of earlier runs are replaced; repeats within this run add to them
+                    self.connection.execute('DELETE FROM citations WHERE publication = ?', (publication,))
+                    cited[publication] = 0
+                for ref in refs:
+                    entry = catalog.reference(ref)
+                    dataset = dataset_ids.get(entry)
+                    if dataset is None:
+                        dataset = dataset_ids[entry] = self._dataset_id(entry)
+                    self.connection.execute(
+                        'INSERT OR IGNORE INTO citations (publication, dataset, position) VALUES (?, ?, ?)',
+                        (publication, dataset, cited[publication]))
+                    cited[publication] += 1
+                count += 1
+            if complete:
+                # Publications this run no longer reports (e.g. false matches fixed upstream)
+                self.connection.execute(
+                    'DELETE FROM citations WHERE publication IN '
+                    '(SELECT id FROM publications WHERE source = ? AND run != ?)', (source, run))
+                self.connection.execute('DELETE FROM publications WHERE source = ? AND run != ?', (source, run))
+            self.connection.execute('UPDATE runs SET records = ? WHERE id = ?', (count, run))
+        return run
+
+    def ingest_file(self, path: Union[str, Path], complete: bool = True) -> int:
+        """Upsert a source output file (`<source>_citations_<timestamp>.json` or `.jsonl`).
+
+        Args:
+            path: Source output file
+            complete: The file is the source's whole current output (see `ingest`)
+
+        Returns:
+            The id of the run recorded for this ingest
+        """
+        from .reference_sources.base import read_records
+        return self.ingest(_source_name(path), read_records(path), path, complete)
+
+    def _dataset_id(self, entry) -> int:
+        extra = json.dumps(entry.extra, default=str) if entry.extra else None
+        key = json.dumps([entry.doi, entry.agency, entry.shortname, extra], default=str)
+        return self.connection.execute(
+            'INSERT INTO datasets (eos_doi, agency, shortname, extra, key) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET key = excluded.key RETURNING id',
+            (entry.doi, entry.agency, entry.shortname, extra, key)
+        ).fetchone()[0]
+
+    def sources(self) -> List[Dict[str, Any]]:
+        """Get the stored sources with their last run.
+
+        Returns:
+            One dict per source: name, last run time and the number of stored publications
+        """
+        rows = self.connection.execute(
+            'SELECT s.name, r.created, (SELECT count(*) FROM publications p WHERE p.source = s.name) '
+            'FROM sources s LEFT JOIN runs r ON r.id = s.last_run ORDER BY s.name')
+        return [{'source': name, 'last_run': created, 'publications': count} for name, created, count in rows]
+
+    def combine(self, sources: Sequence[str],
+                group: Callable[[List[Dict[str, Any]]], List[int]]) -> List[Dict[str, Any]]:
+        """Build the combined records of the stored publications of some sources.
+
+        Args:
+            sources: Source names, in the order their publications are combined
+            group: Grouping of flat publication records ('source', 'doi', 'title', 'year'),
+                as CitationCombiner groups them (one group index per record)
+
+        Returns:
+            Combined records with 'DOI', 'Cited-References', 'tags' and, under
+            '_publications', the (title, year) of each grouped publication in order
+        """
+        ids = []
+        records = []
+        for source in sources:
+            rows = self.connection.execute(
+                'SELECT id, doi, title, year FROM publications WHERE source = ? ORDER BY run, position, id',
+                (source,))
+            for publication, doi, title, year in rows:
+                ids.append(publication)
+                records.append({'source': source, 'doi': doi, 'title': title, 'year': year})
+        groups = group(records)
+
+        self.connection.execute('DROP TABLE IF EXISTS temp.grouping')
+        self.connection.execute(
+            'CREATE TEMP TABLE grouping (publication INTEGER PRIMARY KEY, grp INTEGER, position INTEGER)')
+        self.connection.executemany('INSERT INTO temp.grouping VALUES (?, ?, ?)',
+                                    ((publication, grp, position)
+                                     for position, (publication, grp) in enumerate(zip(ids, groups))))
+        self.connection.execute('CREATE INDEX temp.grouping_grp ON grouping(grp)')
+
+        combined = {}
+        for i, grp in enumerate(groups):
+            record = combined.get(grp)
+            if record is None:
+                record = combined[grp] = {'DOI': '', 'Title': None, 'Year': None,
+                                          'Cited-References': [], 'tags': [], '_publications': []}
+            record['DOI'] = record['DOI'] or records[i]['doi']
+            record['_publications'].append((records[i]['title'], records[i]['year']))
+
+        # References: each dataset once per group, in order of first citation
+        references = self.connection.execute(
+            'SELECT g.grp, d.eos_doi, d.agency, d.shortname, d.extra '
+            'FROM temp.grouping g JOIN citations c ON c.publication = g.publication '
+            'JOIN datasets d ON d.id = c.dataset '
+            'GROUP BY g.grp, d.id ORDER BY g.grp, min(g.position * 4294967296 + c.position)')
+        for grp, eos_doi, agency, shortname, extra in references:
+            ref = {'EOS DOI': eos_doi, 'LP Agency': agency, 'Shortname': shortname}
+            if extra:
+                ref.update(json.loads(extra))
+            combined[grp]['Cited-References'].append(ref)
+
+        tags = self.connection.execute(
+            'SELECT DISTINCT g.grp, t.tag, t.kind FROM temp.grouping g JOIN tags t ON t.publication = g.publication '
+            'ORDER BY g.grp, t.kind, t.tag')
+        for grp, tag, _ in tags:
+            combined[grp]['tags'].append({'tag': tag})
+        self.connection.execute('DROP TABLE temp.grouping')
+        return list(combined.values())
+
+    def query(self, eos_doi: Optional[str] = None, agency: Optional[str] = None, year: Optional[int] = None,
+              source: Optional[str] = None, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Look up citations of datasets, streaming rows from the database.
+
+        Args:
+            eos_doi: Cited EOS DOI (any form canonical_doi accepts)
+            agency: DAAC (LP Agency), case-insensitive
+            year: Publication year
+            source: Source that reported the publication
+            limit: Maximum number of rows
+
+        Yields:
+            One dict per (publication, cited dataset)
+        """
+        conditions = []
+        params = []
+        if eos_doi:
+            conditions.append('d.eos_doi = ?')
+            params.append(canonical_doi(eos_doi))
+        if agency:
+            conditions.append('d.agency = ? COLLATE NOCASE')
+            params.append(agency)
+        if year is not None:
+            conditions.append('p.year_number = ?')
+            params.append(year)
+        if source:
+            conditions.append('p.source = ?')
+            params.append(source)
+        sql = ('SELECT p.source, p.doi, p.title, p.year, d.eos_doi, d.agency, d.shortname '
+               'FROM citations c JOIN publications p ON p.id = c.publication JOIN datasets d ON d.id = c.dataset')
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY p.year_number, p.doi'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        for row in self.connection.execute(sql, params):
+            yield dict(zip(('source', 'DOI', 'Title', 'Year', 'EOS DOI', 'LP Agency', 'Shortname'), row))
@@ -0,0 +1,414 @@
+import csv
+import hashlib
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit
+
+from .archive import VOLATILE_PARAMS
+from .transport import get_transport
+
+
+# Upstream base URLs, mounted under /<service>/ on the stub server
+SERVICES = {
+    'datacite': 'https://api.datacite.org',
+    'eventdata': 'https://api.eventdata.crossref.org',
+    'crossref': 'https://api.crossref.org',
+    'serpapi': 'https://serpapi.com',
+    'elsevier': 'https://api.elsevier.com',
+}
+
+# Works matching any Crossref bibliographic query
+QUERY_RESULTS = 150
+
+WORDS = (
+    'aerosol', 'albedo', 'anomaly', 'arctic', 'biomass', 'carbon', 'climate', 'cloud', 'drought',
+    'evapotranspiration', 'fire', 'flux', 'glacier', 'global', 'land', 'MODIS', 'moisture', 'ocean',
+    'precipitation', 'radiation', 'reanalysis', 'retrieval', 'satellite', 'sea', 'snow', 'soil',
+    'surface', 'temperature', 'trend', 'vegetation', 'water', 'wind'
+)
+SURNAMES = ('Smith', 'Chen', 'Garcia', 'Müller', 'Kumar', 'Nakamura', 'Okafor', 'Silva', 'Novak', 'Dubois')
+
+
+class StubSettings:
+    """Behaviour of the stub server."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_limit_every: int = 0,
+                 citations_per_doi: int = 5, results_per_query: int = 25, events_per_page: int = 100,
+                 event_pages: int = 3, searches_left: int = 100000, seed: int = 0,
+                 eos_dois: Optional[List[str]] = None, record_dir: Optional[Path] = None,
+                 replay_dir: Optional[Path] = None) -> None:
+        """Initialize stub settings.
+
+        Args:
+            latency: Fixed delay added to every response (seconds)
+            jitter: Maximum random delay added on top of the latency (seconds)
+            rate_limit_every: Answer every Nth request per service with a rate-limit error (0 disables)
+            citations_per_doi: Citations returned per DataCite DOI
+            results_per_query: Results per SerpAPI or Scopus query
+            events_per_page: Crossref Event Data events per page
+            event_pages: Crossref Event Data pages per prefix
+            searches_left: SerpAPI searches reported by the account endpoint
+            seed: Seed for the synthetic data
+            eos_dois: EOS DOIs to cite from synthetic Event Data
+            record_dir: Forward requests upstream and record the responses here
+            replay_dir: Serve recorded responses from here instead of synthetic data
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_every = rate_limit_every
+        self.citations_per_doi = citations_per_doi
+        self.results_per_query = results_per_query
+        self.events_per_page = events_per_page
+        self.event_pages = event_pages
+        self.searches_left = searches_left
+        self.seed = seed
+        self.eos_dois = eos_dois or []
+        self.record_dir = Path(record_dir) if record_dir else None
+        self.replay_dir = Path(replay_dir) if replay_dir else None
+
+
+def load_eos_dois(eosdis_dir: Path) -> List[str]:
+    """Read the EOS DOIs from the catalog CSV files, if there are any."""
+    dois = []
+    for file in sorted(Path(eosdis_dir).glob('*.csv')):
+        with open(file, encoding='unicode_escape', newline='') as f:
+            for row in csv.DictReader(f):
+                if row.get('DOI_NAME'):
+                    dois.append(row['DOI_NAME'].upper())
+    return dois
+
+
+class Recording:
+    """Recorded upstream responses, one JSON file per request key."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+
+    @staticmethod
+    def key(service: str, path: str, query: List[Tuple[str, str]]) -> str:
+        """Build a stable key for a request, ignoring credentials and contact parameters."""
+        params = sorted((k, v) for k, v in query if k.lower() not in VOLATILE_PARAMS)
+        return hashlib.sha256(json.dumps([service, path, params]).encode('utf-8')).hexdigest()
+
+    def _path(self, service: str, key: str) -> Path:
+        return self.directory / service / f"{key}.json"
+
+    def load(self, service: str, key: str) -> Optional[Dict[str, Any]]:
+        """Load a recorded response, or None if the request was never recorded."""
+        path = self._path(service, key)
+        if not path.exists():
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def save(self, service: str, key: str, request: str, status: int, content_type: str, body: str) -> None:
+        """Save an upstream response."""
+        path = self._path(service, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({
+                'request': request,
+                'status': status,
+                'content_type': content_type,
+                'body': body
+            }, f, indent=2)
+
+
+class StubAPI:
+    """Synthetic stand-in for the Crossref, DataCite, SerpAPI and Elsevier APIs.
+
+    Responses are generated deterministically from the request, so repeated
+    runs see the same data. Every Nth request per service can be answered with
+    the service's own rate-limit error to exercise retry and back-off paths.
+    """
+
+    def __init__(self, settings: StubSettings) -> None:
+        self.settings = settings
+        self.counters = {service: 0 for service in SERVICES}
+        self.searches_left = settings.searches_left
+        self.lock = Lock()
+        self.recording = None
+        if settings.record_dir:
+            self.recording = Recording(settings.record_dir)
+        elif settings.replay_dir:
+            self.recording = Recording(settings.replay_dir)
+
+    def handle(self, method: str, target: str, headers: Dict[str, str], body: bytes,
+               base_url: str) -> Tuple[int, Dict[str, str], bytes]:
+        """Answer a request.
+
+        Args:
+            method: HTTP method
+            target: Request path and query string (e.g. /datacite/dois/10.5067/X)
+            headers: Request headers
+            body: Request body
+            base_url: Public base URL of the stub, used in pagination links
+
+        Returns:
+            Tuple of (status, response headers, response body)
+        """
+        parts = urlsplit(target)
+        service, _, path = parts.path.lstrip('/').partition('/')
+        path = '/' + path
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        if service not in SERVICES:
+            return self._json(404, {'error': f"Unknown service '{service}', expected one of {sorted(SERVICES)}"})
+
+        delay = self.settings.latency + random.uniform(0, self.settings.jitter)
+        if delay:
+            time.sleep(delay)
+
+        if self.settings.record_dir:
+            return self._record(method, service, path, query, headers, body)
+        if self.settings.replay_dir:
+            return self._replay(service, path, query)
+
+        with self.lock:
+            self.counters[service] += 1
+            limited = bool(self.settings.rate_limit_every) and self.counters[service] % self.settings.rate_limit_every == 0
+        if limited:
+            return self._rate_limit(service)
+
+        params = dict(query)
+        rng = random.Random(f"{self.settings.seed}:{service}:{path}:{sorted(params.items())}")
+        handler = getattr(self, f"_{service}")
+        return handler(path, params, rng, f"{base_url}/{service}")
+
+    def _json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Build a JSON response."""
+        response_headers = {'Content-Type': 'application/json'}
+        response_headers.update(headers or {})
+        return status, response_headers, json.dumps(payload).encode('utf-8')
+
+    def _rate_limit(self, service: str) -> Tuple[int, Dict[str, str], bytes]:
+        """Answer with the rate-limit error each real service returns."""
+        if service == 'datacite':
+            return self._json(403, {'errors': [{'status': '403', 'title': 'Your request has been rate limited.'}]})
+        if service == 'serpapi':
+            return self._json(429, {'error': 'Your account has run out of searches.'})
+        if service == 'elsevier':
+            return self._json(429, {'service-error': {'status': {
+                'statusCode': 'RATE_LIMIT_EXCEEDED', 'statusText': 'Rate of requests exceeds specified limits'
+            }}}, {'Retry-After': '1'})
+        return self._json(429, {'status': 'error', 'message': 'Too Many Requests'}, {'Retry-After': '1'})
+
+    def _record(self, method, service, path, query, headers, body):
+        """Forward a request upstream and record the response."""
+        url = f"{SERVICES[service]}{path}"
+        forwarded = {k: v for k, v in headers.items() if k.lower() in ('accept', 'content-type', 'x-els-apikey', 'x-els-insttoken')}
+        response = get_transport().request(method, url, params=query, headers=forwarded, data=body or None)
+        content_type = response.headers.get('Content-Type', 'application/json')
+        key = Recording.key(service, path, query)
+        self.recording.save(service, key, f"{method} {path}?{urlencode([q for q in query if q[0].lower() not in VOLATILE_PARAMS])}",
+                            response.status_code, content_type, response.text)
+        return response.status_code, {'Content-Type': content_type}, response.content
+
+    def _replay(self, service, path, query):
+        """Serve a recorded response."""
+        recorded = self.recording.load(service, Recording.key(service, path, query))
+        if recorded is None:
+            return self._json(502, {'error': f"No recording for {service} {path}"})
+        return recorded['status'], {'Content-Type': recorded['content_type']}, recorded['body'].encode('utf-8')
+
+    def _title(self, rng: random.Random) -> str:
+        words = rng.sample(WORDS, rng.randint(5, 10))
+        return ' '.join(words).capitalize()
+
+    def _citing_doi(self, rng: random.Random) -> str:
+        return f"10.{rng.randint(1000, 9999)}/stub.{rng.getrandbits(40):010x}"
+
+    def _datacite(self, path, params, rng, base_url):
+        """DataCite /dois/<doi>."""
+        if not path.startswith('/dois/'):
+            return self._json(404, {'errors': [{'status': '404', 'title': 'The resource you are looking for doesn\'t exist.'}]})
+        doi = unquote(path[len('/dois/'):])
+        count = rng.randint(0, 2 * self.settings.citations_per_doi)
+        return self._json(200, {'data': {
+            'id': doi.lower(),
+            'type': 'dois',
+            'relationships': {'citations': {'data': [
+                {'id': self._citing_doi(rng).lower(), 'type': 'dois'} for _ in range(count)
+            ]}}
+        }})
+
+    def _eventdata(self, path, params, rng, base_url):
+        """Crossref Event Data /v1/events."""
+        prefix = params.get('obj-id.prefix', '10.5067')
+        page = int(params.get('cursor') or 0)
+        candidates = [doi for doi in self.settings.eos_dois if doi.startswith(prefix)]
+        events = []
+        for _ in range(self.settings.events_per_page):
+            eos_doi = rng.choice(candidates) if candidates else f"{prefix}/SYN{rng.randint(0, 9999):04d}"
+            events.append({
+                'id': f"{rng.getrandbits(64):016x}",
+                'source_id': rng.choice(('crossref', 'crossref', 'crossref', 'datacite', 'twitter', 'wikipedia')),
+                'obj_id': f"https://doi.org/{eos_doi}",
+                'subj_id': f"https://doi.org/{self._citing_doi(rng)}",
+                'relation_type_id': 'references'
+            })
+        next_cursor = str(page + 1) if page + 1 < self.settings.event_pages else None
+        return self._json(200, {'status': 'ok', 'message': {
+            'next-cursor': next_cursor,
+            'total-results': self.settings.events_per_page * self.settings.event_pages,
+            'events': events
+        }})
+
+    def _work(self, doi: str, rng: random.Random) -> Dict[str, Any]:
+        year = rng.randint(2010, 2025)
+        return {
+            'DOI': doi.lower(),
+            'title': [self._title(rng)],
+            'type': rng.choice(('journal-article', 'journal-article', 'journal-article', 'proceedings-article', 'posted-content')),
+            'created': {'date-parts': [[year, rng.randint(1, 12), rng.randint(1, 28)]]},
+            'published-print': {'date-parts': [[year]]},
+            'author': [{'family': rng.choice(SURNAMES), 'given': 'A.'}]
+        }
+
+    def _crossref(self, path, params, rng, base_url):
+        """Crossref REST /works/<doi> and /works?query.bibliographic=."""
+        if path.startswith('/works/'):
+            return self._json(200, {'status': 'ok', 'message-type': 'work',
+                                    'message': self._work(unquote(path[len('/works/'):]), rng)})
+        if path == '/works':
+            rows = int(params.get('rows', 20))
+            # Cursor paging ('*' starts it) over QUERY_RESULTS matches; plain requests get one page
+            page = 0 if params.get('cursor') in (None, '*') else int(params['cursor'])
+            count = max(0, min(rows, QUERY_RESULTS - page * rows))
+            return self._json(200, {'status': 'ok', 'message-type': 'work-list', 'message': {
+                'total-results': QUERY_RESULTS,
+                'next-cursor': str(page + 1),
+                'items': [self._work(self._citing_doi(rng), rng) for _ in range(count)]
+            }})
+        return self._json(404, {'status': 'error', 'message': 'Resource not found.'})
+
+    def _serpapi(self, path, params, rng, base_url):
+        """SerpAPI /search.json (Google Scholar engine) and /account.json."""
+        if path == '/account.json':
+            return self._json(200, {'plan_searches_left': self.searches_left,
+                                    'total_searches_left': self.searches_left,
+                                    'account_rate_limit_per_hour': 100000})
+        with self.lock:
+            if self.searches_left <= 0:
+                return self._json(429, {'error': 'Your account has run out of searches.'})
+            self.searches_left -= 1
+
+        start = int(params.get('start', 0))
+        num = min(int(params.get('num', 10)), 20)
+        total = self.settings.results_per_query
+        if start >= total:
+            return self._json(200, {'error': "Google hasn't returned any results for this query."})
+
+        results = []
+        for position in range(start, min(start + num, total)):
+            doi = self._citing_doi(rng)
+            year = rng.randint(2010, 2025)
+            author = rng.choice(SURNAMES)
+            link = rng.choice((
+                f"https://doi.org/{doi}",
+                f"https://www.tandfonline.com/doi/full/{doi}",
+                f"https://acp.copernicus.org/articles/{rng.randint(10, 24)}/{rng.randint(1, 9999)}/{year}/",
+                f"https://www.nature.com/articles/s{rng.randint(41000, 41999)}-0{rng.randint(10, 25)}-{rng.randint(1000, 9999)}-{rng.randint(0, 9)}",
+                f"https://www.sciencedirect.com/science/article/pii/S{rng.getrandbits(48):015d}",
+                f"https://example.org/papers/{rng.getrandbits(32):08x}.pdf",
+            ))
+            results.append({
+                'position': position,
+                'title': f"{self._title(rng)} &amp; <b>{rng.choice(WORDS)}</b>",
+                'result_id': f"{rng.getrandbits(48):012x}",
+                'link': link,
+                'snippet': f"... using {params.get('q', '')} ...",
+                'publication_info': {'summary': f"{author[0]} {author} - Journal of {rng.choice(WORDS).capitalize()}, {year} - publisher.org"},
+                'authors': [{'name': f"{author[0]} {author}"}] if rng.random() < 0.7 else []
+            })
+
+        payload = {'search_metadata': {'status': 'Success'}, 'organic_results': results}
+        if start + num < total:
+            next_params = {k: v for k, v in params.items() if k != 'api_key'}
+            next_params['start'] = start + num
+            payload['serpapi_pagination'] = {'next': f"{base_url}/search.json?{urlencode(next_params)}"}
+        return self._json(200, payload)
+
+    def _elsevier(self, path, params, rng, base_url):
+        """Elsevier /content/search/scopus."""
+        if path != '/content/search/scopus':
+            return self._json(404, {'service-error': {'status': {'statusCode': 'RESOURCE_NOT_FOUND'}}})
+        start = int(params.get('start', 0))
+        count = int(params.get('count', 25))
+        total = self.settings.results_per_query
+        if total == 0:
+            return self._json(200, {'search-results': {
+                'opensearch:totalResults': '0', 'entry': [{'@_fa': 'true', 'error': 'Result set was empty'}], 'link': []
+            }})
+
+        entries = []
+        for _ in range(start, min(start + count, total)):
+            year = rng.randint(2010, 2025)
+            entries.append({
+                'dc:identifier': f"SCOPUS_ID:{rng.randint(10 ** 10, 10 ** 11 - 1)}",
+                'prism:doi': self._citing_doi(rng),
+                'dc:title': self._title(rng),
+                'prism:coverDate': f"{year}-{rng.randint(1, 12):02d}-01",
+                'prism:issn': f"{rng.randint(1000, 9999)}{rng.randint(1000, 9999)}",
+            })
+        links = []
+        if start + count < total:
+            next_params = dict(params, start=start + count)
+            links.append({'@ref': 'next', '@href': f"{base_url}/content/search/scopus?{urlencode(next_params)}"})
+        return self._json(200, {'search-results': {
+            'opensearch:totalResults': str(total), 'entry': entries, 'link': links
+        }})
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler delegating to the server's StubAPI."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, so pooled clients behave as they do against the real APIs
+
+    def _respond(self) -> None:
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        base_url = f"http://{self.headers.get('Host', '%s:%s' % self.server.server_address[:2])}"
+        status, headers, payload = self.server.api.handle(self.command, self.path, dict(self.headers), body, base_url)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Silence per-request logging."""
+        pass
+
+
+def create_server(host: str, port: int, settings: StubSettings) -> ThreadingHTTPServer:
+    """Create the stub HTTP server.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        settings: Stub behaviour
+
+    Returns:
+        Server instance; call ``serve_forever()`` to run it
+    """
+    server = ThreadingHTTPServer((host, port), StubRequestHandler)
+    server.daemon_threads = True
+    server.api = StubAPI(settings)
+    return server
+
+
+def endpoints_config(host: str, port: int) -> str:
+    """Render the config.toml `[endpoints]` table pointing at a running stub."""
+    lines = ['[endpoints]']
+    for service in SERVICES:
+        lines.append(f'{service} = "http://{host}:{port}/{service}"')
+    return '\n'.join(lines)
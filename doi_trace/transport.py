@@ -0,0 +1,192 @@
+import time
+from threading import Lock
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+
+from .config import config
+from .metrics import metrics
+
+
+class Transport:
+    """Shared, pooled HTTP transport used by every data source.
+
+    All requests go through a single keep-alive ``requests.Session`` so that
+    connections (and their TLS handshakes) are reused across calls and threads.
+    The transport adds:
+
+    1. A connection pool per host, sized by ``pool_size`` or a per-host override
+    2. gzip/deflate (and brotli, when the ``brotli`` package is installed) response compression
+    3. Default connect/read timeouts
+    4. Retries on connection errors and 429/5xx responses that honor ``Retry-After``
+
+    When an ``archive`` (see archive.py) is attached, every response is archived,
+    or, in replay mode, every request is answered from the archive instead of the network.
+    """
+
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 5, read_timeout: float = 60,
+                 retries: int = 3, backoff_factor: float = 1,
+                 pool_sizes: Optional[Dict[str, int]] = None) -> None:
+        """Initialize the transport.
+
+        Args:
+            pool_size: Maximum number of keep-alive connections kept per host
+            connect_timeout: Default connect timeout in seconds
+            read_timeout: Default read timeout in seconds
+            retries: Number of retries for failed connections and retryable statuses
+            backoff_factor: Exponential backoff factor between retries (seconds)
+            pool_sizes: Optional per-host pool size overrides (e.g. {'api.datacite.org': 8})
+        """
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.retry_statuses,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding'],
+            'User-Agent': f"{config.data.get('project_name', 'DOI Trace')}/{config.data.get('version', '')} "
+                          f"(mailto:{config.data.get('email', '')})",
+        })
+        self.archive = None
+        self.adapters = {}
+        self._mount('https://', pool_size)
+        self._mount('http://', pool_size)
+        for host, size in (pool_sizes or {}).items():
+            self._mount(f'https://{host}/', size)
+            self._mount(f'http://{host}/', size)
+
+    def _mount(self, prefix: str, pool_size: int) -> None:
+        """Mount a pooled adapter for a URL prefix."""
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=pool_size, max_retries=self.retry)
+        self.session.mount(prefix, adapter)
+        self.adapters[prefix] = adapter
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send a request through the shared session.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Extra arguments passed to ``requests.Session.request``
+
+        Returns:
+            Response object
+        """
+        if self.replaying:
+            return self.archive.replay(method, url, kwargs.get('params'), kwargs.get('data'))
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlsplit(url).hostname or ''
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            metrics.observe_http(host, time.perf_counter() - start, 'error')
+            raise
+        metrics.observe_http(host, time.perf_counter() - start, response.status_code)
+        retries = getattr(response.raw, 'retries', None)
+        if retries is not None:
+            metrics.retry(host, len(retries.history))
+        if self.archive is not None:
+            self.archive.record(method, url, kwargs.get('params'), kwargs.get('data'), response)
+        return response
+
+    @property
+    def replaying(self) -> bool:
+        """Whether requests are answered from an archive instead of the network."""
+        return self.archive is not None and self.archive.replaying
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send a GET request through the shared session."""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send a POST request through the shared session."""
+        return self.request('POST', url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Get connection-reuse statistics per host.
+
+        Returns:
+            Dictionary mapping host to request, connection and reuse counts
+        """
+        stats = {}
+        for adapter in self.adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None or not pool.num_requests:
+                    continue
+                host = stats.setdefault(pool.host, {'requests': 0, 'connections': 0, 'reused': 0})
+                host['requests'] += pool.num_requests
+                host['connections'] += pool.num_connections
+                host['reused'] += max(pool.num_requests - pool.num_connections, 0)
+        return stats
+
+    def report(self) -> None:
+        """Print connection-reuse statistics for every host contacted."""
+        stats = self.stats()
+        if not stats:
+            return
+        print("\nHTTP connection reuse:")
+        for host, counts in sorted(stats.items()):
+            ratio = counts['reused'] / counts['requests'] if counts['requests'] else 0
+            print(f"  {host}: {counts['requests']} requests over {counts['connections']} connections "
+                  f"({ratio:.0%} reused)")
+
+
+_transport = None
+_transport_lock = Lock()
+
+
+def get_transport() -> Transport:
+    """Get the process-wide transport, creating it from configuration on first use."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            settings = config.data.get('http', {})
+            _transport = Transport(
+                pool_size=settings.get('pool_size', 10),
+                connect_timeout=settings.get('connect_timeout', 5),
+                read_timeout=settings.get('read_timeout', 60),
+                retries=settings.get('retries', 3),
+                backoff_factor=settings.get('backoff_factor', 1),
+                pool_sizes=settings.get('pool_sizes', {}),
+            )
+        return _transport
+
+
+
+def rate_limit_sleep(limiter: str, seconds: float) -> None:
+    """Pause to stay within an API's rate limit and record the wait.
+
+    Skipped while replaying an archive, since no API is being called.
+
+    Args:
+        limiter: Name the wait is recorded under (e.g. 'serpapi')
+        seconds: Time to sleep
+    """
+    if _transport is not None and _transport.replaying:
+        return
+    time.sleep(seconds)
+    metrics.rate_limit_wait(limiter, seconds)
+
+
+def report_transport() -> None:
+    """Print connection-reuse statistics if any source used the transport."""
+    if _transport is not None:
+        _transport.report()
+
+
+def transport_stats() -> Dict[str, Dict[str, int]]:
+    """Get connection-reuse statistics, or an empty dict if no source used the transport."""
+    return _transport.stats() if _transport is not None else {}
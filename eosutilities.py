@@ -4,17 +4,39 @@ import json
 import os
 import pandas as pd
 import re
-import unicodedata # used to transform unicode to ascii such as '\u2026' to '...'
-from bs4 import BeautifulSoup # used together with unescape to remove html tags such as &lt;
-from html import unescape # used together with unescape to remove html tags such as &lt;
 from jellyfish import jaro_winkler_similarity # used to find google & crossref title similarities
 from crossref.restful import Works, Etiquette
+from doi_trace.transport import get_transport
+from doi_trace.doi_extract import extract_doi
+from doi_trace.normalize import normalize_title # removes html tags such as &lt; and transforms unicode to ascii such as '\u2026' to '...'
 
 data_path = 'data'
 
 #crossref
-with open(os.path.join(data_path+'/crossref_etiquette.json'), 'r') as fp: # read wos_eos_matched to json
-    my_etiquette = json.load(fp)
+_etiquette = None
+
+def loadEtiquette():
+    '''
+    reads crossref_etiquette.json from data_path on first use (not at import time, so the module imports without /data/)
+    '''
+    global _etiquette
+    if _etiquette is None:
+        with open(os.path.join(data_path+'/crossref_etiquette.json'), 'r') as fp:
+            _etiquette = json.load(fp)
+    return _etiquette
+
+def getEtiquette():
+    '''
+    returns the crossref Etiquette built from crossref_etiquette.json
+    '''
+    my_etiquette = loadEtiquette()
+    return Etiquette(my_etiquette['project_name'], my_etiquette['version'], my_etiquette['organization'], my_etiquette['email'])
+
+def __getattr__(name):
+    # keeps eosutil.my_etiquette working now that the file is read lazily
+    if name == 'my_etiquette':
+        return loadEtiquette()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 #my_etiquette = loadJSON('crossref_etiquette.json')
 #project_name = 'EOS DOI References Collection'
 #version = 'v3 May 2022'
@@ -145,7 +167,7 @@ def crossrefREST(author, year, title,jaro_desired = 0.95,jaro_min = 0.9):
     '''
     #print('init\t\tcrossrefREST(author,year,title)', flush=True)
     #my_etiquette = loadJSON('crossref_etiquette.json')
-    works = Works(etiquette=Etiquette(my_etiquette['project_name'], my_etiquette['version'], my_etiquette['organization'], my_etiquette['email']))
+    works = Works(etiquette=getEtiquette())
     #works = Works(etiquette=my_etiquette)
 
     #jaro_desired = 0.95 # desired jaro_wrinkler_score
@@ -160,8 +182,7 @@ def crossrefREST(author, year, title,jaro_desired = 0.95,jaro_min = 0.9):
     year = '('+str(year)+')'
     year = year.replace('((','(')
     year = year.replace('))',')')
-    title = BeautifulSoup(unescape(title), 'lxml').text #sanitize title from html tags
-    title = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii') # sanitize title from unicode
+    title = normalize_title(title) # sanitize title from html tags and unicode
     title = title.replace('...','')
     query = str(author)+' + '+str(year)+' + '+str(title) # create query for works.Works
     query = query.replace('+  +','+') # when year is empty, remove extra + sign
@@ -180,8 +201,7 @@ def crossrefREST(author, year, title,jaro_desired = 0.95,jaro_min = 0.9):
             cr_doi = item.get('DOI')
             if cr_title:
                 cr_title = cr_title[0]
-                cr_title = BeautifulSoup(unescape(cr_title), 'lxml').text #sanitize title from html tags
-                cr_title = unicodedata.normalize('NFKD', cr_title).encode('ascii', 'ignore').decode('ascii') # sanitize title from unicode
+                cr_title = normalize_title(cr_title) # sanitize title from html tags and unicode
                 jaro_winkler_s = jaro_winkler_similarity(title.upper(),cr_title.upper()) # get jaro winkler similarity score
             cr_year = None # get year from either published-print or issue
             try:
@@ -253,50 +273,13 @@ def noDOISoSearchCrossref(source,key,jaro_score):
     return source
 
 def getDOIfromURL(link):
-    pub_doi = ""
-    resp = re.search(r'\/(10\.\d+.*)$', link)
-    if resp:
-      pub_doi = resp[0]
-      pub_doi = re.sub(r'(\/full|\/meta|\.pdf|\.abstract|\.short|\&.*|\/download|\/html|\?.*|\#.*|\;|\)|\/$|\.$)','',pub_doi)
-    elif re.search(r'copernicus\.org', link):
-      resp = re.search(r'\//(\S+)\.copernicus\.org\/articles\/(\d+)\/(\d+)\/(\d+)', link)
-      if resp:
-        pub_doi = '10.5194/'+resp[1]+'-'+resp[2]+'-'+resp[3]+'-'+resp[4]
-    elif re.search(r'nature\.com\/articles\/', link):
-      resp = re.search(r'nature\.com\/articles\/(\S+)', link)
-      if resp:
-        pub_doi = '10.1038/'+resp[1]
-        pub_doi = re.sub(r'(\?.*|\/briefing.*)', '', pub_doi)
-        pub_doi = re.sub(r'%E2%80%', '-', pub_doi)
-        resp = re.match(r'10.1038\/sdata(\d{4})(\d+)', pub_doi)
-        if resp:
-          pub_doi = '10.1038/sdata.'+resp[1]+'.'+resp[2]
-        # https://www.nature.com/articles/s41558%E2%80%92019%E2%80%920592%E2%80%928 should translate to 10.1038/s41558-019-0592-8
-        # https://www.nature.com/articles/s41586%E2%80%93020%E2%80%932780%E2%80%930 should translate to 10.1038/s41586-020-2780-0
-    elif re.search(r'journals\.ametsoc\.org', link):
-      resp=re.search(r'\/((\w+|\.+|\-+|_+)*)\.xml', link)
-      if resp:
-        pub_doi = '10.1175/'+resp[1]
-        pub_doi = re.sub(r'_1', '.1', pub_doi)
-        if not re.search(r'-', pub_doi):
-          resp=re.match(r'10.1175\/(\w+)(d|D)(\d{2})(\d{4})', pub_doi)
-          if resp:
-            pub_doi = '10.1175/'+resp[1]+'-'+resp[2]+'-'+resp[3]+'-'+resp[4]+'.1'
-    if pub_doi:
-      pub_doi=re.sub(r'^\/', '', pub_doi)
-      pub_doi=re.sub(r'(\/|\;|\)|\.|\.full)$', '', pub_doi)
-      if re.search(r'elementa', pub_doi):
-        pub_doi = re.sub(r'\/\d+$', '', pub_doi)
-      elif re.search(r'10.1201\/(\S+)\/', pub_doi):
-        resp=re.match(r'10.1201\/(\S+)\/', pub_doi)
-        pub_doi = '10.1201/'+resp[1]
-    return pub_doi
+    return extract_doi(link) # rule table in doi_trace/doi_extract.py, shared with the GoogleScholar source
 
 def getZoteroItemsByDOI(g):
     if not g['DOI']:
         return g
-    stream = os.popen('curl -d \"'+g['DOI']+'\" -H \'Content-Type: text/plain\' http://127.0.0.1:1969/search')
-    output = stream.read()
+    response = get_transport().post('http://127.0.0.1:1969/search', data=g['DOI'].encode('utf-8'), headers={'Content-Type': 'text/plain'}) # local Zotero translation server
+    output = response.text
     print(output)
     if re.match('No items returned from any translator', output):
         return g
@@ -317,7 +300,7 @@ def getZoteroItemsByDOI(g):
 
 def addCrossrefType(g_citations):
     #my_etiquette = eosutil.loadJSON('crossref_etiquette.json')
-    works = Works(etiquette=Etiquette(my_etiquette['project_name'], my_etiquette['version'], my_etiquette['organization'], my_etiquette['email']))
+    works = Works(etiquette=getEtiquette())
     #works = Works(etiquette=my_etiquette)
     for i,g in enumerate(g_citations):
         if g.get('Type', ''):
@@ -347,7 +330,7 @@ def excludeBadTypes(g_citations):
 
 def getCrossRefYear(g_citations):
     #my_etiquette = eosutil.loadJSON('crossref_etiquette.json')
-    works = Works(etiquette=Etiquette(my_etiquette['project_name'], my_etiquette['version'], my_etiquette['organization'], my_etiquette['email']))
+    works = Works(etiquette=getEtiquette())
     #works = Works(etiquette=my_etiquette)
     for i,g in enumerate(g_citations):
         if g.get('Year', '') and len(str(g['Year'])):
@@ -361,7 +344,7 @@ def getCrossRefYear(g_citations):
 
 def getCrossRefYearAndType(g_citations):
     #my_etiquette = eosutil.loadJSON('crossref_etiquette.json')
-    works = Works(etiquette=Etiquette(my_etiquette['project_name'], my_etiquette['version'], my_etiquette['organization'], my_etiquette['email']))
+    works = Works(etiquette=getEtiquette())
     #works = Works(etiquette=my_etiquette)
     for i,g in enumerate(g_citations):
         if g.get('Type', '') and g.get('Year', '') and len(str(g['Year'])):
@@ -377,11 +360,10 @@ def getCrossRefYearAndType(g_citations):
 
 
 def findNewCitations(g_citations_old, g_citations_new):
+    # A set, so each lookup is constant time (see doi_trace.diff for full snapshot diffs)
+    old_result_ids = set(g['DOI'] for g in g_citations_old)
     g_citations = list()
-    old_result_ids = list()
-    for i,g in enumerate(g_citations_old):
-        old_result_ids.append(g['DOI'])
-    for i,g in enumerate(g_citations_new):
+    for g in g_citations_new:
         if g['DOI'] in old_result_ids:
             continue
         g_citations.append(g)
@@ -389,7 +371,7 @@ def findNewCitations(g_citations_old, g_citations_new):
 
 def addCrossrefTypeTitleYear(g_citations):
     #works = Works(etiquette=my_etiquette)
-    works = Works(etiquette=Etiquette(my_etiquette['project_name'], my_etiquette['version'], my_etiquette['organization'], my_etiquette['email']))
+    works = Works(etiquette=getEtiquette())
     for i,g in enumerate(g_citations):
         if g.get('Year', '') and len(g['Year']) and g.get('Type', '') and g.get('Title', ''):
             continue